@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 
 from app.database import get_db
+from app.executors import AUTH_EXECUTOR, IO_EXECUTOR
 from app.models import User
 from app.enums import UserRole
 
@@ -78,15 +79,31 @@ token_service = TokenService()
 
 # User Service
 class UserService:
+    def get_user_by_username(self, db: Session, username: str) -> Optional[User]:
+        return db.query(User).filter(User.username == username).first()
+
     def authenticate_user(
         self, db: Session, username: str, password: str
     ) -> Optional[User]:
-        user = db.query(User).filter(User.username == username).first()
+        user = self.get_user_by_username(db, username)
         if not user or not security.verify_password(password, user.hashed_password):  # type: ignore
             return None
         return user
 
-    def create_user(self, db: Session, user_data: UserCreate) -> User:
+    async def authenticate_user_async(
+        self, db: Session, username: str, password: str
+    ) -> Optional[User]:
+        # Query on the I/O pool and verify the bcrypt hash on the auth pool
+        user = await IO_EXECUTOR.run(self.get_user_by_username, db, username)
+        if not user or not await AUTH_EXECUTOR.run(
+            security.verify_password, password, user.hashed_password
+        ):
+            return None
+        return user
+
+    def create_user(
+        self, db: Session, user_data: UserCreate, hashed_password: Optional[str] = None
+    ) -> User:
         if db.query(User).filter(User.username == user_data.username).first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -99,10 +116,13 @@ class UserService:
                 detail="Email already registered",
             )
 
+        if hashed_password is None:
+            hashed_password = security.get_password_hash(user_data.password)
+
         db_user = User(
             username=user_data.username,
             email=user_data.email,
-            hashed_password=security.get_password_hash(user_data.password),
+            hashed_password=hashed_password,
             role=user_data.role,
         )
 
@@ -139,7 +159,7 @@ async def get_current_user(
     if not username:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await IO_EXECUTOR.run(user_service.get_user_by_username, db, username)
     if user is None:
         raise credentials_exception
     return user
@@ -159,7 +179,9 @@ def get_admin_user(current_user: User = Depends(get_current_user)):
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    user = user_service.authenticate_user(db, form_data.username, form_data.password)
+    user = await user_service.authenticate_user_async(
+        db, form_data.username, form_data.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -179,4 +201,9 @@ async def create_user(
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    return user_service.create_user(db, user_data)
+    hashed_password = await AUTH_EXECUTOR.run(
+        security.get_password_hash, user_data.password
+    )
+    return await IO_EXECUTOR.run(
+        user_service.create_user, db, user_data, hashed_password
+    )
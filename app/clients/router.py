@@ -12,13 +12,30 @@ from app.auth.router import get_current_user, get_admin_user
 from app.database import get_db
 from app.models import User
 from app.clients.service.client_service import ClientQueryService, ClientMutationService
+from app.clients.service.batching import predict_client, predict_clients
+from app.clients.service.intervention_search import search_interventions
+from app.clients.service.outcomes import OUTCOME_UPDATE_MIN_ROWS, OutcomeService
+from app.clients.service.logic import PREDICTION_CACHE, clean_input_data
+from app.clients.service.recommendations import RecommendationService
+from app.clients.service.what_if import WhatIfService, score_sweep
+from app.executors import CPU_EXECUTOR, IO_EXECUTOR
 
 from app.clients.schema import (
+    BatchPredictionInput,
+    BatchPredictionResponse,
     ClientResponse,
     ClientUpdate,
     ClientListResponse,
+    InterventionSearchInput,
+    InterventionSearchResult,
+    PredictionInput,
+    PredictionResult,
+    RecommendationListResponse,
+    RecommendationResponse,
     ServiceResponse,
     ServiceUpdate,
+    WhatIfSweepInput,
+    WhatIfSweepResponse,
 )
 
 
@@ -44,7 +61,101 @@ async def get_clients(
     Returns:
         A list of clients according to the specified pagination rules.
     """
-    return ClientQueryService.get_clients(db, skip, limit)
+    return await IO_EXECUTOR.run(ClientQueryService.get_clients, db, skip, limit)
+
+
+@router.post("/predict", response_model=PredictionResult)
+async def predict(
+    prediction_input: PredictionInput,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Predict the baseline success rate of a client and the best interventions.
+    Concurrent requests are merged into one model call by the micro-batcher.
+    """
+    return await predict_client(prediction_input.model_dump())
+
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(
+    batch: BatchPredictionInput,
+    current_user: User = Depends(get_current_user),
+):
+    """Score a batch of client assessments in one vectorized model call"""
+    inputs = [client_data.model_dump() for client_data in batch.clients]
+    return {"results": await predict_clients(inputs, top_k=batch.top_k)}
+
+
+@router.post("/predict/search", response_model=InterventionSearchResult)
+async def search_predictions(
+    search: InterventionSearchInput,
+    current_user: User = Depends(get_current_user),
+):
+    """Find the best interventions under a count limit or cost budget"""
+    return await CPU_EXECUTOR.run(
+        search_interventions,
+        clean_input_data(search.client.model_dump()),
+        top_k=search.top_k,
+        max_interventions=search.max_interventions,
+        costs=search.costs,
+        budget=search.budget,
+        max_nodes=search.max_nodes,
+    )
+
+
+@router.post("/predict/what-if", response_model=WhatIfSweepResponse)
+async def what_if_sweep(
+    sweep: WhatIfSweepInput,
+    current_user: User = Depends(get_current_user),
+):
+    """Score every intervention combination while varying one or two features"""
+    features, values = WhatIfService.build_grid(sweep.sweeps)
+    return await CPU_EXECUTOR.run(
+        score_sweep, clean_input_data(sweep.client.model_dump()), features, values
+    )
+
+
+@router.get("/predict/cache-stats", response_model=dict)
+async def get_prediction_cache_stats(current_user: User = Depends(get_admin_user)):
+    """Get hit, miss and eviction counters of the prediction cache"""
+    return PREDICTION_CACHE.stats()
+
+
+@router.get("/recommendations", response_model=RecommendationListResponse)
+async def get_recommendations(
+    current_user: User = Depends(get_admin_user),
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(
+        default=50, ge=1, le=150, description="Maximum number of records to return"
+    ),
+    db: Session = Depends(get_db),
+):
+    """List stored client recommendations without running the model"""
+    return await IO_EXECUTOR.run(
+        RecommendationService.get_recommendations, db, skip, limit
+    )
+
+
+@router.post("/recommendations/backfill", response_model=dict)
+async def backfill_recommendations(
+    full: bool = Query(False, description="Rescore clients that are up to date"),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Score every client without a recommendation from the active model"""
+    return await IO_EXECUTOR.run(RecommendationService.backfill, db, full=full)
+
+
+@router.post("/outcomes/apply", response_model=dict)
+async def apply_outcome_updates(
+    min_rows: int = Query(
+        OUTCOME_UPDATE_MIN_ROWS, ge=1, description="New outcomes needed per model"
+    ),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Update the registry models with the outcomes logged since their artifacts"""
+    return await IO_EXECUTOR.run(OutcomeService.apply_updates, db, min_rows)
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
@@ -54,7 +165,7 @@ async def get_client(
     db: Session = Depends(get_db),
 ):
     """Get a specific client by ID"""
-    return ClientQueryService.get_client(db, client_id)
+    return await IO_EXECUTOR.run(ClientQueryService.get_client, db, client_id)
 
 
 @router.get("/search/by-criteria", response_model=List[ClientResponse])
@@ -87,7 +198,8 @@ async def get_clients_by_criteria(
     db: Session = Depends(get_db),
 ):
     """Search clients by any combination of criteria"""
-    return ClientQueryService.get_clients_by_criteria(
+    return await IO_EXECUTOR.run(
+        ClientQueryService.get_clients_by_criteria,
         db,
         employment_status=employment_status,
         education_level=education_level,
@@ -129,7 +241,8 @@ async def get_clients_by_services(
     db: Session = Depends(get_db),
 ):
     """Get clients filtered by multiple service statuses"""
-    return ClientQueryService.get_clients_by_services(
+    return await IO_EXECUTOR.run(
+        ClientQueryService.get_clients_by_services,
         db,
         employment_assistance=employment_assistance,
         life_stabilization=life_stabilization,
@@ -148,7 +261,19 @@ async def get_client_services(
     db: Session = Depends(get_db),
 ):
     """Get all services and their status for a specific client, including case worker info"""
-    return ClientQueryService.get_client_services(db, client_id)
+    return await IO_EXECUTOR.run(ClientQueryService.get_client_services, db, client_id)
+
+
+@router.get("/{client_id}/recommendation", response_model=RecommendationResponse)
+async def get_client_recommendation(
+    client_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Get the stored recommendation of a client"""
+    return await IO_EXECUTOR.run(
+        RecommendationService.get_recommendation, db, client_id
+    )
 
 
 @router.get("/search/success-rate", response_model=List[ClientResponse])
@@ -160,7 +285,9 @@ async def get_clients_by_success_rate(
     db: Session = Depends(get_db),
 ):
     """Get clients with success rate above specified threshold"""
-    return ClientQueryService.get_clients_by_success_rate(db, min_rate)
+    return await IO_EXECUTOR.run(
+        ClientQueryService.get_clients_by_success_rate, db, min_rate
+    )
 
 
 @router.get("/case-worker/{case_worker_id}", response_model=List[ClientResponse])
@@ -169,7 +296,9 @@ async def get_clients_by_case_worker(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return ClientQueryService.get_clients_by_case_worker(db, case_worker_id)
+    return await IO_EXECUTOR.run(
+        ClientQueryService.get_clients_by_case_worker, db, case_worker_id
+    )
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
@@ -180,7 +309,9 @@ async def update_client(
     db: Session = Depends(get_db),
 ):
     """Update a client's information"""
-    return ClientMutationService.update_client(db, client_id, client_data)
+    return await IO_EXECUTOR.run(
+        ClientMutationService.update_client, db, client_id, client_data
+    )
 
 
 @router.put("/{client_id}/services/{user_id}", response_model=ServiceResponse)
@@ -191,8 +322,12 @@ async def update_client_services(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return ClientMutationService.update_client_services(
-        db, client_id, user_id, service_update
+    return await IO_EXECUTOR.run(
+        ClientMutationService.update_client_services,
+        db,
+        client_id,
+        user_id,
+        service_update,
     )
 
 
@@ -204,7 +339,9 @@ async def create_case_assignment(
     db: Session = Depends(get_db),
 ):
     """Create a new case assignment for a client with a case worker"""
-    return ClientMutationService.create_case_assignment(db, client_id, case_worker_id)
+    return await IO_EXECUTOR.run(
+        ClientMutationService.create_case_assignment, db, client_id, case_worker_id
+    )
 
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -214,5 +351,5 @@ async def delete_client(
     db: Session = Depends(get_db),
 ):
     """Delete a client"""
-    ClientMutationService.delete_client(db, client_id)
+    await IO_EXECUTOR.run(ClientMutationService.delete_client, db, client_id)
     return None
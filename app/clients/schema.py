@@ -4,8 +4,9 @@ Defines schemas for client data, predictions, and API responses.
 """
 
 # Standard library imports
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel, Field, NonNegativeFloat
+from typing import Optional, List, Tuple
 from enum import IntEnum
 
 
@@ -47,6 +48,117 @@ class PredictionInput(BaseModel):
     need_mental_health_support_bool: str
 
 
+class PredictionSpread(BaseModel):
+    """Disagreement between the trees of a forest on one prediction."""
+
+    std: float
+    low: float = Field(description="Lower percentile of the tree predictions")
+    high: float = Field(description="Upper percentile of the tree predictions")
+
+
+class PredictionResult(BaseModel):
+    """
+    Baseline success rate of a client and the best intervention combinations,
+    ordered from lowest to highest predicted success rate. Forest models also
+    report the spread of the baseline and of each combination.
+    """
+
+    baseline: float
+    interventions: List[Tuple[float, List[str]]]
+    baseline_spread: Optional[PredictionSpread] = None
+    spreads: Optional[List[PredictionSpread]] = None
+
+
+class BatchPredictionInput(BaseModel):
+    """Schema for scoring a whole caseload in one request."""
+
+    clients: List[PredictionInput] = Field(min_length=1, max_length=1000)
+    top_k: int = Field(3, ge=1, le=128, description="Combinations per client")
+
+
+class BatchPredictionResponse(BaseModel):
+    results: List[PredictionResult]
+
+
+class InterventionSearchInput(BaseModel):
+    """Schema for a constrained search over intervention combinations."""
+
+    client: PredictionInput
+    top_k: int = Field(3, ge=1, le=128, description="Combinations to return")
+    max_interventions: Optional[int] = Field(
+        None, ge=0, description="Most interventions allowed at once"
+    )
+    costs: Optional[List[NonNegativeFloat]] = Field(
+        None, min_length=7, max_length=7, description="Cost of each intervention"
+    )
+    budget: Optional[float] = Field(None, ge=0, description="Largest total cost")
+    max_nodes: Optional[int] = Field(
+        None, ge=1, description="Search expansions before completing greedily"
+    )
+
+
+class InterventionSearchResult(PredictionResult):
+    """
+    Best feasible combinations of a search. When the search was cut off by
+    max_nodes, exact is false and unexplored_bound caps any missed combination.
+    """
+
+    nodes_expanded: int
+    exact: bool
+    unexplored_bound: Optional[float] = None
+
+
+class SweepFeature(BaseModel):
+    """One demographic feature of a what-if sweep and the values it covers."""
+
+    feature: str = Field(description="Client feature to vary, e.g. computer_scale")
+    start: Optional[int] = Field(None, description="Defaults to the lower bound")
+    stop: Optional[int] = Field(None, description="Defaults to the upper bound")
+    step: int = Field(1, ge=1)
+
+
+class WhatIfSweepInput(BaseModel):
+    """Schema for scoring a client while varying one or two features."""
+
+    client: PredictionInput
+    sweeps: List[SweepFeature] = Field(min_length=1, max_length=2)
+
+
+class WhatIfSweepResponse(BaseModel):
+    """
+    Predictions over the sweep grid. The leading dimensions of predictions,
+    baseline, best and best_combination follow values, and the last dimension
+    of predictions follows combinations.
+    """
+
+    features: List[str]
+    values: List[List[int]]
+    combinations: List[List[str]]
+    predictions: list
+    baseline: list
+    best: list
+    best_combination: list
+
+
+class RecommendationResponse(BaseModel):
+    """Stored recommendation of a client, refreshed when the client changes."""
+
+    client_id: int
+    baseline: float
+    interventions: List[Tuple[float, List[str]]]
+    model_version: str
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+        protected_namespaces = ()
+
+
+class RecommendationListResponse(BaseModel):
+    recommendations: List[RecommendationResponse]
+    total: int
+
+
 class ClientBase(BaseModel):
     age: int = Field(ge=18, description="Age of client, must be 18 or older")
     gender: Gender = Field(description="Gender: 1 for male, 2 for female")
@@ -0,0 +1,187 @@
+"""
+Dynamic micro-batching for concurrent prediction requests.
+Requests arriving within a short window are merged into one model call and
+the results are fanned back out to the waiting coroutines.
+"""
+
+# Standard library imports
+import asyncio
+import functools
+import os
+import time
+
+# Local application imports
+from app.clients.service.logic import (
+    PREDICTION_CACHE,
+    clean_input_batch,
+    clean_input_data,
+    prediction_cache_key,
+    score_batch,
+)
+from app.executors import CPU_EXECUTOR
+from app.monitoring import METRICS
+from app.monitoring.metrics import SIZE_BUCKETS
+from app.monitoring.timing import (
+    add_request_stages,
+    collect_stages,
+    record_stages,
+    start_request_trace,
+)
+
+
+class MicroBatcher:
+    """Collects submitted items and processes them in batches."""
+
+    def __init__(
+        self,
+        process_batch,
+        max_batch_size=32,
+        max_wait_seconds=0.003,
+        name="batch",
+        executor=None,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            process_batch (callable): Blocking function mapping a list of items
+                to a list of results in the same order; run in an executor
+            max_batch_size (int): Items that trigger an immediate flush
+            max_wait_seconds (float): Longest time the first item of a batch
+                waits for others to join
+            name (str): Prefix of the batch-size and queue-wait histograms
+            executor (BoundedExecutor): Pool running process_batch, or None
+                for the event loop's default thread pool
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.batch_sizes = METRICS.histogram(
+            f"{name}_size", SIZE_BUCKETS, "Items merged into one batch"
+        )
+        self.queue_waits = METRICS.histogram(
+            f"{name}_queue_wait_seconds", description="Time items waited for a batch"
+        )
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, item):
+        """
+        Queue one item and wait for its result.
+
+        Args:
+            item: Input passed to process_batch as part of a list
+
+        Returns:
+            The result process_batch returned for this item
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # State belongs to one event loop; start afresh on a new one
+            self._loop, self._pending, self._timer = loop, [], None
+        future = loop.create_future()
+        self._pending.append((item, future, time.monotonic()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        result, stages = await future
+        # Every request of a batch waited for all of the batch's stages
+        add_request_stages(stages)
+        return result
+
+    def _flush(self):
+        """Hand the pending items to a background task as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        """Process one batch off the event loop and resolve its futures."""
+        started = time.monotonic()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued in batch:
+            self.queue_waits.observe(started - enqueued)
+        items = [item for item, _, _ in batch]
+        # This task's context is a copy; trace the batch apart from any request
+        stages = start_request_trace()
+        try:
+            if self.executor is not None:
+                results = await self.executor.run(self.process_batch, items)
+            else:
+                results, job_stages = await self._loop.run_in_executor(
+                    None, collect_stages, functools.partial(self.process_batch, items)
+                )
+                record_stages(job_stages)
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result((result, stages))
+
+
+# Merges cleaned client rows into one score_batch call on the CPU executor
+PREDICTION_BATCHER = MicroBatcher(
+    score_batch,
+    max_batch_size=int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "32")),
+    max_wait_seconds=float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "3")) / 1000,
+    name="prediction_batch",
+    executor=CPU_EXECUTOR,
+)
+
+
+async def predict_client(input_data):
+    """
+    Predict one client, serving cached results and micro-batching misses.
+
+    Args:
+        input_data (dict): Raw input data from the client
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    raw_data = clean_input_data(input_data)
+    cache_key = prediction_cache_key(raw_data)
+    result = PREDICTION_CACHE.get(cache_key)
+    if result is None:
+        result = await PREDICTION_BATCHER.submit(raw_data)
+        PREDICTION_CACHE.put(cache_key, result)
+    return result
+
+
+async def predict_clients(inputs, top_k=3):
+    """
+    Predict a caseload, scoring all cache misses in one CPU executor job.
+
+    Args:
+        inputs (list): Raw input data dicts, one per client
+        top_k (int): Number of best intervention combinations to keep
+
+    Returns:
+        list: Processed results, in the same order as the inputs
+    """
+    raw_rows = clean_input_batch(inputs)
+    cache_keys = [prediction_cache_key(raw_data, top_k) for raw_data in raw_rows]
+    results = [PREDICTION_CACHE.get(cache_key) for cache_key in cache_keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        scored = await CPU_EXECUTOR.run(
+            score_batch, [raw_rows[index] for index in missing], top_k
+        )
+        for index, result in zip(missing, scored):
+            PREDICTION_CACHE.put(cache_keys[index], result)
+            results[index] = result
+    return results
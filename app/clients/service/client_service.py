@@ -1,8 +1,31 @@
+import logging
+
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.models import Client, ClientCase, User
+from app.models import Client, ClientCase, ClientRecommendation, User
 from app.clients.schema import ClientUpdate, ServiceUpdate
+from app.clients.service.outcomes import OutcomeService
+from app.clients.service.recommendations import RecommendationService
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_recommendation(db: Session, client_id: int):
+    """
+    Rescore a client after a committed update without failing the update.
+    If scoring fails, the stored recommendation is dropped so that it is not
+    served for the old data; the next backfill scores the client again.
+    """
+    try:
+        RecommendationService.refresh_client(db, client_id)
+    except Exception:
+        db.rollback()
+        logger.exception("Failed to refresh the recommendation of client %s", client_id)
+        db.query(ClientRecommendation).filter(
+            ClientRecommendation.client_id == client_id
+        ).delete(synchronize_session=False)
+        db.commit()
 
 
 class ClientQueryService:
@@ -173,12 +196,13 @@ class ClientMutationService:
         try:
             db.commit()
             db.refresh(client)
-            return client
         except Exception as e:
             db.rollback()
             raise HTTPException(
                 status_code=500, detail=f"Failed to update client: {str(e)}"
             )
+        refresh_recommendation(db, client_id)
+        return client
 
     # Update service info for a specific client-case worker relationship
     @staticmethod
@@ -195,17 +219,21 @@ class ClientMutationService:
                 status_code=404,
                 detail=f"No case found for client {client_id} and worker {user_id}",
             )
-        for field, value in update_data.dict(exclude_unset=True).items():
+        update_fields = update_data.dict(exclude_unset=True)
+        for field, value in update_fields.items():
             setattr(case, field, value)
         try:
+            if "success_rate" in update_fields:
+                OutcomeService.record_outcome(db, case)
             db.commit()
             db.refresh(case)
-            return case
         except Exception as e:
             db.rollback()
             raise HTTPException(
                 status_code=500, detail=f"Failed to update client services: {str(e)}"
             )
+        refresh_recommendation(db, client_id)
+        return case
 
     # Assign a new case worker to a client, with default service values
     @staticmethod
@@ -254,6 +282,9 @@ class ClientMutationService:
             raise HTTPException(status_code=404, detail=f"Client {client_id} not found")
         try:
             db.query(ClientCase).filter(ClientCase.client_id == client_id).delete()
+            db.query(ClientRecommendation).filter(
+                ClientRecommendation.client_id == client_id
+            ).delete()
             db.delete(client)
             db.commit()
         except Exception as e:
@@ -0,0 +1,220 @@
+"""
+Constrained search for the best intervention combinations.
+Instead of scoring all 2^n combinations, a best-first branch-and-bound search
+fixes one intervention at a time and prunes with an upper bound built from the
+largest leaf value each tree can still reach.
+"""
+
+# Standard library imports
+import heapq
+from itertools import product
+
+# Third-party imports
+import numpy as np
+
+# Local application imports
+from app.clients.service.logic import (
+    get_baseline_row,
+    get_model,
+    intervention_row_to_names,
+    predict_matrix,
+)
+
+
+class InterventionSearch:
+    """Branch-and-bound over the binary intervention features of one client."""
+
+    def __init__(self, partial_evaluator, fixed_row, num_interventions):
+        """
+        Reduce every tree to the leaves reachable with the client's demographics.
+
+        Args:
+            partial_evaluator (PartialEvaluator): Evaluator of the ensemble
+            fixed_row (list): Cleaned demographic values of the client
+            num_interventions (int): Number of binary intervention features
+        """
+        self.kernel = partial_evaluator.kernel
+        self.num_interventions = num_interventions
+        (
+            trees,
+            leaves,
+            self.required_ones,
+            self.required_zeros,
+        ) = partial_evaluator.residual_leaves(fixed_row)
+        self.values = np.asarray(self.kernel.value)[leaves]
+        self.tree_starts = np.flatnonzero(np.diff(trees, prepend=-1))
+        self.nodes_expanded = 0
+        self.max_interventions = None
+        self.costs = [0.0] * num_interventions
+        self.budget = None
+
+    def bound(self, ones, zeros):
+        """
+        Upper bound of the prediction over all completions of an assignment.
+
+        Args:
+            ones (int): Bitmask of interventions fixed to 1
+            zeros (int): Bitmask of interventions fixed to 0
+
+        Returns:
+            float: Bound, exact once every intervention is fixed
+        """
+        compatible = ((self.required_ones & zeros) == 0) & (
+            (self.required_zeros & ones) == 0
+        )
+        best_leaves = np.maximum.reduceat(
+            np.where(compatible, self.values, -np.inf), self.tree_starts
+        )
+        return self.kernel.combine(best_leaves.reshape(-1, 1))[0]
+
+    def search(
+        self, top_k=3, max_interventions=None, costs=None, budget=None, max_nodes=None
+    ):
+        """
+        Find the best feasible intervention combinations.
+
+        Args:
+            top_k (int): Number of combinations to return
+            max_interventions (int): Most interventions allowed at once
+            costs (list): Cost of each intervention, defaults to zero
+            budget (float): Largest total cost allowed
+            max_nodes (int): Expansions after which the search stops and
+                completes the open branches greedily
+
+        Returns:
+            tuple: List of (prediction, bitmask) from best to worst, and the
+            largest bound of anything not explored, or None when exact
+        """
+        self.max_interventions = max_interventions
+        self.costs = [0.0] * self.num_interventions if costs is None else list(costs)
+        self.budget = budget
+        tie_breaker = 0
+        heap = [(-self.bound(0, 0), tie_breaker, 0, 0, 0, 0, 0.0)]
+        results = []
+        while heap and len(results) < top_k:
+            if max_nodes is not None and self.nodes_expanded >= max_nodes:
+                open_bound = -heap[0][0]
+                while heap and len(results) < top_k:
+                    _, _, depth, ones, zeros, count, cost = heapq.heappop(heap)
+                    results.append(
+                        self._complete_greedily(depth, ones, zeros, count, cost)
+                    )
+                return sorted(results, reverse=True), open_bound
+            negative_bound, _, depth, ones, zeros, count, cost = heapq.heappop(heap)
+            if depth == self.num_interventions:
+                results.append((-negative_bound, ones))
+                continue
+            self.nodes_expanded += 1
+            bit = 1 << depth
+            children = [(ones, zeros | bit, count, cost)]
+            if self._can_add(depth, count, cost):
+                children.append(
+                    (ones | bit, zeros, count + 1, cost + self.costs[depth])
+                )
+            for child_ones, child_zeros, child_count, child_cost in children:
+                tie_breaker += 1
+                heapq.heappush(
+                    heap,
+                    (
+                        -self.bound(child_ones, child_zeros),
+                        tie_breaker,
+                        depth + 1,
+                        child_ones,
+                        child_zeros,
+                        child_count,
+                        child_cost,
+                    ),
+                )
+        return results, None
+
+    def _can_add(self, position, count, cost):
+        """Check whether one more intervention still fits the constraints."""
+        if self.max_interventions is not None and count >= self.max_interventions:
+            return False
+        return self.budget is None or cost + self.costs[position] <= self.budget
+
+    def _complete_greedily(self, depth, ones, zeros, count, cost):
+        """Fix the remaining interventions one by one to the better feasible child."""
+        for position in range(depth, self.num_interventions):
+            bit = 1 << position
+            if self._can_add(position, count, cost) and self.bound(
+                ones | bit, zeros
+            ) > self.bound(ones, zeros | bit):
+                ones |= bit
+                count += 1
+                cost += self.costs[position]
+            else:
+                zeros |= bit
+        return self.bound(ones, zeros), ones
+
+
+def _is_feasible(bits, max_interventions, costs, budget):
+    """Check a complete combination against the search constraints."""
+    if max_interventions is not None and sum(bits) > max_interventions:
+        return False
+    if budget is not None and costs is not None:
+        return float(np.dot(bits, costs)) <= budget
+    return True
+
+
+def search_interventions(
+    raw_data, top_k=3, max_interventions=None, costs=None, budget=None, max_nodes=None
+):
+    """
+    Search the best intervention combinations of one client under constraints.
+
+    Args:
+        raw_data (list): Cleaned client data row
+        top_k (int): Number of combinations to return
+        max_interventions (int): Most interventions allowed at once
+        costs (list): Cost of each intervention
+        budget (float): Largest total cost allowed
+        max_nodes (int): Expansion limit before greedy completion
+
+    Returns:
+        dict: Baseline, best combinations from lowest to highest prediction,
+        expansion count, and the bound of anything unexplored when truncated
+    """
+    loaded = get_model()
+    num_interventions = loaded.num_features - len(raw_data)
+    baseline = predict_matrix(get_baseline_row(raw_data).reshape(1, -1))
+    if loaded.partial_evaluator is not None:
+        searcher = InterventionSearch(
+            loaded.partial_evaluator, raw_data, num_interventions
+        )
+        found, open_bound = searcher.search(
+            top_k, max_interventions, costs, budget, max_nodes
+        )
+        combinations = [
+            (score, [(ones >> bit) & 1 for bit in range(num_interventions)])
+            for score, ones in found
+        ]
+        nodes_expanded = searcher.nodes_expanded
+    else:
+        # Without tree bounds, fall back to scoring every feasible combination
+        feasible = np.array(
+            [
+                bits
+                for bits in product([0, 1], repeat=num_interventions)
+                if _is_feasible(bits, max_interventions, costs, budget)
+            ]
+        )
+        rows = np.concatenate(
+            (np.tile(np.array(raw_data, dtype=float), (len(feasible), 1)), feasible),
+            axis=1,
+        )
+        scores = predict_matrix(rows)
+        order = scores.argsort()[::-1][:top_k]
+        combinations = [(scores[index], list(feasible[index])) for index in order]
+        open_bound, nodes_expanded = None, len(feasible)
+    interventions = [
+        (float(score), intervention_row_to_names(bits))
+        for score, bits in reversed(combinations)
+    ]
+    return {
+        "baseline": float(baseline[-1]),
+        "interventions": interventions,
+        "nodes_expanded": nodes_expanded,
+        "exact": open_bound is None,
+        "unexplored_bound": None if open_bound is None else float(open_bound),
+    }
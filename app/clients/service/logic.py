@@ -4,15 +4,22 @@ Handles data cleaning, model predictions, and intervention combinations analysis
 """
 
 # Standard library imports
+import functools
+import hashlib
 import os
-
-# import json
-from itertools import product
+import threading
 
 # Third-party imports
 import pickle
 import numpy as np
 
+# Local application imports
+from app.clients.service.prediction_cache import PredictionCache
+from app.ml.forest_kernel import ForestKernel
+from app.ml.feature_encoder import FEATURE_ENCODER
+from app.ml.partial_eval import PartialEvaluator
+from app.monitoring import METRICS, stage
+
 # Constants
 COLUMN_INTERVENTIONS = [
     "Life Stabilization",
@@ -24,11 +31,186 @@ COLUMN_INTERVENTIONS = [
     "Enhanced Referrals for Skills Development",
 ]
 
-# Load model
+# Model file, loaded on first use or by warmup() at application startup. When
+# the model has been exported to MODEL_ARRAYS_PATH, its arrays are memory-mapped
+# instead, so all worker processes share one copy.
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(CURRENT_DIR, "model.pkl")
-with open(MODEL_PATH, "rb") as model_file:
-    MODEL = pickle.load(model_file)
+MODEL_ARRAYS_PATH = os.environ.get(
+    "MODEL_ARRAYS_PATH", os.path.join(CURRENT_DIR, "model_arrays")
+)
+# Hex digits of the content hash that identifies the loaded model
+MODEL_VERSION_LENGTH = 16
+
+# Inference backend: "partial" walks each tree once with the client's
+# demographics, "kernel" scores matrices with the packed ForestKernel and
+# "sklearn" calls the estimator's predict. Unless the backend is "sklearn", matrices of
+# up to KERNEL_MAX_ROWS rows go through the kernel; above that sklearn's
+# compiled tree walk outweighs its fixed per-call overhead.
+KERNEL_MAX_ROWS = 512
+INFERENCE_BACKENDS = ("partial", "kernel", "sklearn")
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "partial")
+if INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+    raise ValueError(
+        f"Unknown inference backend {INFERENCE_BACKEND!r}, "
+        f"expected one of {INFERENCE_BACKENDS}"
+    )
+
+# Scoring matrices of up to SCORING_BUFFER_MAX_ROWS rows are written into a
+# per-thread buffer that is reused across calls; larger batches allocate their own
+SCORING_BUFFER_MAX_ROWS = int(os.environ.get("SCORING_BUFFER_MAX_ROWS", "4096"))
+
+# Percentiles of the per-tree predictions reported with each forest
+# recommendation, next to their standard deviation
+SPREAD_PERCENTILES = (10.0, 90.0)
+
+# Results of interpret_and_calculate, keyed on the cleaned input and model version
+PREDICTION_CACHE = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL", "3600")),
+)
+METRICS.register_collector("prediction_cache", PREDICTION_CACHE.stats)
+
+
+class LoadedModel:
+    """Estimator and/or packed forest kernel together with its scoring engines."""
+
+    def __init__(self, estimator=None, forest_kernel=None, version=None):
+        """
+        Compile the forest kernel and partial evaluator when supported.
+
+        Args:
+            estimator: Unpickled sklearn estimator, None for array-only models
+            forest_kernel (ForestKernel): Packed trees, built from the
+                estimator when not given
+            version (str): Content hash of the files the model was loaded from
+        """
+        if forest_kernel is None and ForestKernel.supports(estimator):
+            forest_kernel = ForestKernel.from_estimator(estimator)
+        self.estimator = estimator
+        self.forest_kernel = forest_kernel
+        self.version = version
+        self.partial_evaluator = None
+        if forest_kernel is not None:
+            self.partial_evaluator = PartialEvaluator(
+                forest_kernel,
+                num_fixed=forest_kernel.num_features - len(COLUMN_INTERVENTIONS),
+            )
+
+    @property
+    def num_features(self):
+        """Return the number of input features the model expects."""
+        if self.forest_kernel is not None:
+            return self.forest_kernel.num_features
+        return self.estimator.n_features_in_
+
+
+_model_lock = threading.Lock()
+_loaded_model = None
+_ready = threading.Event()
+_scoring_buffers = threading.local()
+
+
+def load_model(model_path=MODEL_PATH, arrays_path=MODEL_ARRAYS_PATH):
+    """
+    Load the model, preferring its memory-mapped arrays over the pickle.
+
+    Args:
+        model_path (str): Path of the pickled estimator
+        arrays_path (str): Directory written by export_model_arrays
+
+    Returns:
+        LoadedModel: The estimator and its scoring engines
+    """
+    if os.path.isdir(arrays_path):
+        return LoadedModel(
+            forest_kernel=ForestKernel.load(arrays_path),
+            version=model_file_hash(arrays_path),
+        )
+    with open(model_path, "rb") as model_file:
+        return LoadedModel(pickle.load(model_file), version=model_file_hash(model_path))
+
+
+def model_file_hash(path):
+    """
+    Hash the model file, or the names and contents of the files of a model
+    directory, so that the version changes only when the model does.
+
+    Args:
+        path (str): Pickled estimator or directory of exported arrays
+
+    Returns:
+        str: First MODEL_VERSION_LENGTH hex digits of the SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    else:
+        paths = [path]
+    for file_path in paths:
+        digest.update(os.path.basename(file_path).encode())
+        with open(file_path, "rb") as model_file:
+            for block in iter(lambda: model_file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:MODEL_VERSION_LENGTH]
+
+
+def export_model_arrays(model_path=MODEL_PATH, arrays_path=MODEL_ARRAYS_PATH):
+    """
+    Export the pickled forest to memory-mappable arrays for load_model.
+
+    Args:
+        model_path (str): Path of the pickled estimator
+        arrays_path (str): Directory to write the arrays to
+    """
+    with open(model_path, "rb") as model_file:
+        ForestKernel.from_estimator(pickle.load(model_file)).save(arrays_path)
+
+
+def get_model():
+    """
+    Return the active model, loading it on first use.
+
+    Returns:
+        LoadedModel: The estimator and its scoring engines
+    """
+    global _loaded_model
+    if _loaded_model is None:
+        with _model_lock:
+            if _loaded_model is None:
+                _loaded_model = load_model()
+    return _loaded_model
+
+
+def get_model_version():
+    """
+    Return the version of the model that scores predictions.
+
+    Returns:
+        str: Content hash of the loaded model, the same in every process
+    """
+    return get_model().version
+
+
+def warmup():
+    """
+    Load the model and run one dummy 128-row prediction through every engine,
+    so the first real request pays neither for unpickling nor first-call costs.
+    """
+    loaded = get_model()
+    raw_data = [0] * (loaded.num_features - len(COLUMN_INTERVENTIONS))
+    intervention_rows = create_matrix(raw_data)
+    score_batch([raw_data])
+    score_batch([raw_data, raw_data])
+    predict_matrix(intervention_rows)
+    if loaded.estimator is not None:
+        loaded.estimator.predict(intervention_rows)
+    _ready.set()
+
+
+def is_ready():
+    """Return whether warmup() has completed."""
+    return _ready.is_set()
 
 
 def clean_input_data(input_data):
@@ -41,128 +223,54 @@ def clean_input_data(input_data):
     Returns:
         list: Cleaned and formatted data ready for model input
     """
-    columns = [
-        "age",
-        "gender",
-        "work_experience",
-        "canada_workex",
-        "dep_num",
-        "canada_born",
-        "citizen_status",
-        "level_of_schooling",
-        "fluent_english",
-        "reading_english_scale",
-        "speaking_english_scale",
-        "writing_english_scale",
-        "numeracy_scale",
-        "computer_scale",
-        "transportation_bool",
-        "caregiver_bool",
-        "housing",
-        "income_source",
-        "felony_bool",
-        "attending_school",
-        "currently_employed",
-        "substance_use",
-        "time_unemployed",
-        "need_mental_health_support_bool",
-    ]
-    demographics = {key: input_data[key] for key in columns}
-    output = []
-    for column in columns:
-        value = demographics.get(column, None)
-        if isinstance(value, str):
-            value = convert_text(value)  # Removed 'column' from here as it wasn't used
-        output.append(value)
-    return output
+    with stage("clean_input"):
+        return FEATURE_ENCODER.encode_record(input_data)
 
 
-def convert_text(text_data: str):
+def clean_input_batch(inputs):
     """
-    Convert text answers from front end into numerical values.
+    Clean many payloads at once with the vectorized encoder.
 
     Args:
-        text_data (str): Text data to convert
+        inputs (list): Raw input data dicts, one per client
 
     Returns:
-        int: Converted numerical value
-    """
-    categorical_mappings = [
-        {"": 0, "true": 1, "false": 0, "no": 0, "yes": 1, "No": 0, "Yes": 1},
-        {
-            "Grade 0-8": 1,
-            "Grade 9": 2,
-            "Grade 10": 3,
-            "Grade 11": 4,
-            "Grade 12 or equivalent": 5,
-            "OAC or Grade 13": 6,
-            "Some college": 7,
-            "Some university": 8,
-            "Some apprenticeship": 9,
-            "Certificate of Apprenticeship": 10,
-            "Journeyperson": 11,
-            "Certificate/Diploma": 12,
-            "Bachelor's degree": 13,
-            "Post graduate": 14,
-        },
-        {
-            "Renting-private": 1,
-            "Renting-subsidized": 2,
-            "Boarding or lodging": 3,
-            "Homeowner": 4,
-            "Living with family/friend": 5,
-            "Institution": 6,
-            "Temporary second residence": 7,
-            "Band-owned home": 8,
-            "Homeless or transient": 9,
-            "Emergency hostel": 10,
-        },
-        {
-            "No Source of Income": 1,
-            "Employment Insurance": 2,
-            "Workplace Safety and Insurance Board": 3,
-            "Ontario Works applied or receiving": 4,
-            "Ontario Disability Support Program applied or receiving": 5,
-            "Dependent of someone receiving OW or ODSP": 6,
-            "Crown Ward": 7,
-            "Employment": 8,
-            "Self-Employment": 9,
-            "Other (specify)": 10,
-        },
-    ]
-    for category in categorical_mappings:
-        if text_data in category:
-            return category[text_data]
-
-    return int(text_data) if text_data.isnumeric() else text_data
+        list: Cleaned data rows, one per client
+    """
+    with stage("clean_input"):
+        return FEATURE_ENCODER.encode(inputs).tolist()
 
 
-def create_matrix(row_data):
+def create_matrix(row_data, out=None):
     """
     Create matrix of all possible intervention combinations.
 
     Args:
         row_data (list): Base data row
+        out (np.array): Optional matrix to write into instead of allocating
 
     Returns:
         np.array: Matrix of all possible intervention combinations
     """
-    data = [row_data.copy() for _ in range(128)]
-    perms = intervention_permutations(7)
-    return np.concatenate((np.array(data), np.array(perms)), axis=1)
+    return create_batch_matrix([row_data], out=out)
 
 
+@functools.lru_cache(maxsize=None)
 def intervention_permutations(num):
     """
-    Generate all possible intervention combinations.
+    Generate all possible intervention combinations, once per count.
 
     Args:
         num (int): Number of interventions
 
     Returns:
-        np.array: Matrix of all possible combinations
+        np.array: Read-only matrix of all possible combinations, in the order
+        of itertools.product([0, 1], repeat=num)
     """
-    return np.array(list(product([0, 1], repeat=num)))
+    shifts = np.arange(num - 1, -1, -1)
+    perms = (np.arange(2**num)[:, np.newaxis] >> shifts) & 1
+    perms.setflags(write=False)
+    return perms
 
 
 def get_baseline_row(row_data):
@@ -192,13 +300,15 @@ def intervention_row_to_names(row_data):
     return [COLUMN_INTERVENTIONS[i] for i, value in enumerate(row_data) if value == 1]
 
 
-def process_results(baseline_pred, results_matrix):
+def process_results(baseline_pred, results_matrix, spreads=None):
     """
     Process model results into structured output.
 
     Args:
         baseline_pred (float): Baseline prediction
         results_matrix (np.array): Matrix of results
+        spreads (list): Optional spread of the baseline followed by one per
+            row of results_matrix, from prediction_spreads
 
     Returns:
         dict: Processed results with baseline and interventions
@@ -206,7 +316,47 @@ def process_results(baseline_pred, results_matrix):
     result_list = [
         (row[-1], intervention_row_to_names(row[:-1])) for row in results_matrix
     ]
-    return {"baseline": baseline_pred[-1], "interventions": result_list}
+    result = {"baseline": baseline_pred[-1], "interventions": result_list}
+    if spreads is not None:
+        result["baseline_spread"] = spreads[0]
+        result["spreads"] = spreads[1:]
+    return result
+
+
+def predict_matrix(matrix):
+    """
+    Predict every row of a feature matrix with the configured backend.
+
+    Args:
+        matrix (np.array): Feature matrix, one row per sample
+
+    Returns:
+        np.array: One prediction per row
+    """
+    loaded = get_model()
+    if loaded.estimator is None:
+        return loaded.forest_kernel.predict(matrix)
+    if (
+        INFERENCE_BACKEND != "sklearn"
+        and loaded.forest_kernel is not None
+        and len(matrix) <= KERNEL_MAX_ROWS
+    ):
+        return loaded.forest_kernel.predict(matrix)
+    return loaded.estimator.predict(matrix)
+
+
+def prediction_cache_key(raw_data, top_k=3):
+    """
+    Build the PREDICTION_CACHE key of a cleaned client row.
+
+    Args:
+        raw_data (list): Cleaned client data row
+        top_k (int): Number of intervention combinations in the result
+
+    Returns:
+        tuple: Scoring model version, top_k and the row values
+    """
+    return (get_model_version(), top_k, tuple(raw_data))
 
 
 def interpret_and_calculate(input_data):
@@ -220,17 +370,201 @@ def interpret_and_calculate(input_data):
         dict: Processed results with recommendations
     """
     raw_data = clean_input_data(input_data)
-    baseline_row = get_baseline_row(raw_data).reshape(1, -1)
-    intervention_rows = create_matrix(raw_data)
-    baseline_prediction = MODEL.predict(baseline_row)
-    intervention_predictions = MODEL.predict(intervention_rows).reshape(-1, 1)
-    result_matrix = np.concatenate(
-        (intervention_rows, intervention_predictions), axis=1
+    cache_key = prediction_cache_key(raw_data)
+    cached_result = PREDICTION_CACHE.get(cache_key)
+    if cached_result is not None:
+        return cached_result
+    result = score_batch([raw_data])[0]
+    PREDICTION_CACHE.put(cache_key, result)
+    return result
+
+
+def create_batch_matrix(rows_data, out=None):
+    """
+    Stack the intervention matrices of many clients.
+
+    Args:
+        rows_data (list): Cleaned data rows, one per client
+        out (np.array): Optional matrix to write into instead of allocating
+
+    Returns:
+        np.array: (N*128) row matrix, the combinations of each client in turn
+    """
+    demographics = np.asarray(rows_data, dtype=float)
+    perms = intervention_permutations(len(COLUMN_INTERVENTIONS))
+    num_clients, num_fixed = demographics.shape
+    num_combos, num_interventions = perms.shape
+    if out is None:
+        out = np.empty((num_clients * num_combos, num_fixed + num_interventions))
+    combinations = out.reshape(num_clients, num_combos, -1)
+    combinations[:, :, :num_fixed] = demographics[:, np.newaxis, :]
+    combinations[:, :, num_fixed:] = perms
+    return out
+
+
+def _scoring_buffer(num_rows, num_columns):
+    """Return this thread's reusable scoring matrix, or a new one if too large."""
+    if num_rows > SCORING_BUFFER_MAX_ROWS:
+        return np.empty((num_rows, num_columns))
+    buffer = getattr(_scoring_buffers, "matrix", None)
+    if buffer is None or buffer.shape[1] != num_columns:
+        buffer = np.empty((SCORING_BUFFER_MAX_ROWS, num_columns))
+        _scoring_buffers.matrix = buffer
+    return buffer[:num_rows]
+
+
+def predict_combinations(raw_rows):
+    """
+    Predict every intervention combination of each client.
+
+    Args:
+        raw_rows (list): Cleaned data rows, one per client
+
+    Returns:
+        np.array: (clients x combinations) matrix of predictions
+    """
+    loaded = get_model()
+    perms = intervention_permutations(len(COLUMN_INTERVENTIONS))
+    if (
+        len(raw_rows) == 1
+        and INFERENCE_BACKEND == "partial"
+        and loaded.partial_evaluator is not None
+    ):
+        with stage("predict"):
+            predictions = loaded.partial_evaluator.predict_combinations(
+                raw_rows[0], perms
+            )
+        return predictions.reshape(1, -1)
+    with stage("build_matrix"):
+        matrix = create_batch_matrix(
+            raw_rows,
+            out=_scoring_buffer(len(raw_rows) * len(perms), loaded.num_features),
+        )
+    with stage("predict"):
+        predictions = predict_matrix(matrix)
+    return predictions.reshape(len(raw_rows), len(perms))
+
+
+def top_combinations(combination_predictions, top_k=3):
+    """
+    Select the best combinations of each client without sorting all of them.
+
+    Args:
+        combination_predictions (np.array): (clients x combinations) predictions
+        top_k (int): Number of combinations to keep
+
+    Returns:
+        np.array: (clients x top_k) combination indices, ordered from lowest
+        to highest prediction
+    """
+    top_k = min(top_k, combination_predictions.shape[1])
+    candidates = np.argpartition(combination_predictions, -top_k, axis=1)[:, -top_k:]
+    order = np.take_along_axis(combination_predictions, candidates, axis=1).argsort(
+        axis=1, kind="stable"
     )
-    result_order = result_matrix[:, -1].argsort()
-    result_matrix = result_matrix[result_order]
-    top_results = result_matrix[-3:, -8:]
-    return process_results(baseline_prediction, top_results)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def prediction_spreads(raw_rows, combination_indices):
+    """
+    Measure how much the trees of a forest disagree on chosen combinations.
+
+    All trees are evaluated for every chosen row of every client in one
+    batched kernel pass, and the (trees x rows) matrix is reduced with NumPy.
+
+    Args:
+        raw_rows (list): Cleaned data rows, one per client
+        combination_indices (np.array): (clients x k) combination indices
+
+    Returns:
+        list: Per client, a list of dicts with the standard deviation and the
+        SPREAD_PERCENTILES range of each chosen combination, or None when the
+        model is not a forest
+    """
+    kernel = get_model().forest_kernel
+    if kernel is None or not kernel.average:
+        return None
+    perms = intervention_permutations(len(COLUMN_INTERVENTIONS))
+    num_clients, num_chosen = combination_indices.shape
+    rows = np.empty((num_clients * num_chosen, kernel.num_features))
+    chosen = rows.reshape(num_clients, num_chosen, -1)
+    num_fixed = kernel.num_features - perms.shape[1]
+    chosen[:, :, :num_fixed] = np.asarray(raw_rows, dtype=float)[:, np.newaxis, :]
+    chosen[:, :, num_fixed:] = perms[combination_indices]
+    per_tree = kernel.predict_per_tree(rows)
+    stds = per_tree.std(axis=0).reshape(num_clients, num_chosen)
+    lows, highs = np.percentile(per_tree, SPREAD_PERCENTILES, axis=0).reshape(
+        2, num_clients, num_chosen
+    )
+    return [
+        [
+            {"std": float(std), "low": float(low), "high": float(high)}
+            for std, low, high in zip(*client_spreads)
+        ]
+        for client_spreads in zip(stds, lows, highs)
+    ]
+
+
+def interpret_and_calculate_batch(inputs, top_k=3):
+    """
+    Score many clients with a single model call.
+
+    Args:
+        inputs (list): Raw input data dicts, one per client
+        top_k (int): Number of best intervention combinations to keep
+
+    Returns:
+        list: Processed results, in the same order as the inputs
+    """
+    raw_rows = clean_input_batch(inputs)
+    cache_keys = [prediction_cache_key(raw_data, top_k) for raw_data in raw_rows]
+    results = [PREDICTION_CACHE.get(cache_key) for cache_key in cache_keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        scored = score_batch([raw_rows[index] for index in missing], top_k)
+        for index, result in zip(missing, scored):
+            PREDICTION_CACHE.put(cache_keys[index], result)
+            results[index] = result
+    return results
+
+
+def score_batch(raw_rows, top_k=3):
+    """
+    Score cleaned client rows with a single model call, bypassing the cache.
+
+    Args:
+        raw_rows (list): Cleaned data rows, one per client
+        top_k (int): Number of best intervention combinations to keep
+
+    Returns:
+        list: Processed results, in the same order as the rows
+    """
+    if not raw_rows:
+        return []
+    perms = intervention_permutations(len(COLUMN_INTERVENTIONS))
+    combination_predictions = predict_combinations(raw_rows)
+    with stage("select_top"):
+        top_orders = top_combinations(combination_predictions, top_k)
+    with stage("spread"):
+        # The first combination has every intervention off, i.e. the baseline
+        spreads = prediction_spreads(
+            raw_rows,
+            np.column_stack((np.zeros(len(raw_rows), dtype=np.intp), top_orders)),
+        )
+    results = []
+    with stage("process_results"):
+        for index, (predictions, order) in enumerate(
+            zip(combination_predictions, top_orders)
+        ):
+            top_results = np.column_stack((perms[order], predictions[order]))
+            results.append(
+                process_results(
+                    predictions[:1],
+                    top_results,
+                    None if spreads is None else spreads[index],
+                )
+            )
+    return results
 
 
 if __name__ == "__main__":
@@ -4,14 +4,17 @@ Handles the preparation, training, and saving of the prediction model.
 """
 
 # Standard library imports
+import os
 import pickle
 
 # Third-party imports
-import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 
+# Local application imports
+from app.ml.data_processor import DataProcessor
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 def prepare_models():
     """
@@ -20,54 +23,10 @@ def prepare_models():
     Returns:
         RandomForestRegressor: Trained model for predicting success rates
     """
-    # Load dataset
-    data = pd.read_csv("data_commontool.csv")
-    # Define feature columns
-    feature_columns = [
-        "age",  # Client's age
-        "gender",  # Client's gender (bool)
-        "work_experience",  # Years of work experience
-        "canada_workex",  # Years of work experience in Canada
-        "dep_num",  # Number of dependents
-        "canada_born",  # Born in Canada
-        "citizen_status",  # Citizenship status
-        "level_of_schooling",  # Highest level achieved (1-14)
-        "fluent_english",  # English fluency scale (1-10)
-        "reading_english_scale",  # Reading ability scale (1-10)
-        "speaking_english_scale",  # Speaking ability scale (1-10)
-        "writing_english_scale",  # Writing ability scale (1-10)
-        "numeracy_scale",  # Numeracy ability scale (1-10)
-        "computer_scale",  # Computer proficiency scale (1-10)
-        "transportation_bool",  # Needs transportation support (bool)
-        "caregiver_bool",  # Is primary caregiver (bool)
-        "housing",  # Housing situation (1-10)
-        "income_source",  # Source of income (1-10)
-        "felony_bool",  # Has a felony (bool)
-        "attending_school",  # Currently a student (bool)
-        "currently_employed",  # Currently employed (bool)
-        "substance_use",  # Substance use disorder (bool)
-        "time_unemployed",  # Years unemployed
-        "need_mental_health_support_bool",  # Needs mental health support (bool)
-    ]
-    # Define intervention columns
-    intervention_columns = [
-        "employment_assistance",
-        "life_stabilization",
-        "retention_services",
-        "specialized_services",
-        "employment_related_financial_supports",
-        "employer_financial_supports",
-        "enhanced_referrals",
-    ]
-    # Combine all feature columns
-    all_features = feature_columns + intervention_columns
-    # Prepare training data
-    features = np.array(data[all_features])  # Changed from X to features
-    targets = np.array(data["success_rate"])  # Changed from y to targets
-    # Split the dataset
-    features_train, _, targets_train, _ = train_test_split(  # Removed unused variables
-        features, targets, test_size=0.2, random_state=42
-    )
+    # Load the encoded dataset, parsing the CSV only when it has changed
+    features_train, _, targets_train, _ = DataProcessor(
+        os.path.join(CURRENT_DIR, "data_commontool.csv")
+    ).prepare_training_data()
     # Initialize and train the model
     model = RandomForestRegressor(n_estimators=100, random_state=42)
     model.fit(features_train, targets_train)
@@ -101,10 +60,13 @@ def load_model(filename="model.pkl"):
 
 
 def main():
-    """Main function to train and save the model."""
+    """
+    Main function to train and save the model.
+    Run from the repository root with python -m app.clients.service.model.
+    """
     print("Starting model training...")
     model = prepare_models()
-    save_model(model)
+    save_model(model, os.path.join(CURRENT_DIR, "model.pkl"))
     print("Model training completed and saved successfully.")
 
 
@@ -0,0 +1,126 @@
+"""
+Online model updates from recorded case outcomes for the Common Assessment Tool.
+Every success rate a case worker records is appended to the training_outcomes
+log. An update job then feeds each trained registry model only the outcomes
+logged after the artifact it was loaded from, publishes the updated model
+and registers it, so an update costs time proportional to the new outcomes.
+"""
+
+# Standard library imports
+import copy
+import os
+from datetime import datetime
+
+# Third-party imports
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Local application imports
+from app.clients.service.recommendations import FEATURE_ATTRIBUTES, HAS_ALL_FEATURES
+from app.database import Base, SessionLocal, engine
+from app.ml import get_registry
+from app.ml.artifact_store import ARTIFACT_STORE
+from app.ml.feature_encoder import INTERVENTION_COLUMNS, TRAINING_ENCODER
+from app.models import Client, TrainingOutcome
+
+# New outcomes needed before a model is updated
+OUTCOME_UPDATE_MIN_ROWS = int(os.environ.get("OUTCOME_UPDATE_MIN_ROWS", "20"))
+# Manifest field holding the id of the last outcome a model was updated with
+LOG_POSITION_FIELD = "training_log_position"
+
+
+class OutcomeService:
+    # Add the recorded outcome of a case to the training log; the caller
+    # commits it in the same transaction as the case update
+    @staticmethod
+    def record_outcome(db: Session, case):
+        if case.success_rate is None:
+            return None
+        client_row = (
+            db.execute(
+                select(*FEATURE_ATTRIBUTES).where(
+                    Client.id == case.client_id, HAS_ALL_FEATURES
+                )
+            )
+            .mappings()
+            .first()
+        )
+        if client_row is None:
+            return None
+        record = {
+            **client_row,
+            **{column: getattr(case, column) or 0 for column in INTERVENTION_COLUMNS},
+        }
+        outcome = TrainingOutcome(
+            client_id=case.client_id,
+            user_id=case.user_id,
+            features=[float(value) for value in TRAINING_ENCODER.encode_record(record)],
+            success_rate=case.success_rate,
+            recorded_at=datetime.utcnow(),
+        )
+        db.add(outcome)
+        return outcome
+
+    # Update every trained model with the outcomes logged since its artifact
+    @staticmethod
+    def apply_updates(
+        db: Session, min_rows: int = OUTCOME_UPDATE_MIN_ROWS, store=ARTIFACT_STORE
+    ):
+        registry = get_registry()
+        report: dict = {}
+        for model_name in registry.list_available_models():
+            model = registry.get_model(model_name)
+            manifest = registry.get_manifest(model_name) or {}
+            if not getattr(model, "is_trained", False):
+                report[model_name] = {"skipped": "Model is not trained"}
+                continue
+            outcomes = (
+                db.query(TrainingOutcome)
+                .filter(TrainingOutcome.id > manifest.get(LOG_POSITION_FIELD, 0))
+                .order_by(TrainingOutcome.id)
+                .all()
+            )
+            if not outcomes or len(outcomes) < min_rows:
+                report[model_name] = {"skipped": f"{len(outcomes)} new outcomes"}
+                continue
+            features = np.array([outcome.features for outcome in outcomes])
+            targets = np.array([outcome.success_rate for outcome in outcomes], float)
+            try:
+                # Deep-copied so that updates mutating the estimator, such as
+                # partial_fit, leave the registered model serving until the
+                # update is stored
+                updated = copy.deepcopy(model).update(features, targets)
+            except (NotImplementedError, ValueError) as error:
+                report[model_name] = {"skipped": str(error)}
+                continue
+            updated_manifest = store.put(
+                model_name,
+                updated,
+                manifest.get("training_data_hash"),
+                metrics=manifest.get("metrics"),
+                params=manifest.get("params"),
+                parent_version=manifest.get("version"),
+                updated_rows=manifest.get("updated_rows", 0) + len(outcomes),
+                **{LOG_POSITION_FIELD: outcomes[-1].id},
+            )
+            registry.register_model(model_name, updated, updated_manifest)
+            report[model_name] = {
+                "rows": len(outcomes),
+                "version": updated_manifest["version"],
+            }
+        return report
+
+
+def main():
+    """Update the stored models with the outcomes logged since they were saved."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Applied outcome updates: {OutcomeService.apply_updates(db)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
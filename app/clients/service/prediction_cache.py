@@ -0,0 +1,95 @@
+"""
+In-process LRU cache with time-to-live for intervention predictions.
+Avoids rescoring all intervention combinations when the same client
+assessment is reopened.
+"""
+
+# Standard library imports
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded, thread-safe LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600.0, clock=time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached results
+            ttl_seconds (float): Seconds an entry stays valid after insertion
+            clock (callable): Monotonic time source, injectable for tests
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """
+        Return a copy of the cached value for key, or None on a miss.
+
+        Args:
+            key (tuple): Hashable cache key
+
+        Returns:
+            The cached value, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        """
+        Store a copy of value under key, evicting the least recently used entry.
+
+        Args:
+            key (tuple): Hashable cache key
+            value: Result to cache
+        """
+        with self._lock:
+            self._entries[key] = (
+                self._clock() + self.ttl_seconds,
+                copy.deepcopy(value),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters and current size."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,155 @@
+"""
+Materialized client recommendations for the Common Assessment Tool.
+Keeps the client_recommendations table in step with the clients: a backfill
+job scores stored clients in vectorized chunks, and client updates refresh
+only the affected row, so list views can read recommendations without
+running the model.
+"""
+
+# Standard library imports
+import os
+from datetime import datetime
+
+# Third-party imports
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+# Local application imports
+from app.clients.service.logic import get_model_version, score_batch
+from app.database import Base, SessionLocal, engine
+from app.ml.feature_encoder import FEATURE_COLUMNS, FEATURE_ENCODER
+from app.models import Client, ClientRecommendation
+
+RECOMMENDATION_TOP_K = int(os.environ.get("RECOMMENDATION_TOP_K", "3"))
+BACKFILL_CHUNK_SIZE = int(os.environ.get("RECOMMENDATION_BACKFILL_CHUNK_SIZE", "256"))
+
+FEATURE_ATTRIBUTES = [getattr(Client, column) for column in FEATURE_COLUMNS]
+# Clients with a missing answer cannot be scored
+HAS_ALL_FEATURES = and_(*(attribute.isnot(None) for attribute in FEATURE_ATTRIBUTES))
+
+
+class RecommendationService:
+    # Score clients from their stored rows and replace their recommendations
+    @staticmethod
+    def store_recommendations(db: Session, rows, model_version: str):
+        if not rows:
+            return 0
+        results = score_batch(
+            FEATURE_ENCODER.encode(rows).tolist(), RECOMMENDATION_TOP_K
+        )
+        client_ids = [row["id"] for row in rows]
+        db.query(ClientRecommendation).filter(
+            ClientRecommendation.client_id.in_(client_ids)
+        ).delete(synchronize_session=False)
+        updated_at = datetime.utcnow()
+        db.add_all(
+            ClientRecommendation(
+                client_id=client_id,
+                baseline=float(result["baseline"]),
+                interventions=[
+                    [float(score), names] for score, names in result["interventions"]
+                ],
+                model_version=model_version,
+                updated_at=updated_at,
+            )
+            for client_id, result in zip(client_ids, results)
+        )
+        return len(rows)
+
+    # Rescore a single client after its data changed
+    @staticmethod
+    def refresh_client(db: Session, client_id: int):
+        rows = (
+            db.execute(
+                select(Client.id, *FEATURE_ATTRIBUTES).where(
+                    Client.id == client_id, HAS_ALL_FEATURES
+                )
+            )
+            .mappings()
+            .all()
+        )
+        if rows:
+            RecommendationService.store_recommendations(db, rows, get_model_version())
+        else:
+            db.query(ClientRecommendation).filter(
+                ClientRecommendation.client_id == client_id
+            ).delete(synchronize_session=False)
+        db.commit()
+
+    # Score every client whose recommendation is missing or from another model file
+    @staticmethod
+    def backfill(
+        db: Session, chunk_size: int = BACKFILL_CHUNK_SIZE, full: bool = False
+    ):
+        model_version = get_model_version()
+        query = select(Client.id, *FEATURE_ATTRIBUTES).where(HAS_ALL_FEATURES)
+        if not full:
+            query = query.outerjoin(ClientRecommendation).where(
+                or_(
+                    ClientRecommendation.client_id.is_(None),
+                    ClientRecommendation.model_version != model_version,
+                )
+            )
+        refreshed, last_id = 0, 0
+        while True:
+            rows = (
+                db.execute(
+                    query.where(Client.id > last_id)
+                    .order_by(Client.id)
+                    .limit(chunk_size)
+                )
+                .mappings()
+                .all()
+            )
+            if not rows:
+                break
+            refreshed += RecommendationService.store_recommendations(
+                db, rows, model_version
+            )
+            db.commit()
+            last_id = rows[-1]["id"]
+        return {"refreshed": refreshed, "model_version": model_version}
+
+    # Retrieve the stored recommendation of a client
+    @staticmethod
+    def get_recommendation(db: Session, client_id: int):
+        recommendation = (
+            db.query(ClientRecommendation)
+            .filter(ClientRecommendation.client_id == client_id)
+            .first()
+        )
+        if not recommendation:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No recommendation found for client {client_id}",
+            )
+        return recommendation
+
+    # Retrieve a paginated list of stored recommendations
+    @staticmethod
+    def get_recommendations(db: Session, skip: int = 0, limit: int = 50):
+        if skip < 0 or limit < 1:
+            raise HTTPException(status_code=400, detail="Invalid pagination parameters")
+        query = db.query(ClientRecommendation).join(Client)
+        return {
+            "recommendations": query.order_by(ClientRecommendation.client_id)
+            .offset(skip)
+            .limit(limit)
+            .all(),
+            "total": query.count(),
+        }
+
+
+def main():
+    """Backfill the recommendations of every stored client."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Backfilled recommendations: {RecommendationService.backfill(db)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
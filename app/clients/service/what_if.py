@@ -0,0 +1,107 @@
+"""
+What-if sensitivity sweeps for the Common Assessment Tool.
+Varies one or two demographic features of a client across their valid range
+and scores the full (sweep points x intervention combinations) grid with a
+single model call.
+"""
+
+# Standard library imports
+import os
+
+# Third-party imports
+import numpy as np
+from fastapi import HTTPException
+
+# Local application imports
+from app.clients.service.logic import (
+    COLUMN_INTERVENTIONS,
+    intervention_permutations,
+    intervention_row_to_names,
+    predict_matrix,
+)
+from app.ml.feature_encoder import FEATURE_COLUMNS
+from app.validators import FEATURE_BOUNDS
+
+# Largest number of sweep points, i.e. grid rows before the 128 combinations
+MAX_SWEEP_POINTS = int(os.environ.get("MAX_SWEEP_POINTS", "1000"))
+
+
+class WhatIfService:
+    # Validate a sweep against FEATURE_BOUNDS and list the values it covers
+    @staticmethod
+    def sweep_values(feature: str, start=None, stop=None, step: int = 1):
+        if feature not in FEATURE_BOUNDS:
+            raise HTTPException(
+                status_code=400, detail=f"Feature {feature} cannot be swept"
+            )
+        lower, upper = FEATURE_BOUNDS[feature]
+        start = lower if start is None else start
+        stop = upper if stop is None else stop
+        if stop is None:
+            raise HTTPException(
+                status_code=400, detail=f"Sweep of {feature} needs an explicit stop"
+            )
+        if start < lower or (upper is not None and stop > upper) or start > stop:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sweep of {feature} must stay within {lower} and {upper}",
+            )
+        return list(range(start, stop + 1, step))
+
+    # Build the value grid of one or two sweeps and reject oversized grids
+    @staticmethod
+    def build_grid(sweeps):
+        features = [sweep.feature for sweep in sweeps]
+        if len(set(features)) != len(features):
+            raise HTTPException(status_code=400, detail="Sweep features must differ")
+        values = [
+            WhatIfService.sweep_values(
+                sweep.feature, sweep.start, sweep.stop, sweep.step
+            )
+            for sweep in sweeps
+        ]
+        if np.prod([len(feature_values) for feature_values in values]) > (
+            MAX_SWEEP_POINTS
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sweep grid is larger than {MAX_SWEEP_POINTS} points",
+            )
+        return features, values
+
+
+def score_sweep(raw_data, features, values):
+    """
+    Score every intervention combination at every point of a sweep grid.
+
+    Args:
+        raw_data (list): Cleaned client data row
+        features (list): One or two swept feature names
+        values (list): Swept values of each feature
+
+    Returns:
+        dict: The swept values, the combinations in column order, and the
+        predictions, baseline and best combination at every grid point
+    """
+    perms = intervention_permutations(len(COLUMN_INTERVENTIONS))
+    shape = tuple(len(feature_values) for feature_values in values)
+    num_points, num_fixed = int(np.prod(shape)), len(raw_data)
+    grid = np.empty((num_points, len(perms), num_fixed + perms.shape[1]))
+    grid[:, :, :num_fixed] = np.asarray(raw_data, dtype=float)
+    grid[:, :, num_fixed:] = perms
+    points = np.meshgrid(*values, indexing="ij")
+    for feature, point_values in zip(features, points):
+        grid[:, :, FEATURE_COLUMNS.index(feature)] = point_values.reshape(-1, 1)
+    predictions = predict_matrix(grid.reshape(-1, grid.shape[-1])).reshape(
+        shape + (len(perms),)
+    )
+    return {
+        "features": list(features),
+        "values": [list(feature_values) for feature_values in values],
+        "combinations": [intervention_row_to_names(row) for row in perms],
+        "predictions": predictions.tolist(),
+        # The first combination has every intervention off, i.e. the baseline
+        "baseline": predictions[..., 0].tolist(),
+        "best": predictions.max(axis=-1).tolist(),
+        "best_combination": predictions.argmax(axis=-1).tolist(),
+    }
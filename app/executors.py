@@ -0,0 +1,198 @@
+"""
+Bounded executors for the Common Assessment Tool.
+Keeps blocking work off the event loop: a thread pool for I/O-bound work such
+as database queries, a process pool for CPU-bound work such as inference and
+model training, and a separate process pool for password hashing, so that a
+broken model worker never blocks logins.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+
+from app.monitoring import METRICS
+from app.monitoring.timing import collect_stages, record_stages
+
+
+def _timed_call(func):
+    """Run func in a worker and report when it started, finished and its stages."""
+    started = time.time()
+    result, stages = collect_stages(func)
+    return result, started, time.time(), stages
+
+
+class BoundedExecutor:
+    """Thread or process pool that rejects work beyond a queue-depth limit."""
+
+    def __init__(self, name, kind, max_workers, max_queue, initializer=None):
+        """
+        Initialize the executor; the pool itself is created on first use.
+
+        Args:
+            name (str): Name used in errors and metrics
+            kind (str): "thread" or "process"
+            max_workers (int): Number of worker threads or processes
+            max_queue (int): Jobs allowed to wait once all workers are busy
+            initializer (callable): Run once in every new worker
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind {kind!r}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.queue_waits = METRICS.histogram(
+            f"{name}_executor_queue_wait_seconds",
+            description=f"Time jobs waited for a {name} worker",
+        )
+        self.run_times = METRICS.histogram(
+            f"{name}_executor_run_seconds",
+            description=f"Time jobs ran on a {name} worker",
+        )
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._restarts = 0
+        METRICS.register_collector(f"{name}_executor", self.stats)
+
+    def _get_executor(self):
+        """Create the underlying pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "thread":
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-worker",
+                        initializer=self.initializer,
+                    )
+                else:
+                    # Spawned workers do not inherit the server's threads and locks
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=self.initializer,
+                    )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a broken pool so that the next job creates a new one."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the pool and await its result.
+
+        When a worker process dies the pool is broken for every job; it is
+        replaced and the job is retried once on the new pool.
+
+        Raises:
+            HTTPException: 503 when the queue-depth limit is reached or the
+                job broke the new pool as well
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Server is busy ({self.name} queue full), retry later",
+                )
+            self._in_flight += 1
+        submitted = time.time()
+        try:
+            outcome = await self._submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        result, started, finished, stages = outcome
+        with self._lock:
+            self._completed += 1
+        self.queue_waits.observe(max(started - submitted, 0.0))
+        self.run_times.observe(finished - started)
+        record_stages(stages)
+        return result
+
+    async def _submit(self, job):
+        """Run a job, replacing the pool and retrying once if it is broken."""
+        for _ in range(2):
+            executor = self._get_executor()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    executor, _timed_call, job
+                )
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server is busy ({self.name} workers restarting), retry later",
+        )
+
+    def stats(self):
+        """Return the configuration and job counters of the executor."""
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "restarts": self._restarts,
+            }
+
+    def shutdown(self, wait=True):
+        """Stop the pool; it is recreated if work is submitted again."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _warmup_worker():
+    """Load and warm up the prediction model in a new CPU worker process."""
+    # Imported here to keep the model package off this module's import path
+    from app.clients.service import logic
+
+    logic.warmup()
+
+
+IO_EXECUTOR = BoundedExecutor(
+    "io",
+    kind="thread",
+    max_workers=int(os.environ.get("IO_EXECUTOR_WORKERS", "16")),
+    max_queue=int(os.environ.get("IO_EXECUTOR_MAX_QUEUE", "256")),
+)
+CPU_EXECUTOR = BoundedExecutor(
+    "cpu",
+    kind=os.environ.get("CPU_EXECUTOR_KIND", "process"),
+    max_workers=int(os.environ.get("CPU_EXECUTOR_WORKERS", str(os.cpu_count() or 1))),
+    max_queue=int(os.environ.get("CPU_EXECUTOR_MAX_QUEUE", "64")),
+    initializer=_warmup_worker,
+)
+# Password hashing runs apart from the model workers and never loads the model
+AUTH_EXECUTOR = BoundedExecutor(
+    "auth",
+    kind=os.environ.get("AUTH_EXECUTOR_KIND", "process"),
+    max_workers=int(os.environ.get("AUTH_EXECUTOR_WORKERS", "2")),
+    max_queue=int(os.environ.get("AUTH_EXECUTOR_MAX_QUEUE", "64")),
+)
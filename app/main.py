@@ -4,31 +4,96 @@ This module initializes the FastAPI application and includes all routers.
 Handles database initialization and CORS middleware configuration.
 """
 
+# Standard library imports
+import asyncio
+from contextlib import asynccontextmanager
+
 # Related third-party imports
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 # Local application/library specific imports
+from app.clients.service import logic
 from app.database import engine, Base  # Add Base here
+from app.executors import AUTH_EXECUTOR, CPU_EXECUTOR, IO_EXECUTOR
+from app.ml import get_registry
 from app.ml.router import router as models_router  # newly added
 from app.clients.router import router as clients_router
 from app.auth.router import router as auth_router
+from app.monitoring.router import router as monitoring_router
+from app.monitoring.timing import (
+    SERVER_TIMING_HEADER,
+    server_timing_header,
+    start_request_trace,
+)
 
 
 # Initialize database tables
 Base.metadata.create_all(bind=engine)
 
+
+def warmup_models():
+    """Build the model registry and warm up the prediction model."""
+    get_registry()
+    logic.warmup()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the models in the background so liveness is reported at once."""
+    warmup_task = asyncio.create_task(asyncio.to_thread(warmup_models))
+    yield
+    if not warmup_task.done():
+        warmup_task.cancel()
+    IO_EXECUTOR.shutdown(wait=False)
+    CPU_EXECUTOR.shutdown(wait=False)
+    AUTH_EXECUTOR.shutdown(wait=False)
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Case Management API",
     description="API for managing client cases",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+
+@app.get("/health/live", tags=["health"])
+async def liveness():
+    """Report that the process is up."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["health"])
+async def readiness():
+    """Report ready only once the prediction model has been warmed up."""
+    if not logic.is_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming up"},
+        )
+    return {"status": "ready"}
+
+
+async def add_server_timing(request: Request, call_next):
+    """Attach the time spent in each prediction stage to the response."""
+    stages = start_request_trace()
+    response = await call_next(request)
+    if stages:
+        response.headers["Server-Timing"] = server_timing_header(stages)
+    return response
+
+
+if SERVER_TIMING_HEADER:
+    app.middleware("http")(add_server_timing)
+
 # Include routers
 app.include_router(models_router)
 app.include_router(auth_router)
 app.include_router(clients_router)
+app.include_router(monitoring_router)
 
 # Configure CORS middleware
 app.add_middleware(
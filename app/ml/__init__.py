@@ -2,21 +2,42 @@
 """
 Machine learning package initialization.
 """
+import threading
+
+from app.ml.artifact_store import ARTIFACT_STORE
 from app.ml.model_registry import ModelRegistry
-from app.ml.models.random_forest import RandomForestModel
-from app.ml.models.gradient_boost import GradientBoostingModel
-from app.ml.models.linear_regression import LinearRegressionModel
+
+_registry_lock = threading.Lock()
 
 
 # Initialize the model registry with available models
 def initialize_models():
     """Register all available models with the registry."""
+    # Imported here so that sklearn stays off the import path of the app
+    from app.ml.models.random_forest import RandomForestModel
+    from app.ml.models.gradient_boost import GradientBoostingModel
+    from app.ml.models.linear_regression import LinearRegressionModel
+    from app.ml.models.sgd_regression import SGDRegressionModel
+    from app.ml.models.hist_gradient_boost import HistGradientBoostingModel
+
     registry = ModelRegistry()
 
-    # Register the models
-    registry.register_model("RandomForest", RandomForestModel())
-    registry.register_model("GradientBoosting", GradientBoostingModel())
-    registry.register_model("LinearRegression", LinearRegressionModel())
+    # Register the latest stored artifact of each model, so nothing is fitted
+    # while serving; models without one are registered untrained
+    model_classes = {
+        "RandomForest": RandomForestModel,
+        "GradientBoosting": GradientBoostingModel,
+        "LinearRegression": LinearRegressionModel,
+        "SGDRegression": SGDRegressionModel,
+        "HistGradientBoosting": HistGradientBoostingModel,
+    }
+    for model_name, model_class in model_classes.items():
+        if ARTIFACT_STORE.latest_version(model_name) is None:
+            registry.register_model(model_name, model_class())
+        else:
+            registry.register_model(
+                model_name, *ARTIFACT_STORE.load(model_name, model_class)
+            )
 
     # Set the default model
     registry.set_current_model("RandomForest")
@@ -24,5 +45,11 @@ def initialize_models():
     return registry
 
 
-# Initialize models when importing this package
-registry = initialize_models()
+def get_registry():
+    """Return the model registry, registering the models on first use."""
+    registry = ModelRegistry()
+    if not registry.list_available_models():
+        with _registry_lock:
+            if not registry.list_available_models():
+                initialize_models()
+    return registry
@@ -0,0 +1,172 @@
+# app/ml/artifact_store.py
+"""
+Versioned, content-addressed store of trained models.
+
+Each model is saved with BaseModel.save_arrays under
+<root>/<model name>/<version>, where the version is a hash of the saved files,
+so storing the same trained model twice reuses one artifact. A manifest records
+the version, the hash of the training data, the metrics and the parameters. A
+LATEST file per model names the artifact the registry loads at startup and is
+replaced atomically, so readers never see a half-written artifact.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+ARTIFACTS_DIR = os.environ.get(
+    "MODEL_ARTIFACTS_DIR", os.path.join(os.path.dirname(__file__), "artifacts")
+)
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+# Hex digits of the content hash used as the version
+VERSION_LENGTH = 16
+
+
+def data_hash(features, targets):
+    """Return a hash identifying a training matrix and its targets."""
+    digest = hashlib.sha256()
+    for array in (features, targets):
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _content_hash(directory):
+    """Hash the names and contents of the files of a directory."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        digest.update(name.encode())
+        with open(os.path.join(directory, name), "rb") as artifact_file:
+            for block in iter(lambda: artifact_file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomically(path, text):
+    """Replace a small text file without readers seeing a partial write."""
+    handle, staging = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".staging-")
+    with os.fdopen(handle, "w") as staging_file:
+        staging_file.write(text)
+    os.replace(staging, path)
+
+
+class ArtifactStore:
+    """Trained models on disk, one directory per model and version."""
+
+    def __init__(self, root=ARTIFACTS_DIR):
+        """Initialize with the root directory; it is created on first put."""
+        self.root = root
+
+    def _model_dir(self, model_name):
+        """Return the directory holding every version of a model."""
+        return os.path.join(self.root, model_name)
+
+    def put(self, model_name, model, training_data_hash=None, metrics=None, **extra):
+        """
+        Save a trained model and make it the latest artifact of its name.
+
+        Args:
+            model_name (str): Registry name of the model
+            model (BaseModel): Trained model supporting save_arrays
+            training_data_hash (str): data_hash of the training data
+            metrics (dict): Scores of the model, e.g. cross-validation results
+            **extra: Further JSON-serializable manifest fields, e.g. params
+
+        Returns:
+            dict: Manifest of the stored artifact
+        """
+        model_dir = self._model_dir(model_name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=model_dir)
+        try:
+            model.save_arrays(os.path.join(staging, "model"))
+            version = _content_hash(os.path.join(staging, "model"))[:VERSION_LENGTH]
+            manifest = {
+                "model": model_name,
+                "version": version,
+                "training_data_hash": training_data_hash,
+                "metrics": metrics or {},
+                **extra,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            with open(
+                os.path.join(staging, "model", MANIFEST_FILE), "w"
+            ) as manifest_file:
+                json.dump(manifest, manifest_file, indent=2, default=str)
+            artifact_dir = os.path.join(model_dir, version)
+            if not os.path.isdir(artifact_dir):
+                os.replace(os.path.join(staging, "model"), artifact_dir)
+            else:
+                manifest = self.manifest(model_name, version)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        _write_atomically(os.path.join(model_dir, LATEST_FILE), version)
+        return manifest
+
+    def latest_version(self, model_name):
+        """Return the latest version of a model, or None if none is stored."""
+        try:
+            with open(os.path.join(self._model_dir(model_name), LATEST_FILE)) as latest:
+                return latest.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, model_name, version=None):
+        """
+        Return the manifest of a stored artifact.
+
+        Raises:
+            ValueError: When the model has no artifact of that version
+        """
+        version = version or self.latest_version(model_name)
+        path = os.path.join(self._model_dir(model_name), str(version), MANIFEST_FILE)
+        if version is None or not os.path.isfile(path):
+            raise ValueError(f"No stored artifact of {model_name} version {version}")
+        with open(path) as manifest_file:
+            return json.load(manifest_file)
+
+    def versions(self, model_name):
+        """Return the manifests of every stored version, oldest first."""
+        model_dir = self._model_dir(model_name)
+        if not os.path.isdir(model_dir):
+            return []
+        manifests = [
+            self.manifest(model_name, version)
+            for version in os.listdir(model_dir)
+            if os.path.isfile(os.path.join(model_dir, version, MANIFEST_FILE))
+        ]
+        return sorted(manifests, key=lambda manifest: manifest["created_at"])
+
+    def load(self, model_name, model_class, version=None):
+        """
+        Load a stored model with its arrays memory-mapped.
+
+        Args:
+            model_name (str): Registry name of the model
+            model_class (type): BaseModel subclass that saved it
+            version (str): Version to load; the latest by default
+
+        Returns:
+            tuple: The trained model and its manifest
+        """
+        manifest = self.manifest(model_name, version)
+        model = model_class.load_arrays(
+            os.path.join(self._model_dir(model_name), manifest["version"])
+        )
+        return model, manifest
+
+    def set_latest(self, model_name, version):
+        """Make a stored version the one loaded at startup, e.g. to roll back."""
+        self.manifest(model_name, version)
+        _write_atomically(
+            os.path.join(self._model_dir(model_name), LATEST_FILE), version
+        )
+
+
+ARTIFACT_STORE = ArtifactStore()
@@ -6,6 +6,9 @@ All model implementations should inherit from this class.
 from abc import ABC, abstractmethod
 import pickle
 
+from app.ml.forest_kernel import load_arrays, save_arrays
+from app.ml.sampling import reservoir_sample
+
 
 class BaseModel(ABC):
     """Abstract base class for all ML models."""
@@ -20,11 +23,39 @@ class BaseModel(ABC):
         """Make predictions using the trained model."""
         pass
 
+    def update(self, features, targets):
+        """
+        Update the trained model with new rows, at a cost proportional to
+        their number. Models that support incremental updates override this.
+        """
+        raise NotImplementedError(f"{self.get_name()} has no incremental update")
+
+    def train_chunks(self, make_chunks):
+        """
+        Train on data streamed in (features, targets) chunks, holding only a
+        bounded reservoir sample of the rows in memory. Models that learn
+        incrementally override this to fit every row.
+
+        Args:
+            make_chunks (callable): Returns a fresh iterator over the chunks,
+                so models that need several passes can stream them again
+        """
+        return self.train(*reservoir_sample(make_chunks()))
+
     @abstractmethod
     def get_name(self):
         """Return the name of the model."""
         pass
 
+    def untrained_copy(self):
+        """Return an untrained model with the same estimator parameters."""
+        # Imported here so that sklearn stays off the import path of the app
+        from sklearn.base import clone
+
+        model = type(self)()
+        model.model = clone(self.model)
+        return model
+
     def save(self, filename):
         """Save the model to a file."""
         with open(filename, "wb") as model_file:
@@ -35,3 +66,41 @@ class BaseModel(ABC):
         """Load the model from a file."""
         with open(filename, "rb") as model_file:
             return pickle.load(model_file)
+
+    def to_arrays(self):
+        """
+        Return the trained parameters as named arrays plus JSON metadata.
+        Models that support the memory-mapped format override this.
+        """
+        raise NotImplementedError(f"{self.get_name()} has no array format")
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """Rebuild a trained model from the output of to_arrays."""
+        raise NotImplementedError(f"{cls.__name__} has no array format")
+
+    def save_arrays(self, directory):
+        """
+        Save the model as uncompressed .npy files plus JSON metadata.
+        Unlike save, the result can be memory-mapped by load_arrays.
+        """
+        if not getattr(self, "is_trained", False):
+            raise ValueError("Model must be trained before it can be saved")
+        arrays, metadata = self.to_arrays()
+        save_arrays(directory, arrays, {**metadata, "model": self.get_name()})
+
+    @classmethod
+    def load_arrays(cls, directory, mmap_mode="r"):
+        """
+        Load a model saved with save_arrays.
+        With mmap_mode="r" the arrays are memory-mapped read-only, so worker
+        processes loading the same directory share one page-cache copy.
+        """
+        arrays, metadata = load_arrays(directory, mmap_mode=mmap_mode)
+        model_name = metadata.pop("model")
+        model = cls.from_arrays(arrays, metadata)
+        if model.get_name() != model_name:
+            raise ValueError(
+                f"{directory} holds a {model_name} model, not {model.get_name()}"
+            )
+        return model
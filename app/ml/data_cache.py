@@ -0,0 +1,91 @@
+# app/ml/data_cache.py
+"""
+Binary cache of encoded training data.
+
+The first read of a training CSV encodes it once with TRAINING_ENCODER and
+saves the float32 feature matrix and the targets with save_arrays, under a
+directory named after the SHA-256 of the CSV. Later reads memory-map those
+arrays, so training and cross-validation runs skip CSV parsing and the
+object-dtype conversion. Rows are stored in train/test split order, so the
+train and test sets are contiguous slices that need no copy.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from app.ml.feature_encoder import TARGET_COLUMN, TRAINING_ENCODER
+from app.ml.forest_kernel import load_arrays, save_arrays
+
+DATA_CACHE_DIR = os.environ.get(
+    "TRAINING_DATA_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "training_data_cache"),
+)
+# Hex digits of the source hash used as the cache directory name
+KEY_LENGTH = 16
+
+
+def file_hash(path):
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TrainingDataCache:
+    """Encoded training arrays keyed on the hash of their source CSV."""
+
+    def __init__(self, cache_dir=DATA_CACHE_DIR):
+        """Initialize with the directory holding one subdirectory per source."""
+        self.cache_dir = cache_dir
+
+    def load(self, data_file, test_size=0.2, random_state=42):
+        """
+        Return the encoded dataset of a CSV, building the cache on a miss.
+
+        Args:
+            data_file (str): Training CSV file
+            test_size (float): Share of rows in the test split
+            random_state (int): Seed of the split
+
+        Returns:
+            tuple: Memory-mapped features and targets, in split order, and
+            the number of leading rows that form the train split
+        """
+        source_hash = file_hash(data_file)
+        directory = os.path.join(self.cache_dir, source_hash[:KEY_LENGTH])
+        split = {"test_size": test_size, "random_state": random_state}
+        if os.path.isdir(directory):
+            arrays, metadata = load_arrays(directory)
+            if (metadata["source_hash"], metadata["split"], metadata["columns"]) == (
+                source_hash,
+                split,
+                list(TRAINING_ENCODER.columns),
+            ):
+                return arrays["features"], arrays["targets"], metadata["num_train"]
+        data = pd.read_csv(data_file)
+        features = TRAINING_ENCODER.encode(data)
+        targets = np.asarray(data[TARGET_COLUMN], dtype=np.float64)
+        train_rows, test_rows = train_test_split(
+            np.arange(len(targets)), test_size=test_size, random_state=random_state
+        )
+        order = np.concatenate((train_rows, test_rows))
+        save_arrays(
+            directory,
+            {"features": features[order], "targets": targets[order], "rows": order},
+            {
+                "source_hash": source_hash,
+                "split": split,
+                "num_train": len(train_rows),
+                "columns": list(TRAINING_ENCODER.columns),
+            },
+        )
+        arrays, metadata = load_arrays(directory)
+        return arrays["features"], arrays["targets"], metadata["num_train"]
+
+
+TRAINING_DATA_CACHE = TrainingDataCache()
@@ -5,68 +5,79 @@ Handles loading and preprocessing data for model training and prediction.
 """
 import pandas as pd
 import numpy as np
+
 from sklearn.model_selection import train_test_split
 
+from app.ml.data_cache import TRAINING_DATA_CACHE
+from app.ml.database_source import (
+    is_database_url,
+    iter_training_chunks,
+    stream_training_data,
+)
+from app.ml.feature_encoder import (
+    FEATURE_COLUMNS,
+    INTERVENTION_COLUMNS,
+    TARGET_COLUMN,
+    TRAINING_ENCODER,
+)
+
 
 class DataProcessor:
     """Handles data loading and preprocessing for ML models."""
 
-    def __init__(self, data_file="data_commontool.csv"):
-        """Initialize with the data file path."""
+    def __init__(self, data_file="data_commontool.csv", cache=TRAINING_DATA_CACHE):
+        """
+        Initialize with the data source and the encoded-data cache. The source
+        is a CSV file path, or a database URL whose cases are streamed.
+        """
         self.data_file = data_file
-        self.feature_columns = [
-            "age",
-            "gender",
-            "work_experience",
-            "canada_workex",
-            "dep_num",
-            "canada_born",
-            "citizen_status",
-            "level_of_schooling",
-            "fluent_english",
-            "reading_english_scale",
-            "speaking_english_scale",
-            "writing_english_scale",
-            "numeracy_scale",
-            "computer_scale",
-            "transportation_bool",
-            "caregiver_bool",
-            "housing",
-            "income_source",
-            "felony_bool",
-            "attending_school",
-            "currently_employed",
-            "substance_use",
-            "time_unemployed",
-            "need_mental_health_support_bool",
-        ]
-        self.intervention_columns = [
-            "employment_assistance",
-            "life_stabilization",
-            "retention_services",
-            "specialized_services",
-            "employment_related_financial_supports",
-            "employer_financial_supports",
-            "enhanced_referrals",
-        ]
+        self.cache = cache
+        self.feature_columns = list(FEATURE_COLUMNS)
+        self.intervention_columns = list(INTERVENTION_COLUMNS)
 
     def load_data(self):
         """Load the dataset from file."""
         return pd.read_csv(self.data_file)
 
+    def prepare_dataset(self):
+        """
+        Return the whole encoded dataset as memory-mapped arrays from the
+        cache, with the training split's rows first. A database source is
+        streamed into fresh arrays instead.
+        """
+        if is_database_url(self.data_file):
+            return stream_training_data(str(self.data_file))
+        features, targets, _ = self.cache.load(self.data_file)
+        return features, targets
+
     def prepare_training_data(self):
         """Prepare features and targets for model training."""
-        data = self.load_data()
-        all_features = self.feature_columns + self.intervention_columns
-
-        features = np.array(data[all_features])
-        targets = np.array(data["success_rate"])
+        if is_database_url(self.data_file):
+            features, targets = stream_training_data(str(self.data_file))
+            return train_test_split(features, targets, test_size=0.2, random_state=42)
+        features, targets, num_train = self.cache.load(self.data_file)
 
-        features_train, features_test, targets_train, targets_test = train_test_split(
-            features, targets, test_size=0.2, random_state=42
+        # The cache stores the split's rows contiguously, so these are views
+        return (
+            features[:num_train],
+            features[num_train:],
+            targets[:num_train],
+            targets[num_train:],
         )
 
-        return features_train, features_test, targets_train, targets_test
+    def iter_chunks(self, chunk_rows):
+        """
+        Yield the encoded dataset as (features, targets) chunks of at most
+        chunk_rows rows, reading only one chunk of the source at a time.
+        """
+        if is_database_url(self.data_file):
+            yield from iter_training_chunks(str(self.data_file), chunk_rows)
+            return
+        for frame in pd.read_csv(self.data_file, chunksize=chunk_rows):
+            yield (
+                TRAINING_ENCODER.encode(frame),
+                frame[TARGET_COLUMN].to_numpy(dtype=np.float64),
+            )
 
     def prepare_prediction_data(self, client_data, interventions):
         """Prepare a single client's data for prediction."""
@@ -0,0 +1,124 @@
+# app/ml/database_source.py
+"""
+Training data streamed from the clients and client_cases tables.
+
+Every case with a recorded success rate is one training row: its client's
+answers followed by the case's interventions. The join is read through
+SQLAlchemy Core with yield_per, so the rows arrive in fixed-size chunks from a
+server-side cursor, without ORM objects. Each chunk is written straight into
+arrays preallocated from a count of the matching cases.
+"""
+import itertools
+import os
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+
+from app.ml.feature_encoder import (
+    FEATURE_COLUMNS,
+    INTERVENTION_COLUMNS,
+    TARGET_COLUMN,
+)
+from app.models import Client, ClientCase
+
+DB_CHUNK_ROWS = int(os.environ.get("TRAINING_DB_CHUNK_ROWS", "10000"))
+
+# Unset interventions were not provided, as in the recorded outcomes
+TRAINING_QUERY = (
+    select(
+        *(getattr(Client, column) for column in FEATURE_COLUMNS),
+        *(
+            func.coalesce(getattr(ClientCase, column), 0)
+            for column in INTERVENTION_COLUMNS
+        ),
+        getattr(ClientCase, TARGET_COLUMN),
+    )
+    .join_from(ClientCase, Client)
+    .where(
+        getattr(ClientCase, TARGET_COLUMN).isnot(None),
+        *(getattr(Client, column).isnot(None) for column in FEATURE_COLUMNS),
+    )
+    .order_by(ClientCase.client_id, ClientCase.user_id)
+)
+
+
+def is_database_url(source):
+    """Return whether a training source is a database URL rather than a file."""
+    return "://" in str(source)
+
+
+def _chunk_values(chunk):
+    """Convert fetched rows into one (rows x columns + target) float64 array."""
+    return np.fromiter(
+        itertools.chain.from_iterable(chunk),
+        dtype=np.float64,
+        count=len(chunk) * len(TRAINING_QUERY.selected_columns),
+    ).reshape(len(chunk), len(TRAINING_QUERY.selected_columns))
+
+
+def iter_training_chunks(bind, chunk_rows=DB_CHUNK_ROWS):
+    """
+    Yield the cases with an outcome as (features, targets) chunks, so only
+    one chunk of rows is held in memory at a time.
+
+    Args:
+        bind: Engine, or database URL, to read from
+        chunk_rows (int): Rows per chunk
+
+    Yields:
+        tuple: (rows x features) float32 matrix and float64 targets
+    """
+    engine = create_engine(bind) if isinstance(bind, str) else bind
+    try:
+        with engine.connect() as connection:
+            result = connection.execution_options(yield_per=chunk_rows).execute(
+                TRAINING_QUERY
+            )
+            for chunk in result.partitions():
+                values = _chunk_values(chunk)
+                yield values[:, :-1].astype(np.float32), values[:, -1].copy()
+    finally:
+        if engine is not bind:
+            engine.dispose()
+
+
+def stream_training_data(bind, chunk_rows=DB_CHUNK_ROWS):
+    """
+    Read every case with an outcome into training arrays, chunk by chunk.
+
+    Args:
+        bind: Engine, or database URL, to read from
+        chunk_rows (int): Rows fetched from the cursor at a time
+
+    Returns:
+        tuple: (cases x features) float32 matrix and float64 targets
+    """
+    if isinstance(bind, str):
+        engine = create_engine(bind)
+        try:
+            return stream_training_data(engine, chunk_rows)
+        finally:
+            engine.dispose()
+    num_columns = len(FEATURE_COLUMNS) + len(INTERVENTION_COLUMNS)
+    with bind.connect() as connection:
+        num_rows = connection.execute(
+            select(func.count()).select_from(TRAINING_QUERY.subquery())
+        ).scalar_one()
+        features = np.empty((num_rows, num_columns), dtype=np.float32)
+        targets = np.empty(num_rows, dtype=np.float64)
+        filled = 0
+        result = connection.execution_options(yield_per=chunk_rows).execute(
+            TRAINING_QUERY
+        )
+        for chunk in result.partitions():
+            rows = len(chunk)
+            if filled + rows > num_rows:
+                # Cases recorded after the count; grow once per late chunk
+                num_rows = filled + rows
+                features = np.resize(features, (num_rows, num_columns))
+                targets = np.resize(targets, num_rows)
+            values = _chunk_values(chunk)
+            features[filled : filled + rows] = values[:, :num_columns]
+            targets[filled : filled + rows] = values[:, num_columns]
+            filled += rows
+    return features[:filled], targets[:filled]
@@ -0,0 +1,219 @@
+# app/ml/feature_encoder.py
+"""
+Column-aware encoding of client assessments into model features.
+
+Holds the single definition of the feature and intervention columns shared by
+the prediction service, the training script and DataProcessor. Every column is
+compiled once into its own lookup table, and whole batches of payloads or a
+DataFrame are encoded column by column into one contiguous float32 array.
+"""
+import operator
+
+import numpy as np
+
+FEATURE_COLUMNS = (
+    "age",
+    "gender",
+    "work_experience",
+    "canada_workex",
+    "dep_num",
+    "canada_born",
+    "citizen_status",
+    "level_of_schooling",
+    "fluent_english",
+    "reading_english_scale",
+    "speaking_english_scale",
+    "writing_english_scale",
+    "numeracy_scale",
+    "computer_scale",
+    "transportation_bool",
+    "caregiver_bool",
+    "housing",
+    "income_source",
+    "felony_bool",
+    "attending_school",
+    "currently_employed",
+    "substance_use",
+    "time_unemployed",
+    "need_mental_health_support_bool",
+)
+
+INTERVENTION_COLUMNS = (
+    "employment_assistance",
+    "life_stabilization",
+    "retention_services",
+    "specialized_services",
+    "employment_related_financial_supports",
+    "employer_financial_supports",
+    "enhanced_referrals",
+)
+
+TARGET_COLUMN = "success_rate"
+
+# Distinct text answers remembered per column before its lookup is reset
+LOOKUP_MAX_ENTRIES = 4096
+
+# Answers accepted in every column, e.g. "" for an unanswered question
+BOOLEAN_LABELS = {
+    "": 0,
+    "true": 1,
+    "false": 0,
+    "True": 1,
+    "False": 0,
+    "no": 0,
+    "yes": 1,
+    "No": 0,
+    "Yes": 1,
+}
+
+SCHOOLING_LABELS = {
+    "Grade 0-8": 1,
+    "Grade 9": 2,
+    "Grade 10": 3,
+    "Grade 11": 4,
+    "Grade 12 or equivalent": 5,
+    "OAC or Grade 13": 6,
+    "Some college": 7,
+    "Some university": 8,
+    "Some apprenticeship": 9,
+    "Certificate of Apprenticeship": 10,
+    "Journeyperson": 11,
+    "Certificate/Diploma": 12,
+    "Bachelor's degree": 13,
+    "Post graduate": 14,
+}
+
+HOUSING_LABELS = {
+    "Renting-private": 1,
+    "Renting-subsidized": 2,
+    "Boarding or lodging": 3,
+    "Homeowner": 4,
+    "Living with family/friend": 5,
+    "Institution": 6,
+    "Temporary second residence": 7,
+    "Band-owned home": 8,
+    "Homeless or transient": 9,
+    "Emergency hostel": 10,
+}
+
+INCOME_SOURCE_LABELS = {
+    "No Source of Income": 1,
+    "Employment Insurance": 2,
+    "Workplace Safety and Insurance Board": 3,
+    "Ontario Works applied or receiving": 4,
+    "Ontario Disability Support Program applied or receiving": 5,
+    "Dependent of someone receiving OW or ODSP": 6,
+    "Crown Ward": 7,
+    "Employment": 8,
+    "Self-Employment": 9,
+    "Other (specify)": 10,
+}
+
+COLUMN_LABELS = {
+    "level_of_schooling": SCHOOLING_LABELS,
+    "housing": HOUSING_LABELS,
+    "income_source": INCOME_SOURCE_LABELS,
+}
+
+
+class FeatureEncoder:
+    """Encodes records into a float32 feature matrix with per-column tables."""
+
+    def __init__(self, columns, column_labels=None):
+        """
+        Compile one lookup table per column.
+
+        Args:
+            columns (tuple): Column names, in feature order
+            column_labels (dict): Column name to its categorical labels
+        """
+        column_labels = COLUMN_LABELS if column_labels is None else column_labels
+        self.columns = tuple(columns)
+        self.tables = [
+            {**BOOLEAN_LABELS, **column_labels.get(column, {})}
+            for column in self.columns
+        ]
+        # Tables extended with the numeric answers seen so far, e.g. "25"
+        self.lookups = [dict(table) for table in self.tables]
+        self._get_columns = operator.itemgetter(*self.columns)
+        self._getters = [operator.itemgetter(column) for column in self.columns]
+
+    @staticmethod
+    def _decode(column, table, value):
+        """Encode one text answer of a column."""
+        if value in table:
+            return table[value]
+        if value.isnumeric():
+            return int(value)
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"Invalid value {value!r} for {column}") from None
+
+    def encode_record(self, record):
+        """
+        Encode one payload without the column-by-column batch machinery.
+
+        Args:
+            record (dict): Column name to raw value
+
+        Returns:
+            list: Encoded values in column order, rounded to float32 like the
+            rows of encode so that both give the same cache keys
+        """
+        values = [
+            self._decode(column, table, value) if isinstance(value, str) else value
+            for column, table, value in zip(
+                self.columns, self.tables, self._get_columns(record)
+            )
+        ]
+        return np.array(values, dtype=np.float32).tolist()
+
+    def encode(self, records):
+        """
+        Encode a batch column by column.
+
+        Args:
+            records: List of payload dicts, or a DataFrame with the columns
+
+        Returns:
+            np.array: Contiguous (records x columns) float32 matrix
+        """
+        num_records = len(records)
+        if hasattr(records, "columns"):
+            columns = [records[column].to_numpy() for column in self.columns]
+        else:
+            columns = (list(map(getter, records)) for getter in self._getters)
+        features = np.empty((num_records, len(self.columns)), dtype=np.float32)
+        for index, values in enumerate(columns):
+            if getattr(values, "dtype", np.dtype(object)).kind in "biuf":
+                features[:, index] = values
+                continue
+            try:
+                # Numbers and numeric text convert directly; labels raise
+                features[:, index] = np.array(values, dtype=np.float32)
+                continue
+            except ValueError:
+                pass
+            lookup = self._lookup(index, values)
+            # Numbers miss the string-keyed lookup and map to themselves
+            features[:, index] = np.fromiter(
+                map(lookup.get, values, values), dtype=np.float32, count=num_records
+            )
+        return features
+
+    def _lookup(self, index, values):
+        """Return the lookup of a column, extended with its new text answers."""
+        lookup = self.lookups[index]
+        new_tokens = [
+            token for token in set(values).difference(lookup) if isinstance(token, str)
+        ]
+        if len(lookup) + len(new_tokens) > LOOKUP_MAX_ENTRIES:
+            lookup = self.lookups[index] = dict(self.tables[index])
+        for token in new_tokens:
+            lookup[token] = self._decode(self.columns[index], lookup, token)
+        return lookup
+
+
+FEATURE_ENCODER = FeatureEncoder(FEATURE_COLUMNS)
+TRAINING_ENCODER = FeatureEncoder(FEATURE_COLUMNS + INTERVENTION_COLUMNS)
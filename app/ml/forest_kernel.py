@@ -0,0 +1,377 @@
+# app/ml/forest_kernel.py
+"""
+Flat array scoring kernel for tree ensembles.
+
+The trees of a fitted forest or gradient boosting ensemble are packed into
+contiguous node arrays and a batch is evaluated level by level for all trees at
+once with NumPy, skipping the per-call validation and joblib dispatch of
+sklearn's predict. The arrays can be saved as raw .npy files and memory-mapped,
+so several worker processes share one page-cache copy of the model.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Rows walked at once; bounds the (trees x rows) index matrices in memory
+CHUNK_SIZE = 8192
+
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots")
+METADATA_FILE = "metadata.json"
+
+
+class ForestKernel:
+    """Vectorized evaluator over the packed node arrays of a tree ensemble."""
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        value,
+        roots,
+        max_depth,
+        num_features,
+        offset=0.0,
+        scale=1.0,
+        average=True,
+        missing_left=None,
+        input_dtype="float32",
+    ):
+        """
+        Initialize from packed node arrays.
+
+        Node indices in left/right are global across all trees. Leaves point
+        to themselves, so extra levels of the walk leave them in place.
+        Predictions are offset + sum(scale * tree), divided by the number of
+        trees when average is set. Inputs are compared against thresholds as
+        input_dtype; with missing_left, NaN inputs follow that node's flag.
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.num_features = int(num_features)
+        self.offset = float(offset)
+        self.scale = float(scale)
+        self.average = bool(average)
+        self.missing_left = missing_left
+        self.input_dtype = str(input_dtype)
+
+    @staticmethod
+    def supports(estimator):
+        """Return whether the estimator can be compiled into a kernel."""
+        # Imported here so that sklearn is only loaded together with a model
+        from sklearn.ensemble import (
+            GradientBoostingRegressor,
+            HistGradientBoostingRegressor,
+        )
+        from sklearn.ensemble._forest import ForestRegressor
+
+        if isinstance(estimator, HistGradientBoostingRegressor):
+            # Categorical splits test bitsets rather than thresholds
+            return hasattr(estimator, "_predictors") and not np.any(
+                estimator.is_categorical_
+            )
+        if not hasattr(estimator, "estimators_"):
+            return False
+        if isinstance(estimator, ForestRegressor):
+            return estimator.n_outputs_ == 1
+        return isinstance(estimator, GradientBoostingRegressor)
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """
+        Export the trees of a fitted sklearn ensemble into packed arrays.
+
+        Args:
+            estimator: Fitted single-output forest or gradient boosting regressor
+
+        Returns:
+            ForestKernel: Kernel scoring the same trees
+        """
+        if not cls.supports(estimator):
+            raise ValueError("Forest kernel requires a fitted single-output ensemble")
+        if hasattr(estimator, "_predictors"):
+            return cls._from_histogram_estimator(estimator)
+        if hasattr(estimator, "learning_rate"):
+            trees = [tree.tree_ for tree in estimator.estimators_[:, 0]]
+            init = estimator._raw_predict_init(np.zeros((1, estimator.n_features_in_)))
+            combine = {
+                "offset": init[0, 0],
+                "scale": estimator.learning_rate,
+                "average": False,
+            }
+        else:
+            trees = [tree.tree_ for tree in estimator.estimators_]
+            combine = {"offset": 0.0, "scale": 1.0, "average": True}
+        sizes = np.array([tree_.node_count for tree_ in trees])
+        roots = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.intp)
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        for offset, tree_ in zip(roots, trees):
+            nodes = np.arange(tree_.node_count) + offset
+            is_leaf = tree_.children_left == -1
+            features.append(np.where(is_leaf, 0, tree_.feature))
+            thresholds.append(tree_.threshold)
+            lefts.append(np.where(is_leaf, nodes, tree_.children_left + offset))
+            rights.append(np.where(is_leaf, nodes, tree_.children_right + offset))
+            values.append(tree_.value[:, 0, 0])
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=roots,
+            max_depth=max(tree_.max_depth for tree_ in trees),
+            num_features=estimator.n_features_in_,
+            **combine,
+        )
+
+    @classmethod
+    def _from_histogram_estimator(cls, estimator):
+        """
+        Export the trees of a fitted HistGradientBoostingRegressor. Their leaf
+        values already include the learning rate, and splits compare float64
+        inputs against the raw-valued num_threshold, sending NaN to the side
+        each node learned for missing values.
+        """
+        trees = [predictors[0].nodes for predictors in estimator._predictors]
+        sizes = np.array([len(nodes) for nodes in trees])
+        roots = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.intp)
+        lefts, rights = [], []
+        for offset, nodes in zip(roots, trees):
+            indices = np.arange(len(nodes)) + offset
+            is_leaf = nodes["is_leaf"].astype(bool)
+            lefts.append(np.where(is_leaf, indices, nodes["left"] + offset))
+            rights.append(np.where(is_leaf, indices, nodes["right"] + offset))
+        nodes = np.concatenate(trees)
+        return cls(
+            feature=nodes["feature_idx"].astype(np.intp),
+            threshold=nodes["num_threshold"].astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=nodes["value"].astype(np.float64),
+            roots=roots,
+            max_depth=int(nodes["depth"].max()),
+            num_features=estimator.n_features_in_,
+            offset=float(np.ravel(estimator._baseline_prediction)[0]),
+            scale=1.0,
+            average=False,
+            missing_left=nodes["missing_go_to_left"].astype(bool),
+            input_dtype="float64",
+        )
+
+    def extend(self, other):
+        """
+        Return a kernel scoring the trees of this kernel followed by other's.
+
+        Args:
+            other (ForestKernel): Trees over the same features, combined with
+                the same scale and averaging
+
+        Returns:
+            ForestKernel: Kernel whose offset is the sum of both offsets
+        """
+        if (
+            other.num_features,
+            other.scale,
+            other.average,
+            other.input_dtype,
+            other.missing_left is None,
+        ) != (
+            self.num_features,
+            self.scale,
+            self.average,
+            self.input_dtype,
+            self.missing_left is None,
+        ):
+            raise ValueError("Kernels must share their features and combination")
+        shift = len(self.value)
+        return ForestKernel(
+            feature=np.concatenate((self.feature, other.feature)),
+            threshold=np.concatenate((self.threshold, other.threshold)),
+            left=np.concatenate((self.left, other.left + shift)),
+            right=np.concatenate((self.right, other.right + shift)),
+            value=np.concatenate((self.value, other.value)),
+            roots=np.concatenate((self.roots, other.roots + shift)),
+            max_depth=max(self.max_depth, other.max_depth),
+            num_features=self.num_features,
+            offset=self.offset + other.offset,
+            scale=self.scale,
+            average=self.average,
+            missing_left=(
+                None
+                if self.missing_left is None
+                else np.concatenate((self.missing_left, other.missing_left))
+            ),
+            input_dtype=self.input_dtype,
+        )
+
+    def to_arrays(self):
+        """Return the node arrays and the scalar metadata of the kernel."""
+        arrays = {name: getattr(self, name) for name in ARRAY_NAMES}
+        if self.missing_left is not None:
+            arrays["missing_left"] = self.missing_left
+        metadata = {
+            "max_depth": self.max_depth,
+            "num_features": self.num_features,
+            "offset": self.offset,
+            "scale": self.scale,
+            "average": self.average,
+            "input_dtype": self.input_dtype,
+        }
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """Rebuild a kernel from the output of to_arrays."""
+        return cls(
+            **{name: arrays[name] for name in ARRAY_NAMES},
+            missing_left=arrays.get("missing_left"),
+            **metadata,
+        )
+
+    def save(self, directory):
+        """Write the kernel as uncompressed .npy files plus JSON metadata."""
+        save_arrays(directory, *self.to_arrays())
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """Load a saved kernel, memory-mapping its arrays by default."""
+        return cls.from_arrays(*load_arrays(directory, mmap_mode=mmap_mode))
+
+    @property
+    def num_trees(self):
+        """Return the number of trees in the kernel."""
+        return len(self.roots)
+
+    def apply(self, features):
+        """
+        Find the leaf reached by every row in every tree.
+
+        Args:
+            features (np.array): Input matrix, one row per sample
+
+        Returns:
+            np.array: (trees x rows) matrix of global leaf indices
+        """
+        # Forests compare float32 inputs against float64 thresholds, and
+        # histogram boosting compares float64 inputs
+        flat = np.ascontiguousarray(features, dtype=self.input_dtype).ravel()
+        num_rows, num_features = len(features), np.shape(features)[1]
+        row_offsets = np.arange(num_rows) * num_features
+        nodes = np.repeat(np.asarray(self.roots)[:, np.newaxis], num_rows, axis=1)
+        for _ in range(self.max_depth):
+            values = flat[row_offsets + self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if self.missing_left is not None:
+                go_left = np.where(np.isnan(values), self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_per_tree(self, features):
+        """Return the (trees x rows) matrix of individual tree predictions."""
+        return self.value[self.apply(features)]
+
+    def combine(self, per_tree):
+        """
+        Reduce per-tree predictions the way sklearn does, bit for bit.
+
+        Args:
+            per_tree (np.array): (trees x rows) matrix of tree predictions
+
+        Returns:
+            np.array: One prediction per row
+        """
+        predictions = np.full(per_tree.shape[1], self.offset)
+        # Accumulate in estimator order to match sklearn's summation exactly
+        for tree_predictions in per_tree:
+            predictions += self.scale * tree_predictions
+        if self.average:
+            predictions /= self.num_trees
+        return predictions
+
+    def predict(self, features):
+        """
+        Predict the ensemble output, bit-identical to sklearn's predict.
+
+        Args:
+            features (np.array): Input matrix, one row per sample
+
+        Returns:
+            np.array: One prediction per row
+        """
+        return np.concatenate(
+            [
+                self.combine(
+                    self.predict_per_tree(features[start : start + CHUNK_SIZE])
+                )
+                for start in range(0, max(len(features), 1), CHUNK_SIZE)
+            ]
+        )
+
+
+def save_arrays(directory, arrays, metadata):
+    """
+    Write named arrays as raw .npy files plus a JSON metadata file.
+
+    The files are written to a temporary sibling directory. Any existing
+    target is renamed aside, the new directory is renamed into its place and
+    only then is the old one deleted, so readers never see a half-written
+    model and the old one is restored if the swap fails.
+
+    Args:
+        directory (str): Target directory
+        arrays (dict): Array name to np.array
+        metadata (dict): JSON-serializable scalars
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging, METADATA_FILE), "w") as metadata_file:
+            json.dump({**metadata, "arrays": sorted(arrays)}, metadata_file)
+        retired = None
+        if os.path.isdir(directory):
+            retired = f"{staging}-retired"
+            os.replace(directory, retired)
+        try:
+            os.replace(staging, directory)
+        except BaseException:
+            if retired is not None:
+                os.replace(retired, directory)
+            raise
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_arrays(directory, mmap_mode="r"):
+    """
+    Load arrays written by save_arrays.
+
+    Args:
+        directory (str): Directory written by save_arrays
+        mmap_mode (str): np.load memory-map mode, or None to read into memory
+
+    Returns:
+        tuple: (arrays dict, metadata dict)
+    """
+    with open(os.path.join(directory, METADATA_FILE)) as metadata_file:
+        metadata = json.load(metadata_file)
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in metadata.pop("arrays")
+    }
+    return arrays, metadata
@@ -0,0 +1,284 @@
+# app/ml/hot_swap.py
+"""
+Staged model switches for the registry.
+
+A candidate model is loaded and warmed up with synthetic 128-row batches
+before it can take traffic. While staged, a sampled share of the predictions
+served through HotSwap.predict are also scored by the candidate on a
+background thread, off the request path, recording both models' latency and
+the prediction deltas. Promoting swaps the candidate
+in with one registry call, and rollback restores the replaced model.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.ml import get_registry
+from app.ml.artifact_store import ARTIFACT_STORE
+from app.ml.feature_encoder import FEATURE_COLUMNS, INTERVENTION_COLUMNS
+from app.ml.model_registry import ModelRegistry
+from app.monitoring import METRICS, Histogram
+
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+# Shadow scorings allowed to wait for the background thread; sampled calls
+# beyond this are dropped rather than queued
+SHADOW_MAX_PENDING = int(os.environ.get("SHADOW_MAX_PENDING", "16"))
+# Synthetic batches run through a candidate before it is staged; each has the
+# 128 rows of one client's intervention matrix
+WARMUP_BATCHES = 3
+WARMUP_ROWS = 128
+# Bucket upper bounds of the absolute prediction deltas, in success-rate points
+DELTA_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0)
+
+
+class ShadowComparison:
+    """Latency and prediction deltas of a staged model against the live one."""
+
+    def __init__(self):
+        """Initialize empty counters and histograms for one candidate."""
+        self.live_latency = Histogram(
+            "shadow_live_latency_seconds",
+            description="Latency of the live model on shadow-scored requests",
+        )
+        self.shadow_latency = Histogram(
+            "shadow_candidate_latency_seconds",
+            description="Latency of the staged model on shadow-scored requests",
+        )
+        self.deltas = Histogram(
+            "shadow_abs_delta",
+            DELTA_BUCKETS,
+            "Absolute difference between staged and live predictions",
+        )
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._rows = 0
+        self._errors = 0
+        self._dropped = 0
+        self._delta_sum = 0.0
+        self._max_abs_delta = 0.0
+
+    def record(self, live, shadow, live_seconds, shadow_seconds):
+        """Record one shadow-scored request."""
+        deltas = np.asarray(shadow, dtype=float) - np.asarray(live, dtype=float)
+        self.live_latency.observe(live_seconds)
+        self.shadow_latency.observe(shadow_seconds)
+        for delta in np.abs(deltas):
+            self.deltas.observe(float(delta))
+        with self._lock:
+            self._requests += 1
+            self._rows += len(deltas)
+            self._delta_sum += float(deltas.sum())
+            self._max_abs_delta = max(self._max_abs_delta, float(np.abs(deltas).max()))
+
+    def record_error(self):
+        """Count a request the staged model failed to score."""
+        with self._lock:
+            self._errors += 1
+
+    def record_dropped(self):
+        """Count a sampled request skipped because the shadow queue was full."""
+        with self._lock:
+            self._dropped += 1
+
+    def stats(self):
+        """Return the counters, mean delta and both models' latency."""
+        with self._lock:
+            requests, rows, errors = self._requests, self._rows, self._errors
+            dropped = self._dropped
+            delta_sum, max_abs_delta = self._delta_sum, self._max_abs_delta
+        return {
+            "requests": requests,
+            "rows": rows,
+            "errors": errors,
+            "dropped": dropped,
+            "mean_delta": delta_sum / rows if rows else None,
+            "max_abs_delta": max_abs_delta,
+            "live_latency": self.live_latency.snapshot(),
+            "shadow_latency": self.shadow_latency.snapshot(),
+            "abs_deltas": self.deltas.snapshot(),
+        }
+
+
+def warm_up_model(model, batches=WARMUP_BATCHES, rows=WARMUP_ROWS):
+    """
+    Run synthetic client matrices through a model before it takes traffic.
+
+    Args:
+        model (BaseModel): Trained model
+        batches (int): Number of predict calls
+        rows (int): Rows per call
+
+    Returns:
+        float: Latency of the last call in milliseconds
+    """
+    num_features = len(FEATURE_COLUMNS) + len(INTERVENTION_COLUMNS)
+    matrix = (
+        np.random.default_rng(0)
+        .integers(0, 10, size=(rows, num_features))
+        .astype(float)
+    )
+    latency = None
+    for _ in range(batches):
+        started = time.perf_counter()
+        model.predict(matrix)
+        latency = time.perf_counter() - started
+    return latency * 1000
+
+
+class HotSwap:
+    """Stages, shadow-scores, promotes and rolls back registry models."""
+
+    def __init__(self, store=ARTIFACT_STORE):
+        """Initialize with the artifact store candidates are loaded from."""
+        self.store = store
+        self._staged = None
+        self._lock = threading.Lock()
+        self._shadow_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shadow"
+        )
+        self._shadow_pending = 0
+
+    def stage(self, model_name, version=None, sample_rate=SHADOW_SAMPLE_RATE):
+        """
+        Load and warm up a candidate, then shadow-score it on live traffic.
+
+        Args:
+            model_name (str): Registry name of the candidate
+            version (str): Stored artifact version; the latest artifact, or
+                the registered model when none is stored, by default
+            sample_rate (float): Share of predictions also scored by it
+
+        Returns:
+            dict: Status of the staged candidate
+
+        Raises:
+            ValueError: When the model is unknown or not trained
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        registry = get_registry()
+        registered = registry.get_model(model_name)
+        if version is not None or self.store.latest_version(model_name) is not None:
+            model, manifest = self.store.load(model_name, type(registered), version)
+        else:
+            model, manifest = registered, registry.get_manifest(model_name)
+        if not getattr(model, "is_trained", False):
+            raise ValueError(f"Model {model_name} is not trained")
+        warmup_ms = warm_up_model(model)
+        staged = {
+            "model_name": model_name,
+            "model": model,
+            "manifest": manifest,
+            "sample_rate": sample_rate,
+            "warmup_latency_ms": warmup_ms,
+            "comparison": ShadowComparison(),
+        }
+        with self._lock:
+            self._staged = staged
+        return self.status()
+
+    def predict(self, features):
+        """
+        Predict with the current model, shadow-scoring a sample of calls on
+        the background thread. The caller never waits for the staged model,
+        and its failures are counted and never reach the caller.
+        """
+        live_model = get_registry().get_model()
+        started = time.perf_counter()
+        predictions = live_model.predict(features)
+        live_seconds = time.perf_counter() - started
+        staged = self._staged
+        if staged is not None and random.random() < staged["sample_rate"]:
+            with self._lock:
+                queued = self._shadow_pending < SHADOW_MAX_PENDING
+                if queued:
+                    self._shadow_pending += 1
+            if queued:
+                # Copied, since callers may reuse their buffers once we return
+                self._shadow_executor.submit(
+                    self._shadow_score,
+                    staged,
+                    np.array(features),
+                    np.array(predictions),
+                    live_seconds,
+                )
+            else:
+                staged["comparison"].record_dropped()
+        return predictions
+
+    def _shadow_score(self, staged, features, predictions, live_seconds):
+        """Score one sampled call with the staged model and record the deltas."""
+        try:
+            started = time.perf_counter()
+            shadow = staged["model"].predict(features)
+            staged["comparison"].record(
+                predictions, shadow, live_seconds, time.perf_counter() - started
+            )
+        except Exception:
+            staged["comparison"].record_error()
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    def wait_for_shadow(self):
+        """Block until every shadow scoring submitted so far is recorded."""
+        self._shadow_executor.submit(lambda: None).result()
+
+    def promote(self):
+        """
+        Make the staged candidate the current model in one registry swap.
+
+        Returns:
+            dict: Name, artifact version and shadow statistics of the model
+
+        Raises:
+            ValueError: When no model is staged
+        """
+        with self._lock:
+            staged, self._staged = self._staged, None
+        if staged is None:
+            raise ValueError("No model is staged")
+        get_registry().swap_model(
+            staged["model_name"], staged["model"], staged["manifest"]
+        )
+        return self._describe(staged)
+
+    def rollback(self):
+        """Restore the model that was current before the last switch."""
+        return {"model_name": get_registry().rollback()}
+
+    def cancel(self):
+        """Drop the staged candidate without switching."""
+        with self._lock:
+            self._staged = None
+
+    def status(self):
+        """Return the current model and the staged candidate, if any."""
+        # Reported in /metrics, so the registry is not initialized from here
+        registry = ModelRegistry()
+        staged = self._staged
+        return {
+            "current_model": registry.get_current_model_name(),
+            "model_version": registry.get_model_version(),
+            "staged": None if staged is None else self._describe(staged),
+        }
+
+    @staticmethod
+    def _describe(staged):
+        """Summarize a staged candidate."""
+        manifest = staged["manifest"] or {}
+        return {
+            "model_name": staged["model_name"],
+            "artifact_version": manifest.get("version"),
+            "sample_rate": staged["sample_rate"],
+            "warmup_latency_ms": staged["warmup_latency_ms"],
+            "shadow": staged["comparison"].stats(),
+        }
+
+
+HOT_SWAP = HotSwap()
+METRICS.register_collector("model_swap", HOT_SWAP.status)
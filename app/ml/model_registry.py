@@ -2,6 +2,7 @@
 """
 Model registry for managing different ML models.
 """
+import threading
 
 
 class ModelRegistry:
@@ -13,12 +14,27 @@ class ModelRegistry:
         if cls._instance is None:
             cls._instance = super(ModelRegistry, cls).__new__(cls)
             cls._instance._models = {}
+            cls._instance._manifests = {}
             cls._instance._current_model_name = None
+            cls._instance._generation = 0
+            cls._instance._previous = None
+            cls._instance._lock = threading.Lock()
         return cls._instance
 
-    def register_model(self, model_name, model_class):
-        """Register a new model with the registry."""
+    def _remember_current(self):
+        """Keep the current model for rollback; the caller holds the lock."""
+        if self._current_model_name is not None:
+            name = self._current_model_name
+            self._previous = (name, self._models[name], self._manifests.get(name))
+
+    def register_model(self, model_name, model_class, manifest=None):
+        """
+        Register a new model with the registry, with the manifest of the
+        stored artifact it was loaded from, if any.
+        """
         self._models[model_name] = model_class
+        self._manifests[model_name] = manifest
+        self._generation += 1
         if self._current_model_name is None:
             self._current_model_name = model_name
 
@@ -32,17 +48,63 @@ class ModelRegistry:
 
         return self._models[model_name]
 
+    def get_manifest(self, model_name=None):
+        """Get the artifact manifest of a model, or None if it was not loaded."""
+        if model_name is None:
+            model_name = self._current_model_name
+        return self._manifests.get(model_name)
+
     def set_current_model(self, model_name):
         """Set the current active model."""
         if model_name not in self._models:
             raise ValueError(f"Model {model_name} is not registered")
 
-        self._current_model_name = model_name
+        with self._lock:
+            self._remember_current()
+            self._current_model_name = model_name
+            self._generation += 1
+
+    def swap_model(self, model_name, model, manifest=None):
+        """
+        Register a model and make it current in one step, so no request sees
+        the new name with the old model; the replaced model is kept for
+        rollback.
+        """
+        with self._lock:
+            self._remember_current()
+            self._models[model_name] = model
+            self._manifests[model_name] = manifest
+            self._current_model_name = model_name
+            self._generation += 1
+
+    def rollback(self):
+        """
+        Restore the model that was current before the last switch or swap.
+        Rolling back twice returns to the newer model.
+        """
+        with self._lock:
+            if self._previous is None:
+                raise ValueError("No previous model to roll back to")
+            model_name, model, manifest = self._previous
+            self._remember_current()
+            self._models[model_name] = model
+            self._manifests[model_name] = manifest
+            self._current_model_name = model_name
+            self._generation += 1
+        return model_name
 
     def get_current_model_name(self):
         """Get the name of the currently active model."""
         return self._current_model_name
 
+    def get_model_version(self):
+        """
+        Get an identifier of the active model.
+        Changes whenever a model is registered or switched, so results cached
+        against an older identifier are never served again.
+        """
+        return f"{self._current_model_name}@{self._generation}"
+
     def list_available_models(self):
         """List all available models in the registry."""
         return list(self._models.keys())
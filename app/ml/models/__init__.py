@@ -5,5 +5,13 @@ Machine learning models package.
 from app.ml.models.random_forest import RandomForestModel
 from app.ml.models.gradient_boost import GradientBoostingModel
 from app.ml.models.linear_regression import LinearRegressionModel
+from app.ml.models.sgd_regression import SGDRegressionModel
+from app.ml.models.hist_gradient_boost import HistGradientBoostingModel
 
-__all__ = ["RandomForestModel", "GradientBoostingModel", "LinearRegressionModel"]
+__all__ = [
+    "RandomForestModel",
+    "GradientBoostingModel",
+    "LinearRegressionModel",
+    "SGDRegressionModel",
+    "HistGradientBoostingModel",
+]
@@ -2,8 +2,13 @@
 """
 Gradient Boosting implementation for success rate prediction.
 """
+import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
 from app.ml.base_model import BaseModel
+from app.ml.forest_kernel import ForestKernel
+
+# Boosting stages fitted to the residuals of the new rows by each update
+UPDATE_STAGES = 10
 
 
 class GradientBoostingModel(BaseModel):
@@ -17,19 +22,68 @@ class GradientBoostingModel(BaseModel):
             random_state=random_state,
         )
         self.is_trained = False
+        self.kernel = None
 
     def train(self, features, targets):
         """Train the model with the given features and targets."""
         self.model.fit(features, targets)
         self.is_trained = True
+        self.kernel = None
         return self
 
     def predict(self, features):
         """Make predictions using the trained model."""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
+        if self.kernel is not None:
+            return self.kernel.predict(features)
         return self.model.predict(features)
 
+    def update(self, features, targets, num_stages=UPDATE_STAGES):
+        """Add boosting stages fitted to the residuals of the new rows only."""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        kernel = self.kernel
+        if kernel is None:
+            kernel = ForestKernel.from_estimator(self.model)
+        residuals = np.asarray(targets, dtype=np.float64) - kernel.predict(
+            np.asarray(features)
+        )
+        # The kernel's scale is the learning rate its stages were fitted with
+        stages = GradientBoostingRegressor(
+            **{
+                **self.model.get_params(),
+                "n_estimators": num_stages,
+                "init": "zero",
+                "learning_rate": kernel.scale,
+            }
+        ).fit(features, residuals)
+        self.kernel = kernel.extend(ForestKernel.from_estimator(stages))
+        return self
+
     def get_name(self):
         """Return the name of the model."""
         return "GradientBoosting"
+
+    def to_arrays(self):
+        """Return the packed tree arrays and estimator params of the model."""
+        kernel = self.kernel
+        if kernel is None:
+            kernel = ForestKernel.from_estimator(self.model)
+        arrays, metadata = kernel.to_arrays()
+        return arrays, {**metadata, "params": self.model.get_params()}
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """
+        Rebuild a model that predicts from the packed tree arrays. The
+        estimator params are restored so that updates fit like the original.
+        """
+        metadata = dict(metadata)
+        params = metadata.pop("params", None)
+        model = cls()
+        if params is not None:
+            model.model.set_params(**params)
+        model.kernel = ForestKernel.from_arrays(arrays, metadata)
+        model.is_trained = True
+        return model
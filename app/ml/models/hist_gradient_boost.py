@@ -0,0 +1,102 @@
+# app/ml/models/hist_gradient_boost.py
+"""
+Histogram-based Gradient Boosting implementation for success rate prediction.
+"""
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+from app.ml.base_model import BaseModel
+from app.ml.forest_kernel import ForestKernel
+
+# Boosting iterations fitted to the residuals of the new rows by each update
+UPDATE_STAGES = 10
+
+
+class HistGradientBoostingModel(BaseModel):
+    """
+    Histogram-based Gradient Boosting model for predicting success rates.
+    Features are binned once, splits are found on the bins with OpenMP
+    threads, and boosting stops when the validation score stops improving.
+    """
+
+    def __init__(
+        self,
+        max_iter=200,
+        learning_rate=0.1,
+        validation_fraction=0.1,
+        n_iter_no_change=10,
+        random_state=42,
+    ):
+        """Initialize the model with parameters."""
+        self.model = HistGradientBoostingRegressor(
+            max_iter=max_iter,
+            learning_rate=learning_rate,
+            early_stopping=True,
+            validation_fraction=validation_fraction,
+            n_iter_no_change=n_iter_no_change,
+            random_state=random_state,
+        )
+        self.is_trained = False
+        self.kernel = None
+
+    def train(self, features, targets):
+        """Train the model with the given features and targets."""
+        self.model.fit(features, targets)
+        self.is_trained = True
+        self.kernel = None
+        return self
+
+    def predict(self, features):
+        """Make predictions using the trained model."""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        if self.kernel is not None:
+            return self.kernel.predict(features)
+        return self.model.predict(features)
+
+    def update(self, features, targets, num_stages=UPDATE_STAGES):
+        """Add boosting iterations fitted to the residuals of the new rows only."""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        kernel = self.kernel
+        if kernel is None:
+            kernel = ForestKernel.from_estimator(self.model)
+        residuals = np.asarray(targets, dtype=np.float64) - kernel.predict(
+            np.asarray(features)
+        )
+        # Too few new rows to hold out a validation split
+        stages = HistGradientBoostingRegressor(
+            **{
+                **self.model.get_params(),
+                "max_iter": num_stages,
+                "early_stopping": False,
+            }
+        ).fit(features, residuals)
+        self.kernel = kernel.extend(ForestKernel.from_estimator(stages))
+        return self
+
+    def get_name(self):
+        """Return the name of the model."""
+        return "HistGradientBoosting"
+
+    def to_arrays(self):
+        """Return the packed tree arrays and estimator params of the model."""
+        kernel = self.kernel
+        if kernel is None:
+            kernel = ForestKernel.from_estimator(self.model)
+        arrays, metadata = kernel.to_arrays()
+        return arrays, {**metadata, "params": self.model.get_params()}
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """
+        Rebuild a model that predicts from the packed tree arrays. The
+        estimator params are restored so that updates fit like the original.
+        """
+        metadata = dict(metadata)
+        params = metadata.pop("params", None)
+        model = cls()
+        if params is not None:
+            model.model.set_params(**params)
+        model.kernel = ForestKernel.from_arrays(arrays, metadata)
+        model.is_trained = True
+        return model
@@ -2,6 +2,7 @@
 """
 Linear Regression implementation for success rate prediction.
 """
+import numpy as np
 from sklearn.linear_model import LinearRegression
 from app.ml.base_model import BaseModel
 
@@ -13,19 +14,76 @@ class LinearRegressionModel(BaseModel):
         """Initialize the model."""
         self.model = LinearRegression()
         self.is_trained = False
+        self.coefficients = None
+        self.statistics = None
+
+    def _statistics(self, features, targets):
+        """Return the Gram matrix and moment vector of the training rows."""
+        design = np.asarray(features, dtype=np.float64)
+        if self.model.fit_intercept:
+            design = np.column_stack((design, np.ones(len(design))))
+        return design.T @ design, design.T @ np.asarray(targets, dtype=np.float64)
 
     def train(self, features, targets):
         """Train the model with the given features and targets."""
         self.model.fit(features, targets)
         self.is_trained = True
+        self.coefficients = None
+        self.statistics = self._statistics(features, targets)
+        return self
+
+    def update(self, features, targets):
+        """
+        Add the new rows to the stored Gram matrix and moment vector and
+        solve the normal equations again, without revisiting older rows.
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        if self.statistics is None:
+            raise ValueError("Model was stored without statistics; retrain it")
+        gram, moments = self._statistics(features, targets)
+        gram, moments = gram + self.statistics[0], moments + self.statistics[1]
+        solution = np.linalg.lstsq(gram, moments, rcond=None)[0]
+        if self.model.fit_intercept:
+            self.coefficients = (solution[:-1], float(solution[-1]))
+        else:
+            self.coefficients = (solution, 0.0)
+        self.statistics = (gram, moments)
         return self
 
     def predict(self, features):
         """Make predictions using the trained model."""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
+        if self.coefficients is not None:
+            coef, intercept = self.coefficients
+            return np.asarray(features, dtype=np.float64) @ coef + intercept
         return self.model.predict(features)
 
     def get_name(self):
         """Return the name of the model."""
         return "LinearRegression"
+
+    def to_arrays(self):
+        """Return the coefficients and intercept of the trained model."""
+        if self.coefficients is not None:
+            coef, intercept = self.coefficients
+        else:
+            coef, intercept = self.model.coef_, self.model.intercept_
+        arrays = {"coef": coef, "intercept": np.asarray(intercept).reshape(())}
+        if self.statistics is not None:
+            arrays["gram"], arrays["moments"] = self.statistics
+        return arrays, {"fit_intercept": bool(self.model.fit_intercept)}
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """Rebuild a model that predicts from the stored coefficients."""
+        model = cls()
+        model.model.set_params(fit_intercept=metadata.get("fit_intercept", True))
+        # Earlier artifacts hold the intercept as a 1-element array
+        intercept = float(np.asarray(arrays["intercept"]).reshape(-1)[0])
+        model.coefficients = (arrays["coef"], intercept)
+        if "gram" in arrays:
+            model.statistics = (arrays["gram"], arrays["moments"])
+        model.is_trained = True
+        return model
@@ -4,6 +4,10 @@ Random Forest implementation for success rate prediction.
 """
 from sklearn.ensemble import RandomForestRegressor
 from app.ml.base_model import BaseModel
+from app.ml.forest_kernel import ForestKernel
+
+# Trees fitted on the new rows and added to the forest by each update
+UPDATE_TREES = 10
 
 
 class RandomForestModel(BaseModel):
@@ -15,19 +19,59 @@ class RandomForestModel(BaseModel):
             n_estimators=n_estimators, random_state=random_state
         )
         self.is_trained = False
+        self.kernel = None
 
     def train(self, features, targets):
         """Train the model with the given features and targets."""
         self.model.fit(features, targets)
         self.is_trained = True
+        self.kernel = None
         return self
 
     def predict(self, features):
         """Make predictions using the trained model."""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
+        if self.kernel is not None:
+            return self.kernel.predict(features)
         return self.model.predict(features)
 
+    def update(self, features, targets, num_trees=UPDATE_TREES):
+        """Add trees fitted on the new rows only to the trained forest."""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        new_trees = RandomForestRegressor(
+            **{**self.model.get_params(), "n_estimators": num_trees}
+        ).fit(features, targets)
+        kernel = self.kernel
+        if kernel is None:
+            kernel = ForestKernel.from_estimator(self.model)
+        self.kernel = kernel.extend(ForestKernel.from_estimator(new_trees))
+        return self
+
     def get_name(self):
         """Return the name of the model."""
         return "RandomForest"
+
+    def to_arrays(self):
+        """Return the packed tree arrays and estimator params of the model."""
+        kernel = self.kernel
+        if kernel is None:
+            kernel = ForestKernel.from_estimator(self.model)
+        arrays, metadata = kernel.to_arrays()
+        return arrays, {**metadata, "params": self.model.get_params()}
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """
+        Rebuild a model that predicts from the packed tree arrays. The
+        estimator params are restored so that updates fit like the original.
+        """
+        metadata = dict(metadata)
+        params = metadata.pop("params", None)
+        model = cls()
+        if params is not None:
+            model.model.set_params(**params)
+        model.kernel = ForestKernel.from_arrays(arrays, metadata)
+        model.is_trained = True
+        return model
@@ -0,0 +1,102 @@
+# app/ml/models/sgd_regression.py
+"""
+Stochastic gradient descent regression for success rate prediction.
+"""
+import numpy as np
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+from app.ml.base_model import BaseModel
+
+# Passes over the training chunks
+EPOCHS = 5
+
+
+class SGDRegressionModel(BaseModel):
+    """Linear model fitted chunk by chunk with stochastic gradient descent."""
+
+    def __init__(self, alpha=0.0001, random_state=42, epochs=EPOCHS):
+        """Initialize the model with parameters."""
+        self.model = SGDRegressor(alpha=alpha, random_state=random_state)
+        self.scaler = StandardScaler()
+        self.epochs = epochs
+        self.is_trained = False
+        self.coefficients = None
+
+    def train(self, features, targets):
+        """Train the model with the given features and targets."""
+        return self.train_chunks(lambda: iter([(features, targets)]))
+
+    def train_chunks(self, make_chunks):
+        """
+        Fit the feature scaling in one pass over the chunks, then run
+        partial_fit over them for each epoch; only one chunk is in memory.
+        """
+        self.model = SGDRegressor(**self.model.get_params())
+        self.scaler = StandardScaler()
+        for features, _ in make_chunks():
+            self.scaler.partial_fit(features)
+        for _ in range(self.epochs):
+            for features, targets in make_chunks():
+                self.model.partial_fit(self.scaler.transform(features), targets)
+        self.is_trained = True
+        self._fold_coefficients()
+        return self
+
+    def update(self, features, targets):
+        """Run one partial_fit pass over the new rows with the fitted scaling."""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before it can be updated")
+        self.model.partial_fit(self.scaler.transform(features), targets)
+        self._fold_coefficients()
+        return self
+
+    def _fold_coefficients(self):
+        """Fold the scaling into coefficients applied to the raw features."""
+        coef = self.model.coef_ / self.scaler.scale_
+        intercept = float(self.model.intercept_[0] - self.scaler.mean_ @ coef)
+        self.coefficients = (coef, intercept)
+
+    def predict(self, features):
+        """Make predictions using the trained model."""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        coef, intercept = self.coefficients
+        return np.asarray(features, dtype=np.float64) @ coef + intercept
+
+    def get_name(self):
+        """Return the name of the model."""
+        return "SGDRegression"
+
+    def to_arrays(self):
+        """Return the scaling and the scaled-space weights of the model."""
+        arrays = {
+            "mean": self.scaler.mean_,
+            "var": self.scaler.var_,
+            "scale": self.scaler.scale_,
+            "coef": self.model.coef_,
+            "intercept": self.model.intercept_,
+        }
+        metadata = {
+            "samples_seen": int(self.scaler.n_samples_seen_),
+            "steps": float(self.model.t_),
+            "params": self.model.get_params(),
+        }
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """Rebuild a model that predicts from, and updates, the stored weights."""
+        model = cls()
+        model.model.set_params(**metadata["params"])
+        model.scaler.mean_ = np.array(arrays["mean"])
+        model.scaler.var_ = np.array(arrays["var"])
+        model.scaler.scale_ = np.array(arrays["scale"])
+        model.scaler.n_samples_seen_ = metadata["samples_seen"]
+        # Restored so that partial_fit resumes from the stored weights
+        model.model.coef_ = np.array(arrays["coef"])
+        model.model.intercept_ = np.array(arrays["intercept"])
+        model.model.t_ = metadata["steps"]
+        model.model.n_features_in_ = len(model.model.coef_)
+        model.is_trained = True
+        model._fold_coefficients()
+        return model
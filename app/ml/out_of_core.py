@@ -0,0 +1,134 @@
+# app/ml/out_of_core.py
+"""
+Out-of-core training of the registry models.
+
+The dataset is streamed from its CSV file or database in fixed-size chunks
+and never loaded whole. Models that learn incrementally see every chunk;
+the others are fitted on a uniform reservoir sample of bounded size, so peak
+memory depends on the chunk and reservoir sizes, not on the dataset. Every
+HOLDOUT_EVERY-th row is held out and scored as it streams past.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from app.ml import get_registry
+from app.ml.artifact_store import ARTIFACT_STORE
+from app.ml.base_model import BaseModel
+from app.ml.data_processor import DataProcessor
+from app.ml.training import DATA_PATH
+
+CHUNK_ROWS = int(os.environ.get("TRAINING_CHUNK_ROWS", "10000"))
+# One row in this many is held out for scoring
+HOLDOUT_EVERY = 5
+
+
+def holdout_chunks(chunks, holdout=False, every=HOLDOUT_EVERY):
+    """Yield the training rows of each chunk, or with holdout the held-out rows."""
+    offset = 0
+    for features, targets in chunks:
+        held_out = (np.arange(offset, offset + len(targets)) % every) == 0
+        offset += len(targets)
+        rows = held_out if holdout else ~held_out
+        if rows.any():
+            yield features[rows], targets[rows]
+
+
+def streaming_scores(model, chunks):
+    """Return the R^2 and MAE of a model over a stream of chunks."""
+    rows = 0
+    squared_error = absolute_error = target_sum = target_squares = 0.0
+    for features, targets in chunks:
+        errors = targets - model.predict(features)
+        rows += len(targets)
+        squared_error += float(errors @ errors)
+        absolute_error += float(np.abs(errors).sum())
+        target_sum += float(targets.sum())
+        target_squares += float(targets @ targets)
+    if not rows:
+        raise ValueError("No held-out rows to score")
+    total_squares = target_squares - target_sum**2 / rows
+    return {
+        "rows": rows,
+        "r2": 1.0 - squared_error / total_squares if total_squares else 0.0,
+        "mae": absolute_error / rows,
+    }
+
+
+def train_out_of_core(
+    model_names=None,
+    data_path=DATA_PATH,
+    chunk_rows=CHUNK_ROWS,
+    publish=False,
+    store=ARTIFACT_STORE,
+):
+    """
+    Train registered models from a chunked stream of the dataset.
+
+    Args:
+        model_names (list): Registry names to train; all by default
+        data_path (str): CSV file or database URL read by DataProcessor
+        chunk_rows (int): Rows read from the source at a time
+        publish (bool): Store each model as the latest artifact of its name
+            and register it
+        store (ArtifactStore): Store the models are published to
+
+    Returns:
+        dict: Model name to its training mode, fit time and held-out scores
+    """
+    registry = get_registry()
+    processor = DataProcessor(data_path)
+    report = {}
+    for name in model_names or registry.list_available_models():
+        model = registry.get_model(name).untrained_copy()
+        started = time.perf_counter()
+        model.train_chunks(lambda: holdout_chunks(processor.iter_chunks(chunk_rows)))
+        fit_seconds = time.perf_counter() - started
+        scores = streaming_scores(
+            model, holdout_chunks(processor.iter_chunks(chunk_rows), holdout=True)
+        )
+        incremental = type(model).train_chunks is not BaseModel.train_chunks
+        report[name] = {
+            "mode": "incremental" if incremental else "reservoir",
+            "fit_seconds": fit_seconds,
+            **scores,
+        }
+        if publish:
+            manifest = store.put(
+                name,
+                model,
+                metrics=report[name],
+                params=model.model.get_params(),
+                chunk_rows=chunk_rows,
+            )
+            registry.register_model(name, model, manifest)
+            report[name]["published"] = manifest["version"]
+    return report
+
+
+def main():
+    """
+    Train the registered models from a chunked stream of the dataset.
+    Run from the repository root with python -m app.ml.out_of_core.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("models", nargs="*", help="Registry names; all by default")
+    parser.add_argument(
+        "--data", default=DATA_PATH, help="Training CSV file or database URL"
+    )
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument(
+        "--publish", action="store_true", help="Store the trained models"
+    )
+    args = parser.parse_args()
+    report = train_out_of_core(
+        args.models or None, args.data, args.chunk_rows, publish=args.publish
+    )
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
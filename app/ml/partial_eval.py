@@ -0,0 +1,124 @@
+# app/ml/partial_eval.py
+"""
+Partial evaluation of tree ensembles for intervention scoring.
+
+Every row of an intervention matrix shares the same demographic features and
+only the trailing intervention bits change. Instead of walking every tree once
+per row, each tree is walked once with the fixed demographics and only the
+splits on intervention features fan out over the combinations.
+"""
+import numpy as np
+
+
+class PartialEvaluator:
+    """Scores all intervention combinations of one client per tree walk."""
+
+    def __init__(self, kernel, num_fixed):
+        """
+        Read the node arrays of a compiled ensemble.
+
+        Args:
+            kernel (ForestKernel): Packed trees of the ensemble
+            num_fixed (int): Number of leading features that are fixed per client
+        """
+        self.kernel = kernel
+        self.num_fixed = num_fixed
+        # Indexed in place rather than copied to lists, so memory-mapped node
+        # arrays stay shared between worker processes
+        self.left = kernel.left
+        self.right = kernel.right
+        self.feature = kernel.feature
+        self.threshold = kernel.threshold
+        self.roots = kernel.roots
+
+    def predict_combinations(self, fixed_row, combinations):
+        """
+        Predict every combination of the varying features for one client.
+
+        Args:
+            fixed_row (list): Values of the fixed leading features
+            combinations (np.array): Matrix of varying feature values, one row
+                per combination
+
+        Returns:
+            np.array: One prediction per combination, bit-identical to
+            calling the ensemble's predict on the full matrix
+        """
+        # sklearn compares float32 inputs against float64 thresholds
+        fixed = np.asarray(fixed_row, dtype=np.float32).astype(float).tolist()
+        varying = np.asarray(combinations, dtype=np.float32)
+        per_tree = np.empty((len(self.roots), len(varying)))
+        for index, root in enumerate(self.roots):
+            per_tree[index] = self.kernel.value[self._leaves(root, fixed, varying)]
+        return self.kernel.combine(per_tree)
+
+    def _leaves(self, root, fixed, varying):
+        """Walk one tree, branching only on the varying features."""
+        left, right = self.left, self.right
+        feature, threshold = self.feature, self.threshold
+        leaves = np.empty(len(varying), dtype=np.intp)
+        stack = [(root, np.arange(len(varying)))]
+        while stack:
+            node, rows = stack.pop()
+            while left[node] != node and feature[node] < self.num_fixed:
+                if fixed[feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            if left[node] == node:
+                leaves[rows] = node
+                continue
+            goes_left = varying[rows, feature[node] - self.num_fixed] <= threshold[node]
+            if goes_left.any():
+                stack.append((left[node], rows[goes_left]))
+            if not goes_left.all():
+                stack.append((right[node], rows[~goes_left]))
+        return leaves
+
+    def residual_leaves(self, fixed_row):
+        """
+        List the leaves each tree can still reach once the fixed features are
+        known, assuming the varying features are binary.
+
+        Args:
+            fixed_row (list): Values of the fixed leading features
+
+        Returns:
+            tuple: Arrays (tree index, leaf node, bitmask of varying features
+            the leaf requires to be 1, bitmask it requires to be 0), grouped
+            by tree in estimator order
+        """
+        left, right = self.left, self.right
+        feature, threshold = self.feature, self.threshold
+        fixed = np.asarray(fixed_row, dtype=np.float32).astype(float).tolist()
+        trees, leaves, required_ones, required_zeros = [], [], [], []
+        for index, root in enumerate(self.roots):
+            stack = [(root, 0, 0)]
+            while stack:
+                node, ones, zeros = stack.pop()
+                while left[node] != node and feature[node] < self.num_fixed:
+                    if fixed[feature[node]] <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                if left[node] == node:
+                    trees.append(index)
+                    leaves.append(node)
+                    required_ones.append(ones)
+                    required_zeros.append(zeros)
+                    continue
+                bit = 1 << (feature[node] - self.num_fixed)
+                for child, zero_allowed, one_allowed in (
+                    (left[node], 0 <= threshold[node], 1 <= threshold[node]),
+                    (right[node], 0 > threshold[node], 1 > threshold[node]),
+                ):
+                    child_ones = ones if zero_allowed else ones | bit
+                    child_zeros = zeros if one_allowed else zeros | bit
+                    if not child_ones & child_zeros:
+                        stack.append((child, child_ones, child_zeros))
+        return (
+            np.array(trees, dtype=np.intp),
+            np.array(leaves, dtype=np.intp),
+            np.array(required_ones, dtype=np.int64),
+            np.array(required_zeros, dtype=np.int64),
+        )
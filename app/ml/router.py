@@ -2,10 +2,14 @@
 """
 Router for ML model management endpoints.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-from app.ml.model_registry import ModelRegistry
+from app.auth.router import get_admin_user
+from app.executors import IO_EXECUTOR
+from app.ml import get_registry
+from app.ml.hot_swap import HOT_SWAP, SHADOW_SAMPLE_RATE
+from app.models import User
 import numpy as np
 
 router = APIRouter(
@@ -31,7 +35,7 @@ class ModelsListResponse(BaseModel):
 @router.get("/current", response_model=ModelResponse)
 async def get_current_model():
     """Get the currently active model."""
-    registry = ModelRegistry()
+    registry = get_registry()
     current_model = registry.get_current_model_name()
     return {"name": current_model}
 
@@ -39,7 +43,7 @@ async def get_current_model():
 @router.get("/available", response_model=ModelsListResponse)
 async def list_available_models():
     """List all available models."""
-    registry = ModelRegistry()
+    registry = get_registry()
     available_models = registry.list_available_models()
     current_model = registry.get_current_model_name()
     return {"models": available_models, "current_model": current_model}
@@ -48,7 +52,7 @@ async def list_available_models():
 @router.post("/switch/{model_name}", response_model=ModelResponse)
 async def switch_model(model_name: str):
     """Switch to a different model."""
-    registry = ModelRegistry()
+    registry = get_registry()
 
     try:
         registry.set_current_model(model_name)
@@ -61,6 +65,61 @@ async def switch_model(model_name: str):
     return {"name": model_name}
 
 
+@router.post("/stage/{model_name}", response_model=dict)
+async def stage_model(
+    model_name: str,
+    version: str = Query(None, description="Artifact version; the latest by default"),
+    sample_rate: float = Query(SHADOW_SAMPLE_RATE, ge=0.0, le=1.0),
+    current_user: User = Depends(get_admin_user),
+):
+    """Load and warm up a model, then shadow-score it on live predictions."""
+    try:
+        return await IO_EXECUTOR.run(HOT_SWAP.stage, model_name, version, sample_rate)
+    except ValueError as error:
+        raise HTTPException(status_code=404, detail=str(error))
+
+
+@router.get("/stage", response_model=dict)
+async def get_staged_model(current_user: User = Depends(get_admin_user)):
+    """Get the current model and the shadow statistics of the staged one."""
+    return HOT_SWAP.status()
+
+
+@router.delete("/stage", response_model=dict)
+async def cancel_staged_model(current_user: User = Depends(get_admin_user)):
+    """Drop the staged model without switching."""
+    HOT_SWAP.cancel()
+    return HOT_SWAP.status()
+
+
+@router.post("/promote", response_model=dict)
+async def promote_staged_model(current_user: User = Depends(get_admin_user)):
+    """Swap the staged model in as the current model."""
+    try:
+        return HOT_SWAP.promote()
+    except ValueError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+
+
+@router.post("/rollback", response_model=ModelResponse)
+async def rollback_model(current_user: User = Depends(get_admin_user)):
+    """Restore the model that was current before the last switch."""
+    try:
+        return {"name": HOT_SWAP.rollback()["model_name"]}
+    except ValueError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+
+
+@router.get("/artifacts", response_model=dict)
+async def list_model_artifacts():
+    """List the artifact manifest each registered model was loaded from."""
+    registry = get_registry()
+    return {
+        model_name: registry.get_manifest(model_name)
+        for model_name in registry.list_available_models()
+    }
+
+
 @router.get("/test-prediction", response_model=dict)
 async def test_prediction():
     """
@@ -72,19 +131,20 @@ async def test_prediction():
         test_features = np.ones((1, 31)) * 0.5  # Use the same test data each time
 
         # Get the current model from registry
-        registry = ModelRegistry()
+        registry = get_registry()
         current_model = registry.get_model()
         model_name = registry.get_current_model_name()
 
-        # Train the model with some dummy data if it's not trained
-        if not hasattr(current_model, "is_trained") or not current_model.is_trained:
-            # Create dummy training data
-            X_train = np.random.rand(10, 31)
-            y_train = np.random.rand(10)
-            current_model.train(X_train, y_train)
+        # Models are trained offline and loaded from the artifact store
+        if not getattr(current_model, "is_trained", False):
+            raise ValueError(
+                f"Model {model_name} has no trained artifact; publish one with "
+                "python -m app.ml.training --publish"
+            )
 
-        # Make a prediction
-        prediction = float(current_model.predict(test_features)[0])
+        # Make a prediction; a single row is cheaper to score on a thread than
+        # to ship the model to a worker process
+        prediction = float((await IO_EXECUTOR.run(HOT_SWAP.predict, test_features))[0])
 
         return {"model": model_name, "prediction": prediction, "status": "success"}
     except Exception as e:
@@ -0,0 +1,48 @@
+# app/ml/sampling.py
+"""
+Bounded samples of streamed training data.
+
+Kept free of the registry and data source imports, so that BaseModel can
+fit on a sample without depending on the training modules.
+"""
+import os
+
+import numpy as np
+
+# Rows kept in memory to fit models that cannot learn incrementally
+RESERVOIR_ROWS = int(os.environ.get("TRAINING_RESERVOIR_ROWS", "100000"))
+
+
+def reservoir_sample(chunks, size=RESERVOIR_ROWS, random_state=42):
+    """
+    Draw a uniform sample of rows from a stream of chunks (algorithm R).
+
+    Args:
+        chunks: Iterator of (features, targets) chunks
+        size (int): Rows in the sample
+        random_state (int): Seed of the sampling
+
+    Returns:
+        tuple: Sampled features and targets, all rows if there are fewer
+    """
+    rng = np.random.default_rng(random_state)
+    features = targets = None
+    seen = 0
+    for chunk_features, chunk_targets in chunks:
+        if features is None:
+            features = np.empty((size, chunk_features.shape[1]), np.float32)
+            targets = np.empty(size, np.float64)
+        rows = len(chunk_targets)
+        # Rows that still fit are copied; later rows replace a random slot
+        # with probability size / (their index + 1)
+        filling = max(0, min(rows, size - seen))
+        features[seen : seen + filling] = chunk_features[:filling]
+        targets[seen : seen + filling] = chunk_targets[:filling]
+        slots = rng.integers(0, np.arange(seen + filling, seen + rows) + 1)
+        replaced = slots < size
+        features[slots[replaced]] = chunk_features[filling:][replaced]
+        targets[slots[replaced]] = chunk_targets[filling:][replaced]
+        seen += rows
+    if features is None:
+        raise ValueError("No training rows to sample")
+    return features[: min(seen, size)], targets[: min(seen, size)]
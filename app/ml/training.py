@@ -0,0 +1,284 @@
+# app/ml/training.py
+"""
+Parallel cross-validated training of the registered models.
+
+Every (model, fold) pair is fitted as its own job on a process pool sized to
+the machine. The training arrays are written once as .npy files and
+memory-mapped by each worker, so they are not pickled into every job. Each
+model gets its mean score, fit time and predict time over the folds.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold
+
+from app.ml import get_registry
+from app.ml.artifact_store import ARTIFACT_STORE, data_hash
+from app.ml.data_processor import DataProcessor
+from app.ml.forest_kernel import load_arrays, save_arrays
+
+CV_FOLDS = int(os.environ.get("TRAINING_CV_FOLDS", "5"))
+# Rows of the matrix whose predict latency is measured, i.e. the 128
+# intervention combinations of one client, and the number of timed calls
+LATENCY_ROWS = 128
+LATENCY_REPEATS = 5
+TRAINING_WORKERS = int(os.environ.get("TRAINING_WORKERS", str(os.cpu_count() or 1)))
+DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "clients",
+    "service",
+    "data_commontool.csv",
+)
+
+# Memory-mapped training arrays of this worker process, by directory
+_worker_arrays: Dict[str, dict] = {}
+
+
+def _shared_arrays(directory):
+    """Memory-map the training arrays of a directory once per process."""
+    if directory not in _worker_arrays:
+        _worker_arrays[directory] = load_arrays(directory)[0]
+    return _worker_arrays[directory]
+
+
+def _limit_threads(threads):
+    """Cap the native threads of this worker, e.g. OpenMP in histogram boosting."""
+    # Imported here so that the parent process keeps its own thread limits
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(threads)
+
+
+def fold_indices(num_samples, folds=CV_FOLDS, random_state=42):
+    """
+    Split sample indices into cross-validation folds.
+
+    Args:
+        num_samples (int): Number of training samples
+        folds (int): Number of folds
+        random_state (int): Seed of the shuffle
+
+    Returns:
+        list: (train indices, test indices) of each fold
+    """
+    splitter = KFold(n_splits=folds, shuffle=True, random_state=random_state)
+    return list(splitter.split(np.empty((num_samples, 1))))
+
+
+def fit_fold(model, directory, train_index, test_index):
+    """Fit an untrained model on one fold and score it on the held-out rows."""
+    arrays = _shared_arrays(directory)
+    features, targets = arrays["features"], arrays["targets"]
+    started = time.perf_counter()
+    model.train(features[train_index], targets[train_index])
+    fitted = time.perf_counter()
+    predictions = model.predict(features[test_index])
+    predicted = time.perf_counter()
+    latency_rows = np.resize(features[test_index], (LATENCY_ROWS, features.shape[1]))
+    latencies = []
+    for _ in range(LATENCY_REPEATS):
+        call_started = time.perf_counter()
+        model.predict(latency_rows)
+        latencies.append(time.perf_counter() - call_started)
+    return {
+        "r2": float(r2_score(targets[test_index], predictions)),
+        "mae": float(mean_absolute_error(targets[test_index], predictions)),
+        "fit_seconds": fitted - started,
+        "predict_seconds": predicted - fitted,
+        "predict_rows": len(test_index),
+        "latency_ms": min(latencies) * 1000,
+    }
+
+
+def fit_full(model, directory):
+    """Fit an untrained model on every training row."""
+    arrays = _shared_arrays(directory)
+    return model.train(np.asarray(arrays["features"]), np.asarray(arrays["targets"]))
+
+
+def summarize_folds(fold_results):
+    """
+    Aggregate the fold results of one model.
+
+    Args:
+        fold_results (list): Dicts returned for each fold
+
+    Returns:
+        dict: Mean and spread of the score, mean fit time per fold, mean
+        predict time per row and median LATENCY_ROWS-row predict latency
+    """
+    r2_scores = [result["r2"] for result in fold_results]
+    predict_seconds = sum(result["predict_seconds"] for result in fold_results)
+    predict_rows = sum(result["predict_rows"] for result in fold_results)
+    return {
+        "folds": len(fold_results),
+        "r2_mean": float(np.mean(r2_scores)),
+        "r2_std": float(np.std(r2_scores)),
+        "mae_mean": float(np.mean([result["mae"] for result in fold_results])),
+        "fit_seconds": float(
+            np.mean([result["fit_seconds"] for result in fold_results])
+        ),
+        "predict_us_per_row": predict_seconds / predict_rows * 1e6,
+        "latency_ms": float(
+            np.median([result["latency_ms"] for result in fold_results])
+        ),
+    }
+
+
+@contextmanager
+def training_pool(features, targets, workers=TRAINING_WORKERS):
+    """
+    Share training arrays with a pool of worker processes.
+
+    Args:
+        features (np.array): (samples x features) training matrix
+        targets (np.array): One target per sample
+        workers (int): Worker processes
+
+    Yields:
+        tuple: The pool and the directory its jobs memory-map the arrays from
+    """
+    if len(targets) != len(features):
+        raise ValueError("Features and targets must have the same length")
+    with tempfile.TemporaryDirectory(prefix="training-") as scratch:
+        directory = os.path.join(scratch, "arrays")
+        save_arrays(directory, {"features": features, "targets": targets}, {})
+        # Spawned workers do not inherit the caller's threads and locks; the
+        # cores are split between them so threaded fits do not oversubscribe
+        workers = max(1, workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_limit_threads,
+            initargs=(max(1, (os.cpu_count() or 1) // workers),),
+        ) as pool:
+            yield pool, directory
+
+
+def cross_validate_models(
+    models, features, targets, folds=CV_FOLDS, workers=TRAINING_WORKERS, refit=False
+):
+    """
+    Cross-validate several models in parallel on shared training arrays.
+
+    Args:
+        models (dict): Model name to model; only its parameters are used
+        features (np.array): (samples x features) training matrix
+        targets (np.array): One target per sample
+        folds (int): Number of cross-validation folds
+        workers (int): Worker processes; all cores by default
+        refit (bool): Also fit every model on all rows
+
+    Returns:
+        dict: "models" with each model's fold summary, "wall_seconds", and
+        with refit, "fitted" mapping each name to its model fitted on all rows
+    """
+    if folds < 2:
+        raise ValueError("Cross-validation needs at least 2 folds")
+    splits = fold_indices(len(targets), folds)
+    started = time.perf_counter()
+    workers = min(workers, len(models) * (folds + refit))
+    with training_pool(features, targets, workers) as (pool, directory):
+        fold_jobs = {
+            name: [
+                pool.submit(
+                    fit_fold,
+                    model.untrained_copy(),
+                    directory,
+                    train_index,
+                    test_index,
+                )
+                for train_index, test_index in splits
+            ]
+            for name, model in models.items()
+        }
+        refit_jobs = {
+            name: pool.submit(fit_full, model.untrained_copy(), directory)
+            for name, model in (models.items() if refit else ())
+        }
+        report = {
+            "models": {
+                name: summarize_folds([job.result() for job in jobs])
+                for name, jobs in fold_jobs.items()
+            }
+        }
+        if refit:
+            report["fitted"] = {name: job.result() for name, job in refit_jobs.items()}
+    report["wall_seconds"] = time.perf_counter() - started
+    return report
+
+
+def cross_validate_registry(
+    data_path=DATA_PATH, publish=False, store=ARTIFACT_STORE, refit=False, **kwargs
+):
+    """
+    Cross-validate every registered model on the training dataset.
+
+    Args:
+        data_path (str): CSV file or database URL read by DataProcessor
+        publish (bool): Refit every model on all rows, store it as the latest
+            artifact with its scores and register it
+        store (ArtifactStore): Store the models are published to
+        refit (bool): Return every model fitted on all rows without publishing
+        **kwargs: Passed on to cross_validate_models
+
+    Returns:
+        dict: Report of cross_validate_models, with the published versions
+    """
+    registry = get_registry()
+    models = {
+        name: registry.get_model(name) for name in registry.list_available_models()
+    }
+    features, targets = DataProcessor(data_path).prepare_dataset()
+    report = cross_validate_models(
+        models, features, targets, refit=publish or refit, **kwargs
+    )
+    if publish:
+        training_data_hash = data_hash(features, targets)
+        report["published"] = {}
+        for name, model in report.pop("fitted").items():
+            manifest = store.put(
+                name,
+                model,
+                training_data_hash,
+                metrics=report["models"][name],
+                params=model.model.get_params(),
+            )
+            registry.register_model(name, model, manifest)
+            report["published"][name] = manifest["version"]
+    return report
+
+
+def main():
+    """
+    Print the cross-validation report of every registered model.
+    Run from the repository root with python -m app.ml.training; with
+    --publish the models are also refitted and stored as artifacts.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--data", default=DATA_PATH, help="Training CSV file or database URL"
+    )
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--workers", type=int, default=TRAINING_WORKERS)
+    parser.add_argument(
+        "--publish", action="store_true", help="Store the refitted models"
+    )
+    args = parser.parse_args()
+    report = cross_validate_registry(
+        args.data, publish=args.publish, folds=args.folds, workers=args.workers
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# app/ml/tuning.py
+"""
+Successive-halving hyperparameter search for the registry models.
+
+Candidates sampled from a model's parameter space are cross-validated on a
+small share of the training rows; the best 1/eta of them advance to a round
+with eta times the rows, and the best of the last round with more than one
+candidate wins. Fold jobs run on the shared training pool. Candidates are
+ranked on R^2 minus a penalty per millisecond of predict latency on a 128-row
+client matrix, and the winner is refitted on every row, registered and
+published to the artifact store.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from app.ml import get_registry
+from app.ml.artifact_store import ARTIFACT_STORE, data_hash
+from app.ml.data_processor import DataProcessor
+from app.ml.training import (
+    CV_FOLDS,
+    DATA_PATH,
+    TRAINING_WORKERS,
+    fit_fold,
+    fit_full,
+    fold_indices,
+    summarize_folds,
+    training_pool,
+)
+
+# R^2 given up per millisecond of predict latency on a client matrix
+LATENCY_WEIGHT = float(os.environ.get("TUNING_LATENCY_WEIGHT", "0.01"))
+
+# Estimator parameters searched for each registered model
+PARAMETER_SPACES = {
+    "RandomForest": {
+        "n_estimators": [10, 25, 50, 100, 200],
+        "max_depth": [None, 4, 8, 16],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.5, "sqrt"],
+    },
+    "GradientBoosting": {
+        "n_estimators": [25, 50, 100, 200],
+        "learning_rate": [0.01, 0.03, 0.1, 0.3],
+        "max_depth": [2, 3, 4],
+        "subsample": [0.6, 0.8, 1.0],
+    },
+    "LinearRegression": {"fit_intercept": [True, False]},
+    "HistGradientBoosting": {
+        "learning_rate": [0.03, 0.1, 0.3],
+        "max_leaf_nodes": [7, 15, 31, 63],
+        "min_samples_leaf": [5, 10, 20, 40],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+    "SGDRegression": {
+        "alpha": [0.00001, 0.0001, 0.001, 0.01],
+        "penalty": ["l2", "l1", "elasticnet"],
+        "eta0": [0.001, 0.01, 0.1],
+    },
+}
+
+
+def objective(summary, latency_weight=LATENCY_WEIGHT):
+    """Rank a cross-validation summary: R^2 minus its weighted latency."""
+    return summary["r2_mean"] - latency_weight * summary["latency_ms"]
+
+
+def _num_rounds(num_candidates, eta):
+    """Number of rounds, stopping before one that would hold a single candidate."""
+    num_rounds = 1
+    while num_candidates // eta > 1:
+        num_candidates //= eta
+        num_rounds += 1
+    return num_rounds
+
+
+def _round_rows(num_samples, num_rounds, eta, min_rows):
+    """Number of training rows used in each round, growing by eta."""
+    return [
+        max(min_rows, min(num_samples, int(num_samples / eta ** (num_rounds - 1 - i))))
+        for i in range(num_rounds)
+    ]
+
+
+def successive_halving(
+    model,
+    parameter_space,
+    features,
+    targets,
+    candidates=16,
+    eta=3,
+    folds=CV_FOLDS,
+    workers=TRAINING_WORKERS,
+    latency_weight=LATENCY_WEIGHT,
+    random_state=42,
+):
+    """
+    Search a model's parameter space with successive halving.
+
+    Args:
+        model (BaseModel): Model whose estimator parameters are searched
+        parameter_space (dict): Estimator parameter name to candidate values
+        features (np.array): (samples x features) training matrix
+        targets (np.array): One target per sample
+        candidates (int): Parameter sets sampled for the first round
+        eta (int): Factor by which candidates shrink and rows grow per round
+        folds (int): Cross-validation folds per candidate
+        workers (int): Worker processes
+        latency_weight (float): R^2 given up per millisecond of latency
+        random_state (int): Seed of the sampling and row order
+
+    Returns:
+        dict: "params" and "summary" of the winner, its "model" fitted on
+        every row, and the "rounds" with the rows and candidates of each
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    candidates = min(candidates, len(ParameterGrid(parameter_space)))
+    parameter_sets = list(
+        ParameterSampler(parameter_space, candidates, random_state=random_state)
+    )
+    num_rounds = _num_rounds(len(parameter_sets), eta)
+    round_rows = _round_rows(len(targets), num_rounds, eta, min_rows=folds * 4)
+    row_order = np.random.default_rng(random_state).permutation(len(targets))
+    rounds = []
+    with training_pool(features, targets, workers) as (pool, directory):
+        for rows in round_rows:
+            subset = row_order[:rows]
+            jobs = []
+            for params in parameter_sets:
+                candidate = model.untrained_copy()
+                candidate.model.set_params(**params)
+                jobs.append(
+                    [
+                        pool.submit(
+                            fit_fold,
+                            candidate,
+                            directory,
+                            subset[train_index],
+                            subset[test_index],
+                        )
+                        for train_index, test_index in fold_indices(rows, folds)
+                    ]
+                )
+            results = []
+            for params, fold_jobs in zip(parameter_sets, jobs):
+                summary = summarize_folds([job.result() for job in fold_jobs])
+                summary["objective"] = objective(summary, latency_weight)
+                results.append({"params": params, **summary})
+            results.sort(key=lambda result: result["objective"], reverse=True)
+            rounds.append({"rows": rows, "candidates": results})
+            parameter_sets = [
+                result["params"] for result in results[: max(1, len(results) // eta)]
+            ]
+        best = rounds[-1]["candidates"][0]
+        winner = model.untrained_copy()
+        winner.model.set_params(**best["params"])
+        winner = pool.submit(fit_full, winner, directory).result()
+    return {
+        "params": best["params"],
+        "summary": {key: value for key, value in best.items() if key != "params"},
+        "model": winner,
+        "rounds": rounds,
+    }
+
+
+def tune_registry(
+    model_names=None, data_path=DATA_PATH, publish=True, store=ARTIFACT_STORE, **kwargs
+):
+    """
+    Tune registered models, then register and optionally publish each winner.
+
+    Args:
+        model_names (list): Registry names to tune; all with a parameter space
+            by default
+        data_path (str): CSV file or database URL read by DataProcessor
+        publish (bool): Store each winner as the latest artifact of its name
+        store (ArtifactStore): Store the winners are published to
+        **kwargs: Passed on to successive_halving
+
+    Returns:
+        dict: Model name to its winning parameters, summary and rounds
+    """
+    registry = get_registry()
+    if model_names is None:
+        model_names = [
+            name
+            for name in registry.list_available_models()
+            if name in PARAMETER_SPACES
+        ]
+    features, targets = DataProcessor(data_path).prepare_dataset()
+    training_data_hash = data_hash(features, targets)
+    report = {}
+    for name in model_names:
+        if name not in PARAMETER_SPACES:
+            raise ValueError(f"Model {name} has no parameter space")
+        result = successive_halving(
+            registry.get_model(name),
+            PARAMETER_SPACES[name],
+            features,
+            targets,
+            **kwargs,
+        )
+        model, manifest = result.pop("model"), None
+        if publish:
+            manifest = store.put(
+                name,
+                model,
+                training_data_hash,
+                metrics=result["summary"],
+                params=result["params"],
+            )
+            result["published"] = manifest["version"]
+        registry.register_model(name, model, manifest)
+        report[name] = result
+    return report
+
+
+def main():
+    """
+    Tune the registered models and publish the winners.
+    Run from the repository root with python -m app.ml.tuning.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("models", nargs="*", help="Registry names; all by default")
+    parser.add_argument(
+        "--data", default=DATA_PATH, help="Training CSV file or database URL"
+    )
+    parser.add_argument("--candidates", type=int, default=16)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--workers", type=int, default=TRAINING_WORKERS)
+    parser.add_argument("--latency-weight", type=float, default=LATENCY_WEIGHT)
+    parser.add_argument("--no-publish", action="store_true", help="Only report")
+    args = parser.parse_args()
+    report = tune_registry(
+        args.models or None,
+        args.data,
+        publish=not args.no_publish,
+        candidates=args.candidates,
+        eta=args.eta,
+        folds=args.folds,
+        workers=args.workers,
+        latency_weight=args.latency_weight,
+    )
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
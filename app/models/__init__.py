@@ -6,5 +6,7 @@ Database models package for the Common Assessment Tool.
 from app.models.user import User
 from app.models.client import Client
 from app.models.relationships import ClientCase
+from app.models.recommendation import ClientRecommendation
+from app.models.training_outcome import TrainingOutcome
 
-__all__ = ["User", "Client", "ClientCase"]
+__all__ = ["User", "Client", "ClientCase", "ClientRecommendation", "TrainingOutcome"]
@@ -54,6 +54,9 @@ class Client(Base):
     need_mental_health_support_bool = Column(Boolean)
 
     cases = relationship("ClientCase", back_populates="client")
+    recommendation = relationship(
+        "ClientRecommendation", back_populates="client", uselist=False
+    )
 
     # Apply constraints
     __table_args__ = (
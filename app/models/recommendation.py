@@ -0,0 +1,29 @@
+# app/models/recommendation.py
+"""
+Recommendation models for the Common Assessment Tool.
+Contains the stored model recommendations of each client.
+"""
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class ClientRecommendation(Base):
+    """
+    Represents the latest model recommendation for a Client.
+    Stores the baseline success rate and the best intervention combinations,
+    so list views can read them instead of running the model.
+    """
+
+    __tablename__ = "client_recommendations"
+
+    client_id = Column(Integer, ForeignKey("clients.id"), primary_key=True)
+    baseline = Column(Float, nullable=False)
+    # List of [predicted success rate, [intervention names]] pairs, best last
+    interventions = Column(JSON, nullable=False)
+    model_version = Column(String(100), nullable=False, index=True)
+    updated_at = Column(DateTime, nullable=False)
+
+    client = relationship("Client", back_populates="recommendation")
@@ -0,0 +1,28 @@
+# app/models/training_outcome.py
+"""
+Training log models for the Common Assessment Tool.
+Contains the recorded case outcomes used to update the prediction models.
+"""
+
+from sqlalchemy import JSON, Column, DateTime, Integer
+
+from app.database import Base
+
+
+class TrainingOutcome(Base):
+    """
+    Represents one recorded case outcome in the append-only training log.
+    Stores the encoded features and interventions at the time of the outcome,
+    so the log stays usable after the client or case changes. Ids increase
+    with every outcome and mark how far each model has been updated.
+    """
+
+    __tablename__ = "training_outcomes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    client_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
+    # Feature values followed by intervention flags, in TRAINING_ENCODER order
+    features = Column(JSON, nullable=False)
+    success_rate = Column(Integer, nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
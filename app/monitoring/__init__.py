@@ -0,0 +1,8 @@
+# app/monitoring/__init__.py
+"""
+Monitoring package: in-process metrics and the endpoint exposing them.
+"""
+from app.monitoring.metrics import METRICS, Histogram, MetricsRegistry
+from app.monitoring.timing import stage
+
+__all__ = ["METRICS", "Histogram", "MetricsRegistry", "stage"]
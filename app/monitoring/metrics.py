@@ -0,0 +1,121 @@
+# app/monitoring/metrics.py
+"""
+Lightweight in-process metrics.
+Histograms use fixed bucket bounds so recording is a lock plus a bisect.
+"""
+import bisect
+import threading
+
+# Bucket upper bounds in seconds, from 100 microseconds to 10 seconds
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Thread-safe histogram over fixed bucket bounds."""
+
+    def __init__(self, name, buckets=LATENCY_BUCKETS, description=""):
+        """Initialize with sorted bucket upper bounds; larger values overflow."""
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def quantile(self, fraction):
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        with self._lock:
+            counts, total, largest = list(self._counts), self._count, self._max
+        if total == 0:
+            return None
+        rank = fraction * total
+        seen = 0
+        for bound, count in zip(self.buckets + (largest,), counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, largest)
+        return largest
+
+    def snapshot(self):
+        """Return the counts, sum and quantile estimates of the histogram."""
+        with self._lock:
+            counts, total, value_sum = list(self._counts), self._count, self._sum
+        return {
+            "description": self.description,
+            "count": total,
+            "sum": value_sum,
+            "mean": value_sum / total if total else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                **{str(bound): count for bound, count in zip(self.buckets, counts)},
+                "+Inf": counts[-1],
+            },
+        }
+
+
+class MetricsRegistry:
+    """Named histograms plus callbacks that report other components' stats."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._histograms = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS, description=""):
+        """Return the histogram with this name, creating it on first use."""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, buckets, description)
+            return self._histograms[name]
+
+    def register_collector(self, name, collect):
+        """Report the dict returned by collect() under name in snapshots."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self):
+        """Return every histogram and collector as a JSON-serializable dict."""
+        with self._lock:
+            histograms = dict(self._histograms)
+            collectors = dict(self._collectors)
+        return {
+            "histograms": {
+                name: histogram.snapshot() for name, histogram in histograms.items()
+            },
+            **{name: collect() for name, collect in collectors.items()},
+        }
+
+
+METRICS = MetricsRegistry()
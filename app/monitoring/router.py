@@ -0,0 +1,15 @@
+# app/monitoring/router.py
+"""
+Router exposing the in-process metrics.
+"""
+from fastapi import APIRouter
+
+from app.monitoring.metrics import METRICS
+
+router = APIRouter(prefix="/metrics", tags=["monitoring"])
+
+
+@router.get("", response_model=dict)
+async def get_metrics():
+    """Get every recorded histogram and component statistic."""
+    return METRICS.snapshot()
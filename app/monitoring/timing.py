@@ -0,0 +1,131 @@
+# app/monitoring/timing.py
+"""
+Stage-level timing spans for the prediction path.
+
+A span measures one stage with the monotonic clock. Spans recorded inside an
+executor job are collected with the job's result and reported by the process
+that submitted it, so stages timed in CPU worker processes still reach the
+server's histograms. Each stage is aggregated into a "stage_<name>_seconds"
+histogram and, while a request is being traced, added to that request's
+totals for its Server-Timing header. With STAGE_TIMING=0 spans do nothing;
+with SERVER_TIMING_HEADER=1 responses carry the header.
+"""
+import contextvars
+import os
+import threading
+import time
+from typing import Dict
+
+from app.monitoring.metrics import METRICS, Histogram
+
+STAGE_TIMING_ENABLED = os.environ.get("STAGE_TIMING", "1") != "0"
+SERVER_TIMING_HEADER = (
+    STAGE_TIMING_ENABLED and os.environ.get("SERVER_TIMING_HEADER", "0") == "1"
+)
+
+# Stage totals of an executor job, set in the worker running it
+_job_stages = threading.local()
+# Stage totals of the request being served, for its Server-Timing header
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+# Stage name to its histogram
+_histograms: Dict[str, Histogram] = {}
+
+
+class _Span:
+    """Times one stage and reports it on exit."""
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        stages = getattr(_job_stages, "stages", None)
+        if stages is None:
+            record_stages({self.name: elapsed})
+        else:
+            stages[self.name] = stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _NullSpan:
+    """Span used while stage timing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def stage(name):
+    """Return a context manager timing the stage called name."""
+    return _Span(name) if STAGE_TIMING_ENABLED else _NULL_SPAN
+
+
+def collect_stages(func):
+    """
+    Run func, holding back the stages it times instead of reporting them.
+
+    Args:
+        func (callable): Function called without arguments
+
+    Returns:
+        tuple: The result of func and its stage totals in seconds
+    """
+    previous = getattr(_job_stages, "stages", None)
+    _job_stages.stages = {}
+    try:
+        result = func()
+        return result, _job_stages.stages
+    finally:
+        _job_stages.stages = previous
+
+
+def _stage_histogram(name):
+    """Return the histogram of a stage, looked up in METRICS once."""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = METRICS.histogram(
+            f"stage_{name}_seconds", description=f"Time spent in the {name} stage"
+        )
+    return histogram
+
+
+def record_stages(stages):
+    """Add stage totals to the histograms and to the traced request."""
+    for name, seconds in stages.items():
+        _stage_histogram(name).observe(seconds)
+    add_request_stages(stages)
+
+
+def add_request_stages(stages):
+    """Add stage totals to the traced request only, e.g. a shared batch's."""
+    request_stages = _request_stages.get()
+    if request_stages is not None:
+        for name, seconds in stages.items():
+            request_stages[name] = request_stages.get(name, 0.0) + seconds
+
+
+def start_request_trace():
+    """Start collecting the stages of the current request and return them."""
+    stages = {}
+    _request_stages.set(stages)
+    return stages
+
+
+def server_timing_header(stages):
+    """Format stage totals as a Server-Timing header value in milliseconds."""
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages.items()
+    )
@@ -19,6 +19,35 @@ MAX_INCOME_SOURCE = 11
 MIN_SUCCESS_RATE = 0
 MAX_SUCCESS_RATE = 100
 
+# Valid range of every client feature, as used by the database constraints;
+# None marks a bound that is left open. Boolean features range over 0 and 1.
+FEATURE_BOUNDS = {
+    "age": (MIN_AGE, None),
+    "gender": (min(GENDER_VALUES), max(GENDER_VALUES)),
+    "work_experience": (0, None),
+    "canada_workex": (0, None),
+    "dep_num": (0, None),
+    "canada_born": (0, 1),
+    "citizen_status": (0, 1),
+    "level_of_schooling": (MIN_SCHOOLING_LEVEL, MAX_SCHOOLING_LEVEL),
+    "fluent_english": (0, 1),
+    "reading_english_scale": (MIN_SCALE_VALUE, MAX_SCALE_VALUE),
+    "speaking_english_scale": (MIN_SCALE_VALUE, MAX_SCALE_VALUE),
+    "writing_english_scale": (MIN_SCALE_VALUE, MAX_SCALE_VALUE),
+    "numeracy_scale": (MIN_SCALE_VALUE, MAX_SCALE_VALUE),
+    "computer_scale": (MIN_SCALE_VALUE, MAX_SCALE_VALUE),
+    "transportation_bool": (0, 1),
+    "caregiver_bool": (0, 1),
+    "housing": (MIN_HOUSING_LEVEL, MAX_HOUSING_LEVEL),
+    "income_source": (MIN_INCOME_SOURCE, MAX_INCOME_SOURCE),
+    "felony_bool": (0, 1),
+    "attending_school": (0, 1),
+    "currently_employed": (0, 1),
+    "substance_use": (0, 1),
+    "time_unemployed": (0, None),
+    "need_mental_health_support_bool": (0, 1),
+}
+
 
 # Constraint creation functions
 def age_constraint():
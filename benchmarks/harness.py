@@ -0,0 +1,140 @@
+# benchmarks/harness.py
+"""
+Timing harness and regression gate for the benchmark suite.
+
+Each case is timed over repeated calls to record latency percentiles and
+throughput, then run once more under tracemalloc to record its peak memory.
+Results are written to, and compared against, a machine-readable JSON baseline.
+"""
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+# Metrics compared against the baseline, with the absolute change each may
+# make regardless of the threshold so that tiny cases do not fail on noise.
+# Tail percentiles are reported only: they are too noisy to gate on.
+GATED_METRICS = {"p50_ms": 0.05, "peak_memory_kb": 64.0}
+
+
+def measure(func, batch_size, min_repeats=5, max_repeats=200, min_seconds=0.5):
+    """
+    Time repeated calls of func.
+
+    Args:
+        func (callable): Benchmark body, called without arguments
+        batch_size (int): Items processed per call, used for throughput
+        min_repeats (int): Fewest timed calls
+        max_repeats (int): Most timed calls
+        min_seconds (float): Keep calling until this much time was measured
+
+    Returns:
+        dict: Latency percentiles in milliseconds, throughput in items per
+        second, peak traced memory in KiB and the number of timed calls
+    """
+    func()
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_repeats and (
+        len(latencies) < min_repeats or time.perf_counter() - started < min_seconds
+    ):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000.0
+    return {
+        "batch_size": batch_size,
+        "min_ms": round(min(latencies) * 1000.0, 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "throughput_per_s": round(batch_size / (p50 / 1000.0), 1),
+        "peak_memory_kb": round(peak / 1024.0, 1),
+        "repeats": len(latencies),
+    }
+
+
+def environment():
+    """Describe the interpreter and libraries the results were recorded with."""
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def save_results(path, results):
+    """Write results with their environment as a JSON baseline."""
+    with open(path, "w") as baseline_file:
+        json.dump(
+            {"environment": environment(), "results": results},
+            baseline_file,
+            indent=2,
+            sort_keys=True,
+        )
+        baseline_file.write("\n")
+
+
+def load_results(path):
+    """Read the results of a JSON baseline."""
+    with open(path) as baseline_file:
+        return json.load(baseline_file)["results"]
+
+
+def best_of(results, retry):
+    """Keep, per case, the measurement with the lower median latency."""
+    return {
+        name: min(metrics, retry.get(name, metrics), key=lambda run: run["p50_ms"])
+        for name, metrics in results.items()
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Find the gated metrics that got worse than the baseline allows.
+
+    Args:
+        results (dict): Case name to measured metrics
+        baseline (dict): Case name to baseline metrics
+        threshold (float): Allowed relative increase, e.g. 0.25 for 25%
+
+    Returns:
+        list: (case name, message) per regression or case missing from the
+        baseline, empty when the run passes
+    """
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        if name not in baseline:
+            regressions.append(
+                (name, f"{name}: no baseline; record one with --update-baseline")
+            )
+            continue
+        for metric, slack in GATED_METRICS.items():
+            allowed = max(
+                baseline[name][metric] * (1.0 + threshold),
+                baseline[name][metric] + slack,
+            )
+            if metrics[metric] > allowed:
+                regressions.append(
+                    (
+                        name,
+                        f"{name}: {metric} {metrics[metric]} exceeds baseline "
+                        f"{baseline[name][metric]} by more than {threshold:.0%}",
+                    )
+                )
+    return regressions
@@ -0,0 +1,142 @@
+# benchmarks/model_comparison.py
+"""
+Comparison report of the tree ensembles in the registry.
+
+Cross-validates RandomForest, GradientBoosting and HistGradientBoosting on
+the training data, then refits each on every row and stores it as the
+registry would. For each model it reports R^2 and MAE, fit time per fold,
+the 128-row predict latency of the fitted estimator and of the stored
+artifact, and the artifact size. Run from the repository root:
+
+    python -m benchmarks.model_comparison
+    python -m benchmarks.model_comparison --data sqlite:///./sql_app.db
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.ml import get_registry
+from app.ml.data_processor import DataProcessor
+from app.ml.training import (
+    CV_FOLDS,
+    DATA_PATH,
+    LATENCY_REPEATS,
+    LATENCY_ROWS,
+    TRAINING_WORKERS,
+    cross_validate_models,
+)
+
+MODEL_NAMES = ("RandomForest", "GradientBoosting", "HistGradientBoosting")
+# Report columns: key, heading and format
+COLUMNS = (
+    ("r2_mean", "R^2", "{:.3f}"),
+    ("mae_mean", "MAE", "{:.2f}"),
+    ("fit_seconds", "fit s", "{:.3f}"),
+    ("latency_ms", "128-row ms", "{:.3f}"),
+    ("artifact_latency_ms", "stored ms", "{:.3f}"),
+    ("artifact_kb", "artifact KB", "{:.1f}"),
+)
+
+
+def artifact_stats(model, features):
+    """
+    Store a fitted model with save_arrays and time the reloaded artifact.
+
+    Returns:
+        dict: Size of the stored files and the best LATENCY_ROWS-row predict
+        latency of the model loaded from them
+    """
+    rows = np.resize(features, (LATENCY_ROWS, features.shape[1]))
+    with tempfile.TemporaryDirectory(prefix="comparison-") as scratch:
+        directory = os.path.join(scratch, "model")
+        model.save_arrays(directory)
+        size = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        )
+        loaded = type(model).load_arrays(directory)
+        latencies = []
+        for _ in range(LATENCY_REPEATS):
+            started = time.perf_counter()
+            loaded.predict(rows)
+            latencies.append(time.perf_counter() - started)
+    return {"artifact_kb": size / 1024, "artifact_latency_ms": min(latencies) * 1000}
+
+
+def compare_models(
+    model_names=MODEL_NAMES,
+    data_path=DATA_PATH,
+    folds=CV_FOLDS,
+    workers=TRAINING_WORKERS,
+):
+    """
+    Cross-validate and store the given registry models on one dataset.
+
+    Args:
+        model_names (tuple): Registry names to compare
+        data_path (str): CSV file or database URL read by DataProcessor
+        folds (int): Cross-validation folds
+        workers (int): Worker processes
+
+    Returns:
+        dict: Number of rows and, per model, its fold summary with the
+        artifact size and latency and, for boosting, the iterations fitted
+    """
+    registry = get_registry()
+    models = {name: registry.get_model(name) for name in model_names}
+    features, targets = DataProcessor(data_path).prepare_dataset()
+    report = cross_validate_models(
+        models, features, targets, folds=folds, workers=workers, refit=True
+    )
+    results = {}
+    for name, model in report.pop("fitted").items():
+        results[name] = {
+            **report["models"][name],
+            **artifact_stats(model, np.asarray(features)),
+        }
+        iterations = getattr(model.model, "n_iter_", None)
+        if iterations is not None:
+            results[name]["iterations"] = int(iterations)
+    return {"rows": len(targets), "models": results}
+
+
+def format_table(report):
+    """Render a comparison report as a plain-text table."""
+    headings = ["model"] + [heading for _, heading, _ in COLUMNS]
+    lines = [headings]
+    for name, result in report["models"].items():
+        lines.append([name] + [form.format(result[key]) for key, _, form in COLUMNS])
+    widths = [max(len(line[index]) for line in lines) for index in range(len(headings))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(line, widths))
+        for line in lines
+    )
+
+
+def main():
+    """Print the comparison report of the tree ensembles."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("models", nargs="*", help="Registry names to compare")
+    parser.add_argument(
+        "--data", default=DATA_PATH, help="Training CSV file or database URL"
+    )
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--workers", type=int, default=TRAINING_WORKERS)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+    report = compare_models(
+        tuple(args.models) or MODEL_NAMES, args.data, args.folds, args.workers
+    )
+    print(f"{report['rows']} rows, {args.folds}-fold cross-validation")
+    print(format_table(report))
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# benchmarks/prediction_path.py
+"""
+Benchmarks of the prediction path.
+
+Covers input cleaning, intervention matrix construction, end-to-end scoring
+and the predict method of every model in the registry, at batch sizes of 1,
+128 and 10k. Run from the repository root:
+
+    python -m benchmarks.prediction_path                    # compare to baseline
+    python -m benchmarks.prediction_path --update-baseline  # record a baseline
+
+The run fails when a gated metric regresses by more than --threshold.
+"""
+import argparse
+import os
+import random
+import sys
+import warnings
+
+import numpy as np
+
+from app.clients.service import logic
+from app.ml import get_registry
+from app.ml.data_processor import DataProcessor
+from app.ml.feature_encoder import (
+    HOUSING_LABELS,
+    INCOME_SOURCE_LABELS,
+    SCHOOLING_LABELS,
+)
+from benchmarks.harness import best_of, compare, load_results, measure, save_results
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+DATA_PATH = os.path.join(
+    BENCHMARK_DIR, os.pardir, "app", "clients", "service", "data_commontool.csv"
+)
+BATCH_SIZES = (1, 128, 10000)
+# End-to-end scoring covers 128 combinations per client, so 10k clients
+# would score 1.28M rows per call; it stops at 128 clients
+SCORING_BATCH_SIZES = (1, 128)
+DEFAULT_THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", "0.25"))
+
+
+def make_payloads(count, seed=0):
+    """Generate reproducible assessment payloads as the front end sends them."""
+    rng = random.Random(seed)
+    answers = ["Yes", "No"]
+    return [
+        {
+            "age": rng.randint(18, 70),
+            "gender": rng.choice(["1", "2"]),
+            "work_experience": rng.randint(0, 30),
+            "canada_workex": rng.randint(0, 20),
+            "dep_num": rng.randint(0, 5),
+            "canada_born": rng.choice(answers),
+            "citizen_status": rng.choice(answers),
+            "level_of_schooling": rng.choice(list(SCHOOLING_LABELS)),
+            "fluent_english": rng.choice(answers),
+            "reading_english_scale": rng.randint(0, 10),
+            "speaking_english_scale": rng.randint(0, 10),
+            "writing_english_scale": rng.randint(0, 10),
+            "numeracy_scale": rng.randint(0, 10),
+            "computer_scale": rng.randint(0, 10),
+            "transportation_bool": rng.choice(answers),
+            "caregiver_bool": rng.choice(answers),
+            "housing": rng.choice(list(HOUSING_LABELS)),
+            "income_source": rng.choice(list(INCOME_SOURCE_LABELS)),
+            "felony_bool": rng.choice(answers),
+            "attending_school": rng.choice(answers),
+            "currently_employed": rng.choice(answers),
+            "substance_use": rng.choice(answers),
+            "time_unemployed": rng.randint(0, 36),
+            "need_mental_health_support_bool": rng.choice(answers),
+        }
+        for _ in range(count)
+    ]
+
+
+def uncached(func, *args):
+    """Wrap a scoring call so that every call misses the prediction cache."""
+
+    def call():
+        logic.PREDICTION_CACHE.clear()
+        return func(*args)
+
+    return call
+
+
+def benchmark_cases():
+    """
+    List the benchmark cases.
+
+    Returns:
+        list: (name, batch size, callable) tuples
+    """
+    payloads = make_payloads(max(BATCH_SIZES))
+    raw_rows = logic.clean_input_batch(payloads)
+    cases = [("clean_input_data[1]", 1, lambda: logic.clean_input_data(payloads[0]))]
+    cases += [
+        (
+            f"clean_input_batch[{size}]",
+            size,
+            lambda size=size: logic.clean_input_batch(payloads[:size]),
+        )
+        for size in BATCH_SIZES[1:]
+    ]
+    cases.append(("create_matrix[1]", 1, lambda: logic.create_matrix(raw_rows[0])))
+    cases.append(
+        (
+            "create_batch_matrix[128]",
+            128,
+            lambda: logic.create_batch_matrix(raw_rows[:128]),
+        )
+    )
+    cases.append(
+        (
+            "interpret_and_calculate[1]",
+            1,
+            uncached(logic.interpret_and_calculate, payloads[0]),
+        )
+    )
+    cases += [
+        (
+            f"interpret_and_calculate_batch[{size}]",
+            size,
+            uncached(logic.interpret_and_calculate_batch, payloads[:size]),
+        )
+        for size in SCORING_BATCH_SIZES
+    ]
+
+    features_train, _, targets_train, _ = DataProcessor(
+        DATA_PATH
+    ).prepare_training_data()
+    rows = np.random.default_rng(0).choice(features_train, size=max(BATCH_SIZES))
+    registry = get_registry()
+    for model_name in registry.list_available_models():
+        model = registry.get_model(model_name)
+        if not getattr(model, "is_trained", False):
+            model.train(features_train, targets_train)
+        cases += [
+            (
+                f"predict/{model_name}[{size}]",
+                size,
+                lambda model=model, size=size: model.predict(rows[:size]),
+            )
+            for size in BATCH_SIZES
+        ]
+    return cases
+
+
+def run(selected=None, names=None):
+    """
+    Measure every benchmark case.
+
+    Args:
+        selected (str): Only run cases whose name contains this text
+        names (set): Only run the cases with these exact names
+
+    Returns:
+        dict: Case name to measured metrics
+    """
+    logic.warmup()
+    results = {}
+    for name, batch_size, func in benchmark_cases():
+        if (selected and selected not in name) or (names and name not in names):
+            continue
+        results[name] = measure(func, batch_size)
+        metrics = results[name]
+        print(
+            f"{name:45s} p50 {metrics['p50_ms']:9.3f} ms  "
+            f"p95 {metrics['p95_ms']:9.3f} ms  p99 {metrics['p99_ms']:9.3f} ms  "
+            f"{metrics['throughput_per_s']:12.1f}/s  "
+            f"peak {metrics['peak_memory_kb']:10.1f} KiB"
+        )
+    return results
+
+
+def main(argv=None):
+    """Run the suite and compare it to, or store it as, the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--output", help="Also write this run's results here")
+    parser.add_argument("-k", dest="selected", help="Only run matching cases")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", module="sklearn")
+    results = run(args.selected)
+    if args.update_baseline:
+        save_results(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline")
+        return 1
+    baseline = load_results(args.baseline)
+    regressions = compare(results, baseline, args.threshold)
+    regressed = {name for name, _ in regressions if name in baseline}
+    if regressed:
+        # Measure regressed cases once more so that a noisy moment on the
+        # machine does not fail the run on its own
+        print("Re-measuring regressed cases")
+        retry = run(names=regressed)
+        results = best_of(results, retry)
+        regressions = compare(results, baseline, args.threshold)
+    for _, message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+    if args.output:
+        save_results(args.output, results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
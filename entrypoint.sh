@@ -8,6 +8,20 @@ sleep 10  # This is a simple sleep; in a production scenario, use a loop with ch
 echo "Initializing data..."
 python initialize_data.py
 
+# Export the prediction model to memory-mapped arrays shared by all workers
+echo "Exporting model arrays..."
+python -c "from app.clients.service.logic import export_model_arrays; export_model_arrays()"
+
+# Train and store the registry models once; later starts load the artifacts
+if [ ! -d "${MODEL_ARTIFACTS_DIR:-app/ml/artifacts}" ]; then
+    echo "Publishing model artifacts..."
+    python -m app.ml.training --publish
+fi
+
+# Score every client without an up-to-date stored recommendation
+echo "Backfilling client recommendations..."
+python -m app.clients.service.recommendations
+
 # Start the main application
 echo "Starting the application..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
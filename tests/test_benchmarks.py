@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.ml.models import HistGradientBoostingModel
+from benchmarks.harness import best_of, compare, measure
+from benchmarks.model_comparison import artifact_stats, format_table
+
+
+def test_measure_reports_percentiles_and_memory():
+    """Test that a measurement records latency, throughput and memory"""
+    metrics = measure(lambda: bytearray(1 << 20), batch_size=4, max_repeats=10)
+    assert metrics["p50_ms"] <= metrics["p95_ms"] <= metrics["p99_ms"]
+    assert metrics["throughput_per_s"] > 0
+    assert metrics["peak_memory_kb"] >= 1024
+    assert 5 <= metrics["repeats"] <= 10
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    """Test the regression gate, which also fails cases without a baseline"""
+    baseline = {
+        "fast": {"p50_ms": 10.0, "peak_memory_kb": 1000.0},
+        "lean": {"p50_ms": 10.0, "peak_memory_kb": 1000.0},
+    }
+    results = {
+        "fast": {"p50_ms": 14.0, "peak_memory_kb": 1000.0},
+        "lean": {"p50_ms": 11.0, "peak_memory_kb": 2000.0},
+        "new": {"p50_ms": 99.0, "peak_memory_kb": 99.0},
+    }
+    regressions = compare(results, baseline, threshold=0.25)
+    assert [name for name, _ in regressions] == ["fast", "lean", "new"]
+    assert "peak_memory_kb" in regressions[1][1]
+    assert "no baseline" in regressions[2][1]
+    assert [name for name, _ in compare(results, baseline, threshold=1.5)] == ["new"]
+    retry = {"fast": {"p50_ms": 12.0, "peak_memory_kb": 1000.0}}
+    assert compare(best_of(results, retry), baseline, threshold=0.25)[0][0] == "lean"
+
+
+def test_model_comparison_reports_artifact_size_and_latency():
+    """Test the stored-artifact measurements and the comparison table"""
+    rng = np.random.default_rng(0)
+    features = rng.integers(0, 10, size=(100, 31)).astype(np.float32)
+    model = HistGradientBoostingModel(max_iter=10).train(features, features[:, 0])
+    stats = artifact_stats(model, features)
+    assert stats["artifact_kb"] > 0 and stats["artifact_latency_ms"] > 0
+    summary = {"r2_mean": 0.5, "mae_mean": 1.0, "fit_seconds": 0.1, "latency_ms": 2}
+    table = format_table({"models": {"HistGradientBoosting": {**summary, **stats}}})
+    assert table.splitlines()[0].split()[:3] == ["model", "R^2", "MAE"]
+    assert table.splitlines()[1].split()[0] == "HistGradientBoosting"
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.executors import BoundedExecutor
+from app.monitoring import METRICS, stage
+from app.monitoring.timing import server_timing_header, start_request_trace
+
+
+def test_bounded_executor_rejects_beyond_queue_limit():
+    """Test that jobs beyond workers plus queue depth are rejected with 503"""
+    executor = BoundedExecutor("test", kind="thread", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run_jobs():
+        blocked = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as error:
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return error.value
+
+    try:
+        error = asyncio.run(run_jobs())
+    finally:
+        executor.shutdown()
+    assert error.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    stats = executor.stats()
+    assert (stats["completed"], stats["rejected"], stats["in_flight"]) == (2, 1, 0)
+    assert executor.run_times.snapshot()["count"] == 2
+
+
+def test_executor_reports_stages_timed_in_workers():
+    """Test that stages timed in a job reach the histograms and request trace"""
+    executor = BoundedExecutor("stage_test", kind="thread", max_workers=1, max_queue=1)
+
+    def job():
+        with stage("executor_test"):
+            time.sleep(0.002)
+
+    async def traced_request():
+        stages = start_request_trace()
+        await executor.run(job)
+        return stages
+
+    try:
+        stages = asyncio.run(traced_request())
+    finally:
+        executor.shutdown()
+    assert stages["executor_test"] >= 0.002
+    assert server_timing_header(stages).startswith("executor_test;dur=")
+    histogram = METRICS.histogram("stage_executor_test_seconds")
+    assert histogram.snapshot()["count"] == 1
+
+
+def test_process_executor_recovers_from_a_dead_worker():
+    """Test that a worker exiting breaks one job with 503, not the pool"""
+    executor = BoundedExecutor(
+        "broken_test", kind="process", max_workers=1, max_queue=1
+    )
+
+    async def run_jobs():
+        with pytest.raises(HTTPException) as error:
+            await executor.run(os._exit, 1)
+        return error.value, await executor.run(abs, -3)
+
+    try:
+        error, result = asyncio.run(run_jobs())
+    finally:
+        executor.shutdown()
+    assert error.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert result == 3
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["restarts"]) == (1, 1, 2)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.feature_encoder import FEATURE_COLUMNS, FEATURE_ENCODER
+from tests.test_predictions import PREDICTION_PAYLOAD, make_payload
+
+
+def test_batch_encoding_matches_single_records():
+    """Test that payloads, records and DataFrames encode to the same features"""
+    payloads = [
+        PREDICTION_PAYLOAD,
+        make_payload(housing="Homeowner", level_of_schooling="Post graduate"),
+        make_payload(income_source="8", canada_born="", age=61),
+        make_payload(age="25.1", time_unemployed=0.3),
+    ]
+    features = FEATURE_ENCODER.encode(payloads)
+    assert features.dtype == np.float32 and features.flags.c_contiguous
+    # Compared as Python floats, since these become the prediction cache keys
+    assert features.tolist() == [
+        FEATURE_ENCODER.encode_record(payload) for payload in payloads
+    ]
+    np.testing.assert_array_equal(
+        FEATURE_ENCODER.encode(pd.DataFrame(payloads)[list(FEATURE_COLUMNS)]),
+        features,
+    )
+    assert features[1, FEATURE_COLUMNS.index("housing")] == 4
+    assert features[2, FEATURE_COLUMNS.index("canada_born")] == 0
+
+
+def test_labels_are_only_accepted_in_their_column():
+    """Test that a label of one column is rejected in another"""
+    with pytest.raises(ValueError, match="level_of_schooling"):
+        FEATURE_ENCODER.encode([make_payload(level_of_schooling="Homeowner")])
+    with pytest.raises(ValueError, match="housing"):
+        FEATURE_ENCODER.encode_record(make_payload(housing="Post graduate"))
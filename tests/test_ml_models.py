@@ -0,0 +1,311 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import status
+from sklearn.model_selection import train_test_split
+
+from app.ml.models import (
+    GradientBoostingModel,
+    HistGradientBoostingModel,
+    LinearRegressionModel,
+    RandomForestModel,
+    SGDRegressionModel,
+)
+from app.ml.training import cross_validate_models
+from app.ml import get_registry
+from app.ml.artifact_store import ArtifactStore, data_hash
+from app.ml.data_cache import TrainingDataCache
+from app.ml.data_processor import DataProcessor
+from app.ml.feature_encoder import TARGET_COLUMN, TRAINING_ENCODER
+from app.ml.hot_swap import HotSwap
+from app.ml.out_of_core import holdout_chunks, streaming_scores
+from app.ml.sampling import reservoir_sample
+from app.ml.tuning import successive_halving
+
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(7)
+    features = rng.integers(0, 10, size=(200, 31)).astype(float)
+    targets = features[:, 0] * 3 + features[:, 24] * 10 + rng.normal(size=200)
+    return features, targets
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+@pytest.mark.parametrize(
+    "model_class",
+    [
+        RandomForestModel,
+        GradientBoostingModel,
+        LinearRegressionModel,
+        SGDRegressionModel,
+        HistGradientBoostingModel,
+    ],
+)
+def test_memory_mapped_arrays_round_trip(model_class, training_data, tmp_path):
+    """Test that models reload from memory-mapped arrays with identical output"""
+    features, targets = training_data
+    model = model_class().train(features, targets)
+    model.save_arrays(tmp_path / "arrays")
+    loaded = model_class.load_arrays(tmp_path / "arrays")
+    np.testing.assert_array_equal(loaded.predict(features), model.predict(features))
+
+
+def test_load_arrays_rejects_other_model(training_data, tmp_path):
+    """Test that arrays saved by one model cannot be loaded as another"""
+    RandomForestModel(n_estimators=5).train(*training_data).save_arrays(tmp_path)
+    with pytest.raises(ValueError):
+        GradientBoostingModel.load_arrays(tmp_path)
+
+
+def test_save_arrays_replaces_existing_model(training_data, tmp_path):
+    """Test that saving over a model swaps it in and leaves no other directories"""
+    features, targets = training_data
+    LinearRegressionModel().train(features, targets).save_arrays(tmp_path / "arrays")
+    model = RandomForestModel(n_estimators=5).train(features, targets)
+    model.save_arrays(tmp_path / "arrays")
+    loaded = RandomForestModel.load_arrays(tmp_path / "arrays")
+    np.testing.assert_array_equal(loaded.predict(features), model.predict(features))
+    assert [path.name for path in tmp_path.iterdir()] == ["arrays"]
+
+
+def test_save_arrays_requires_training(tmp_path):
+    """Test that an untrained model cannot be saved"""
+    with pytest.raises(ValueError):
+        LinearRegressionModel().save_arrays(tmp_path / "arrays")
+
+
+def test_cross_validation_reports_every_model(training_data):
+    """Test that parallel cross-validation scores and refits every model"""
+    features, targets = training_data
+    models = {
+        "RandomForest": RandomForestModel(n_estimators=5),
+        "LinearRegression": LinearRegressionModel(),
+    }
+    report = cross_validate_models(models, features, targets, folds=3, refit=True)
+    assert set(report["models"]) == set(models)
+    for summary in report["models"].values():
+        assert summary["folds"] == 3
+        assert summary["fit_seconds"] > 0 and summary["predict_us_per_row"] > 0
+    assert report["models"]["LinearRegression"]["r2_mean"] > 0.9
+    fitted = report["fitted"]["LinearRegression"]
+    assert fitted.is_trained and not models["LinearRegression"].is_trained
+    assert fitted.predict(features[:2]).shape == (2,)
+
+
+def test_successive_halving_keeps_best_candidates(training_data):
+    """Test that each round keeps the best 1/eta candidates on more rows"""
+    features, targets = training_data
+    space = {"n_estimators": [2, 4, 8], "max_depth": [2, None]}
+    result = successive_halving(
+        RandomForestModel(), space, features, targets, candidates=6, eta=2, folds=2
+    )
+    rounds = result["rounds"]
+    assert [len(tuning_round["candidates"]) for tuning_round in rounds] == [6, 3]
+    assert [tuning_round["rows"] for tuning_round in rounds] == [100, 200]
+    assert result["params"] == rounds[-1]["candidates"][0]["params"]
+    assert (
+        result["model"].model.get_params()["max_depth"] == result["params"]["max_depth"]
+    )
+
+
+def test_artifact_store_versions_by_content(training_data, tmp_path):
+    """Test that artifacts are content-addressed and the latest one loads"""
+    features, targets = training_data
+    store = ArtifactStore(tmp_path)
+    first = RandomForestModel(n_estimators=3).train(features, targets)
+    manifest = store.put("RandomForest", first, data_hash(features, targets))
+    assert store.put("RandomForest", first)["version"] == manifest["version"]
+    second = RandomForestModel(n_estimators=4).train(features, targets)
+    newer = store.put("RandomForest", second, metrics={"r2_mean": 0.5})
+    assert store.latest_version("RandomForest") == newer["version"]
+    assert len(store.versions("RandomForest")) == 2
+    loaded, loaded_manifest = store.load("RandomForest", RandomForestModel)
+    assert loaded_manifest["metrics"] == {"r2_mean": 0.5}
+    np.testing.assert_array_equal(loaded.predict(features), second.predict(features))
+    store.set_latest("RandomForest", manifest["version"])
+    loaded, loaded_manifest = store.load("RandomForest", RandomForestModel)
+    assert loaded_manifest["training_data_hash"] == data_hash(features, targets)
+    np.testing.assert_array_equal(loaded.predict(features), first.predict(features))
+    with pytest.raises(ValueError):
+        store.load("GradientBoosting", GradientBoostingModel)
+
+
+def test_hot_swap_shadows_promotes_and_rolls_back(training_data, tmp_path):
+    """Test staging a stored model, shadow scoring it, swapping and rolling back"""
+    features, targets = training_data
+    registry = get_registry()
+    live = RandomForestModel(n_estimators=3).train(features, targets)
+    candidate = LinearRegressionModel().train(features, targets)
+    store = ArtifactStore(tmp_path)
+    manifest = store.put("LinearRegression", candidate)
+    hot_swap = HotSwap(store)
+    registry.swap_model("RandomForest", live)
+    try:
+        status = hot_swap.stage("LinearRegression", sample_rate=1.0)
+        assert status["staged"]["artifact_version"] == manifest["version"]
+        assert status["staged"]["warmup_latency_ms"] > 0
+        np.testing.assert_array_equal(
+            hot_swap.predict(features[:4]), live.predict(features[:4])
+        )
+        hot_swap.wait_for_shadow()
+        shadow = hot_swap.status()["staged"]["shadow"]
+        assert (shadow["requests"], shadow["rows"], shadow["errors"]) == (1, 4, 0)
+        hot_swap.promote()
+        assert registry.get_current_model_name() == "LinearRegression"
+        assert registry.get_manifest()["version"] == manifest["version"]
+        np.testing.assert_allclose(
+            hot_swap.predict(features[:4]), candidate.predict(features[:4])
+        )
+        assert hot_swap.rollback() == {"model_name": "RandomForest"}
+        assert registry.get_model() is live
+    finally:
+        registry.swap_model("LinearRegression", LinearRegressionModel())
+        registry.swap_model("RandomForest", RandomForestModel())
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("post", "/models/stage/LinearRegression"),
+        ("get", "/models/stage"),
+        ("delete", "/models/stage"),
+        ("post", "/models/promote"),
+        ("post", "/models/rollback"),
+    ],
+)
+def test_model_swap_routes_require_admin(client, case_worker_headers, method, path):
+    """Test that only admins can change which model is served"""
+    response = client.request(method, path)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    response = client.request(method, path, headers=case_worker_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_staged_model_status_for_admin(client, admin_headers):
+    """Test that an admin can read the staged model status"""
+    response = client.get("/models/stage", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert "current_model" in response.json()
+
+
+def test_training_data_cache_matches_split_and_tracks_source(tmp_path, monkeypatch):
+    """Test that cached training data matches the split and follows its CSV"""
+    rng = np.random.default_rng(3)
+    data = pd.DataFrame(
+        {column: rng.integers(0, 2, 50) for column in TRAINING_ENCODER.columns}
+    )
+    data["age"] = rng.integers(18, 65, 50)
+    data[TARGET_COLUMN] = rng.integers(0, 100, 50)
+    data.to_csv(tmp_path / "data.csv", index=False)
+    processor = DataProcessor(tmp_path / "data.csv", TrainingDataCache(tmp_path))
+
+    expected = train_test_split(
+        TRAINING_ENCODER.encode(data),
+        data[TARGET_COLUMN].to_numpy(float),
+        test_size=0.2,
+        random_state=42,
+    )
+    split = processor.prepare_training_data()
+    for array, expected_array in zip(split, expected):
+        assert isinstance(array, np.memmap)
+        np.testing.assert_array_equal(array, expected_array)
+
+    # A cache hit never parses the CSV
+    monkeypatch.setattr(pd, "read_csv", None)
+    np.testing.assert_array_equal(processor.prepare_training_data()[0], split[0])
+    monkeypatch.undo()
+
+    data.loc[0, TARGET_COLUMN] = -1
+    data.to_csv(tmp_path / "data.csv", index=False)
+    features, targets = processor.prepare_dataset()
+    assert -1 in targets
+    assert len([path for path in tmp_path.iterdir() if path.is_dir()]) == 2
+
+
+def test_out_of_core_training_streams_chunks(training_data, tmp_path):
+    """Test chunked training: incremental SGD and bounded reservoir samples"""
+    features, targets = training_data
+
+    def make_chunks():
+        return holdout_chunks(
+            (features[start : start + 30], targets[start : start + 30])
+            for start in range(0, len(targets), 30)
+        )
+
+    model = SGDRegressionModel().train_chunks(make_chunks)
+    scores = streaming_scores(
+        model,
+        holdout_chunks([(features, targets)], holdout=True),
+    )
+    assert scores["rows"] == 40 and scores["r2"] > 0.8
+
+    model.save_arrays(tmp_path / "sgd")
+    loaded = SGDRegressionModel.load_arrays(tmp_path / "sgd").update(
+        features[:10], targets[:10]
+    )
+    model.update(features[:10], targets[:10])
+    np.testing.assert_allclose(loaded.predict(features), model.predict(features))
+
+    sample_features, sample_targets = reservoir_sample(make_chunks(), size=50)
+    assert sample_features.shape == (50, 31)
+    for row, target in zip(sample_features, sample_targets):
+        assert target in targets[(features == row).all(axis=1)]
+    assert len(reservoir_sample(make_chunks(), size=500)[1]) == 160
+
+
+def test_hist_gradient_boosting_stops_early_and_updates(training_data):
+    """Test early stopping and the residual update of histogram boosting"""
+    features, targets = training_data
+    model = HistGradientBoostingModel(max_iter=500).train(features, targets)
+    assert model.model.n_iter_ < 500
+    shifted = targets[:20] + 5
+    before = np.abs(model.predict(features[:20]) - shifted).mean()
+    model.update(features[:20], shifted)
+    after = np.abs(model.predict(features[:20]) - shifted).mean()
+    assert model.kernel is not None and after < before - 1
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        RandomForestModel(n_estimators=5),
+        GradientBoostingModel(n_estimators=20, learning_rate=0.03),
+        HistGradientBoostingModel(max_iter=20, learning_rate=0.03),
+    ],
+)
+def test_reloaded_model_updates_with_its_params(model, training_data, tmp_path):
+    """Test that an update after load_arrays fits with the stored params"""
+    features, targets = training_data
+    model.model.set_params(max_depth=3)
+    model.train(features, targets)
+    model.save_arrays(tmp_path / "arrays")
+    loaded = type(model).load_arrays(tmp_path / "arrays")
+    assert loaded.model.get_params() == model.model.get_params()
+
+    loaded.update(features[:50], targets[:50] + 5)
+    model.update(features[:50], targets[:50] + 5)
+    np.testing.assert_array_equal(loaded.predict(features), model.predict(features))
+
+
+def test_hist_gradient_boosting_kernel_matches_sklearn_exactly(tmp_path):
+    """Test kernel parity on continuous values near splits and on NaN inputs"""
+    rng = np.random.default_rng(5)
+    features = rng.normal(size=(400, 6))
+    features[rng.random(features.shape) < 0.1] = np.nan
+    targets = np.nan_to_num(features[:, 0]) * 40 + np.isnan(features[:, 1]) * 300
+    model = HistGradientBoostingModel(max_iter=30).train(features, targets)
+    model.save_arrays(tmp_path / "arrays")
+    loaded = HistGradientBoostingModel.load_arrays(tmp_path / "arrays")
+
+    # Inputs a float64 ulp either side of every split threshold
+    kernel = loaded.kernel
+    splits = kernel.left != np.arange(len(kernel.left))
+    probes = np.tile(np.nanmedian(features, axis=0), (2 * splits.sum(), 1))
+    for row, (feature, threshold) in enumerate(
+        zip(kernel.feature[splits], kernel.threshold[splits])
+    ):
+        probes[2 * row, feature] = threshold
+        probes[2 * row + 1, feature] = np.nextafter(threshold, np.inf)
+    probes = np.vstack((probes, features))
+    np.testing.assert_array_equal(loaded.predict(probes), model.predict(probes))
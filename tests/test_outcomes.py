@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.clients.service.outcomes import LOG_POSITION_FIELD, OutcomeService
+from app.ml import get_registry
+from app.ml.artifact_store import ArtifactStore
+from app.ml.models import (
+    LinearRegressionModel,
+    RandomForestModel,
+    SGDRegressionModel,
+)
+from app.ml.database_source import stream_training_data
+from app.ml.feature_encoder import (
+    FEATURE_COLUMNS,
+    INTERVENTION_COLUMNS,
+    TRAINING_ENCODER,
+)
+from app.models import ClientCase, TrainingOutcome
+
+
+def test_recorded_outcome_updates_models(client, admin_headers, test_db, tmp_path):
+    """Test that outcomes are logged and fed to models once, incrementally"""
+    response = client.put(
+        "/clients/1/services/1", json={"success_rate": 60}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    client.put(
+        "/clients/1/services/1",
+        json={"retention_services": True},
+        headers=admin_headers,
+    )
+    outcomes = test_db.query(TrainingOutcome).all()
+    assert [(outcome.client_id, outcome.success_rate) for outcome in outcomes] == [
+        (1, 60)
+    ]
+    assert len(outcomes[0].features) == 31
+    assert outcomes[0].features[0] == 25.0
+
+    rng = np.random.default_rng(3)
+    features, targets = rng.integers(0, 10, size=(50, 31)).astype(float), rng.random(50)
+    registry = get_registry()
+    registry.register_model(
+        "LinearRegression", LinearRegressionModel().train(features, targets)
+    )
+    store = ArtifactStore(tmp_path)
+    try:
+        report = OutcomeService.apply_updates(test_db, min_rows=1, store=store)
+        assert report["LinearRegression"]["rows"] == 1
+        assert report["RandomForest"] == {"skipped": "Model is not trained"}
+        manifest = registry.get_manifest("LinearRegression")
+        assert manifest[LOG_POSITION_FIELD] == outcomes[0].id
+        assert store.latest_version("LinearRegression") == manifest["version"]
+        expected = LinearRegressionModel().train(
+            np.vstack((features, outcomes[0].features)), np.append(targets, 60)
+        )
+        np.testing.assert_allclose(
+            registry.get_model("LinearRegression").predict(features),
+            expected.predict(features),
+        )
+        report = OutcomeService.apply_updates(test_db, min_rows=1, store=store)
+        assert report["LinearRegression"] == {"skipped": "0 new outcomes"}
+    finally:
+        registry.register_model("LinearRegression", LinearRegressionModel())
+
+
+def test_failed_update_leaves_the_registered_model(
+    client, admin_headers, test_db, tmp_path, monkeypatch
+):
+    """Test that a model updated in place is not changed when storing fails"""
+    client.put(
+        "/clients/1/services/1", json={"success_rate": 60}, headers=admin_headers
+    )
+    rng = np.random.default_rng(3)
+    features, targets = rng.integers(0, 10, size=(50, 31)).astype(float), rng.random(50)
+    registry = get_registry()
+    live = SGDRegressionModel().train(features, targets)
+    weights = live.model.coef_.copy()
+    registry.register_model("SGDRegression", live)
+    store = ArtifactStore(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "put", fail)
+    try:
+        with pytest.raises(OSError):
+            OutcomeService.apply_updates(test_db, min_rows=1, store=store)
+        assert registry.get_model("SGDRegression") is live
+        np.testing.assert_array_equal(live.model.coef_, weights)
+    finally:
+        registry.register_model("SGDRegression", SGDRegressionModel())
+
+
+def test_failed_outcome_log_rolls_back_the_update(
+    client, admin_headers, test_db, monkeypatch
+):
+    """Test that a failure logging the outcome leaves the case unchanged"""
+
+    def fail(*args):
+        raise RuntimeError("encoder unavailable")
+
+    monkeypatch.setattr(OutcomeService, "record_outcome", fail)
+    response = client.put(
+        "/clients/1/services/1", json={"success_rate": 40}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    test_db.expire_all()
+    case = test_db.query(ClientCase).filter_by(client_id=1, user_id=1).one()
+    assert case.success_rate != 40
+    assert test_db.query(TrainingOutcome).count() == 0
+
+
+def test_forest_update_adds_trees_for_new_rows():
+    """Test that a forest update fits new trees on the new rows only"""
+    rng = np.random.default_rng(5)
+    features = rng.integers(0, 10, size=(120, 31)).astype(float)
+    targets = features[:, 0] * 3 + rng.normal(size=120)
+    model = RandomForestModel(n_estimators=5).train(features[:100], targets[:100])
+    updated = model.update(features[100:], targets[100:], num_trees=3)
+    assert updated.kernel.num_trees == 8
+    new_trees = updated.kernel.predict_per_tree(features)[5:]
+    np.testing.assert_allclose(
+        updated.predict(features),
+        (model.model.predict(features) * 5 + new_trees.sum(axis=0)) / 8,
+    )
+
+
+def test_database_training_data_streams_cases(test_db):
+    """Test that cases with outcomes stream into the training arrays in chunks"""
+    cases = test_db.query(ClientCase).order_by(ClientCase.client_id).all()
+    expected = [
+        TRAINING_ENCODER.encode_record(
+            {
+                **{column: getattr(case.client, column) for column in FEATURE_COLUMNS},
+                **{
+                    column: getattr(case, column) or 0
+                    for column in INTERVENTION_COLUMNS
+                },
+            }
+        )
+        for case in cases
+    ]
+    features, targets = stream_training_data(test_db.get_bind(), chunk_rows=1)
+    assert features.dtype == np.float32
+    np.testing.assert_array_equal(features, np.array(expected, dtype=np.float32))
+    np.testing.assert_array_equal(targets, [case.success_rate for case in cases])
+
+
+def test_outcome_is_logged_with_the_case_update(
+    client, admin_headers, test_db, monkeypatch
+):
+    """Test that the outcome commits with the case, before the refresh runs"""
+
+    def fail(*args):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr("app.clients.service.recommendations.score_batch", fail)
+    response = client.put(
+        "/clients/1/services/1", json={"success_rate": 40}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    outcomes = test_db.query(TrainingOutcome).all()
+    assert [(outcome.client_id, outcome.success_rate) for outcome in outcomes] == [
+        (1, 40)
+    ]
@@ -0,0 +1,352 @@
+import asyncio
+from itertools import product
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.clients.service import logic
+from app.clients.service.batching import MicroBatcher
+from app.clients.service.intervention_search import InterventionSearch
+from app.clients.service.prediction_cache import PredictionCache
+from app.ml import get_registry
+from app.ml.forest_kernel import ForestKernel
+from app.ml.partial_eval import PartialEvaluator
+
+
+PREDICTION_PAYLOAD = {
+    "age": 23,
+    "gender": "1",
+    "work_experience": 1,
+    "canada_workex": 1,
+    "dep_num": 0,
+    "canada_born": "1",
+    "citizen_status": "2",
+    "level_of_schooling": "2",
+    "fluent_english": "3",
+    "reading_english_scale": 2,
+    "speaking_english_scale": 2,
+    "writing_english_scale": 3,
+    "numeracy_scale": 2,
+    "computer_scale": 3,
+    "transportation_bool": "2",
+    "caregiver_bool": "1",
+    "housing": "1",
+    "income_source": "5",
+    "felony_bool": "1",
+    "attending_school": "0",
+    "currently_employed": "1",
+    "substance_use": "1",
+    "time_unemployed": 1,
+    "need_mental_health_support_bool": "1",
+}
+
+
+def make_payload(**overrides):
+    payload = dict(PREDICTION_PAYLOAD)
+    payload.update(overrides)
+    return payload
+
+
+def test_batch_matches_single_client_scoring():
+    """Test that batch scoring returns the same results as one-by-one scoring"""
+    inputs = [make_payload(age=age, computer_scale=age % 10) for age in (20, 35, 61)]
+    batch_results = logic.interpret_and_calculate_batch(inputs)
+    assert len(batch_results) == len(inputs)
+    logic.PREDICTION_CACHE.clear()
+    for input_data, batch_result in zip(inputs, batch_results):
+        single_result = logic.interpret_and_calculate(input_data)
+        assert batch_result["baseline"] == single_result["baseline"]
+        np.testing.assert_array_equal(
+            [score for score, _ in batch_result["interventions"]],
+            [score for score, _ in single_result["interventions"]],
+        )
+
+
+def test_predict_batch_endpoint(client, case_worker_headers):
+    """Test scoring a caseload through the batch endpoint"""
+    response = client.post(
+        "/clients/predict/batch",
+        json={"clients": [make_payload(), make_payload(age=40)], "top_k": 5},
+        headers=case_worker_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert all(len(result["interventions"]) == 5 for result in results)
+    scores = [score for score, _ in results[0]["interventions"]]
+    assert scores == sorted(scores)
+
+
+def test_intervention_search_rejects_negative_costs(client, case_worker_headers):
+    """Test that a negative intervention cost is rejected"""
+    response = client.post(
+        "/clients/predict/search",
+        json={
+            "client": make_payload(),
+            "costs": [1, 1, 1, -1, 1, 1, 1],
+            "budget": 2,
+        },
+        headers=case_worker_headers,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_stage_timings_reach_metrics(client, case_worker_headers):
+    """Test that stages timed in the CPU workers are reported as histograms"""
+    response = client.post(
+        "/clients/predict/batch",
+        json={"clients": [make_payload(age=61), make_payload(age=62)], "top_k": 6},
+        headers=case_worker_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    histograms = client.get("/metrics").json()["histograms"]
+    for name in ("clean_input", "build_matrix", "predict", "select_top"):
+        assert histograms[f"stage_{name}_seconds"]["count"] > 0
+
+
+def test_predict_batch_requires_clients(client, case_worker_headers):
+    """Test that an empty batch is rejected"""
+    response = client.post(
+        "/clients/predict/batch", json={"clients": []}, headers=case_worker_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_partial_evaluation_matches_model_predict():
+    """Test that partially evaluated trees reproduce the forest exactly"""
+    raw_data = logic.clean_input_data(make_payload(age=44, housing="4"))
+    intervention_rows = logic.create_matrix(raw_data)
+    predictions = logic.predict_combinations([raw_data])[0]
+    estimator = logic.get_model().estimator
+    np.testing.assert_array_equal(predictions, estimator.predict(intervention_rows))
+    # The first combination has every intervention off, i.e. the baseline
+    np.testing.assert_array_equal(
+        predictions[:1],
+        estimator.predict(logic.get_baseline_row(raw_data).reshape(1, -1)),
+    )
+
+
+def test_precomputed_permutations_and_top_combinations():
+    """Test the cached combination matrix and the argpartition top-k"""
+    perms = logic.intervention_permutations(7)
+    assert perms is logic.intervention_permutations(7)
+    np.testing.assert_array_equal(perms, list(product([0, 1], repeat=7)))
+    predictions = np.random.default_rng(1).random((4, 128))
+    np.testing.assert_array_equal(
+        logic.top_combinations(predictions, 5), predictions.argsort(axis=1)[:, -5:]
+    )
+
+
+def test_recommendations_report_tree_spread():
+    """Test the per-tree spread against each estimator of the forest"""
+    raw_data = logic.clean_input_data(PREDICTION_PAYLOAD)
+    result = logic.score_batch([raw_data])[0]
+    assert len(result["spreads"]) == len(result["interventions"])
+    best_row = logic.create_matrix(raw_data)[
+        logic.top_combinations(logic.predict_combinations([raw_data]))[0, -1]
+    ]
+    tree_predictions = [
+        tree.predict(best_row.reshape(1, -1).astype(np.float32))[0]
+        for tree in logic.get_model().estimator.estimators_
+    ]
+    spread = result["spreads"][-1]
+    assert spread["std"] == pytest.approx(np.std(tree_predictions))
+    assert spread["low"] <= result["interventions"][-1][0] <= spread["high"]
+    assert result["baseline_spread"]["std"] >= 0
+
+
+def test_forest_kernel_matches_model_predict():
+    """Test that the packed forest kernel is bit-identical to sklearn"""
+    features = np.random.default_rng(0).integers(0, 15, size=(300, 31))
+    loaded = logic.get_model()
+    np.testing.assert_array_equal(
+        loaded.forest_kernel.predict(features), loaded.estimator.predict(features)
+    )
+
+
+def test_prediction_cache_evicts_and_expires():
+    """Test LRU eviction and TTL expiry of the prediction cache"""
+    now = [0.0]
+    cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used entry
+    assert cache.get("b") is None
+    now[0] = 11.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert (stats["evictions"], stats["expirations"]) == (1, 1)
+
+
+def test_cached_predictions_are_keyed_on_the_scoring_model(monkeypatch):
+    """Test that cached results follow the scoring model, not the registry"""
+    registry = get_registry()
+    original_model = registry.get_current_model_name()
+    logic.PREDICTION_CACHE.clear()
+    first = logic.interpret_and_calculate(PREDICTION_PAYLOAD)
+    hits = logic.PREDICTION_CACHE.hits
+    registry.set_current_model("LinearRegression")
+    try:
+        assert logic.interpret_and_calculate(PREDICTION_PAYLOAD) == first
+        assert logic.PREDICTION_CACHE.hits == hits + 1
+    finally:
+        registry.set_current_model(original_model)
+    loaded = logic.get_model()
+    replaced = logic.LoadedModel(loaded.estimator, loaded.forest_kernel, "replaced")
+    monkeypatch.setattr(logic, "_loaded_model", replaced)
+    logic.interpret_and_calculate(PREDICTION_PAYLOAD)
+    assert logic.PREDICTION_CACHE.hits == hits + 1
+
+
+def test_readiness_reported_after_warmup(client):
+    """Test that readiness only turns healthy once the model is warmed up"""
+    if not logic.is_ready():
+        response = client.get("/health/ready")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    logic.warmup()
+    response = client.get("/health/ready")
+    assert response.status_code == status.HTTP_200_OK
+    assert client.get("/health/live").status_code == status.HTTP_200_OK
+
+
+def test_model_loads_from_exported_arrays(tmp_path):
+    """Test that the exported, memory-mapped model scores like the pickle"""
+    logic.export_model_arrays(arrays_path=tmp_path / "model_arrays")
+    loaded = logic.load_model(arrays_path=tmp_path / "model_arrays")
+    assert loaded.estimator is None
+    assert isinstance(loaded.forest_kernel.value, np.memmap)
+    raw_data = logic.clean_input_data(PREDICTION_PAYLOAD)
+    intervention_rows = logic.create_matrix(raw_data)
+    np.testing.assert_array_equal(
+        loaded.forest_kernel.predict(intervention_rows),
+        logic.get_model().estimator.predict(intervention_rows),
+    )
+
+
+def test_predict_endpoint(client, case_worker_headers):
+    """Test scoring a single client through the micro-batched endpoint"""
+    logic.PREDICTION_CACHE.clear()
+    response = client.post(
+        "/clients/predict", json=PREDICTION_PAYLOAD, headers=case_worker_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert (
+        result["baseline"]
+        == logic.interpret_and_calculate(PREDICTION_PAYLOAD)["baseline"]
+    )
+    assert len(result["interventions"]) == 3
+    histograms = client.get("/metrics").json()["histograms"]
+    assert histograms["prediction_batch_size"]["count"] > 0
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    """Test that concurrent submissions are processed as one batch"""
+    batches = []
+
+    def process_batch(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=8, max_wait_seconds=0.05)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+
+    assert asyncio.run(submit_all()) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+def test_intervention_search_matches_brute_force():
+    """Test that branch-and-bound finds the exact top combinations of 2^15"""
+    from sklearn.ensemble import RandomForestRegressor
+
+    rng = np.random.default_rng(0)
+    features = np.hstack(
+        (rng.integers(0, 10, size=(2000, 5)), rng.integers(0, 2, size=(2000, 15)))
+    )
+    target = features[:, 5:] @ rng.normal(size=15) + features[:, 0]
+    forest = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0)
+    kernel = ForestKernel.from_estimator(forest.fit(features, target))
+    fixed_row = [3, 1, 4, 1, 5]
+    combinations = np.array(
+        [[(mask >> bit) & 1 for bit in range(15)] for mask in range(1 << 15)]
+    )
+    brute_force = kernel.predict(
+        np.hstack((np.tile(fixed_row, (len(combinations), 1)), combinations))
+    )
+
+    searcher = InterventionSearch(PartialEvaluator(kernel, 5), fixed_row, 15)
+    found, open_bound = searcher.search(top_k=5)
+    assert open_bound is None
+    assert [score for score, _ in found] == sorted(brute_force)[::-1][:5]
+    assert all(brute_force[ones] == score for score, ones in found)
+    assert searcher.nodes_expanded < len(combinations) // 10
+
+    limited = InterventionSearch(PartialEvaluator(kernel, 5), fixed_row, 15)
+    found, _ = limited.search(top_k=3, max_interventions=2)
+    allowed = combinations.sum(axis=1) <= 2
+    assert [score for score, _ in found] == sorted(brute_force[allowed])[::-1][:3]
+    assert all(bin(ones).count("1") <= 2 for _, ones in found)
+
+
+def test_predict_search_endpoint(client, case_worker_headers):
+    """Test the constrained intervention search endpoint"""
+    response = client.post(
+        "/clients/predict/search",
+        json={"client": PREDICTION_PAYLOAD, "max_interventions": 1},
+        headers=case_worker_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert result["exact"] is True
+    assert all(len(names) <= 1 for _, names in result["interventions"])
+
+
+def test_what_if_sweep_endpoint(client, case_worker_headers):
+    """Test a one- and a two-feature sweep against single predictions"""
+    response = client.post(
+        "/clients/predict/what-if",
+        json={"client": PREDICTION_PAYLOAD, "sweeps": [{"feature": "computer_scale"}]},
+        headers=case_worker_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    sweep = response.json()
+    assert sweep["values"] == [list(range(11))]
+    assert np.shape(sweep["predictions"]) == (11, 128)
+    logic.PREDICTION_CACHE.clear()
+    single = logic.interpret_and_calculate(make_payload(computer_scale=4))
+    assert sweep["baseline"][4] == single["baseline"]
+    assert sweep["best"][4] == single["interventions"][-1][0]
+
+    response = client.post(
+        "/clients/predict/what-if",
+        json={
+            "client": PREDICTION_PAYLOAD,
+            "sweeps": [
+                {"feature": "time_unemployed", "stop": 24, "step": 6},
+                {"feature": "housing"},
+            ],
+        },
+        headers=case_worker_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert np.shape(response.json()["predictions"]) == (5, 10, 128)
+
+
+def test_what_if_sweep_rejects_invalid_ranges(client, case_worker_headers):
+    """Test that sweeps must stay within the validator bounds"""
+    for sweeps in (
+        [{"feature": "time_unemployed"}],
+        [{"feature": "computer_scale", "stop": 11}],
+        [{"feature": "favourite_colour"}],
+    ):
+        response = client.post(
+            "/clients/predict/what-if",
+            json={"client": PREDICTION_PAYLOAD, "sweeps": sweeps},
+            headers=case_worker_headers,
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,86 @@
+from fastapi import status
+
+from app.clients.service import logic
+from app.ml import get_registry
+from app.ml.feature_encoder import FEATURE_COLUMNS
+from app.models import Client, ClientRecommendation
+
+
+def test_backfill_populates_recommendations(client, admin_headers):
+    """Test that the backfill scores every client once per model version"""
+    response = client.post("/clients/recommendations/backfill", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["refreshed"] == 2
+    response = client.post("/clients/recommendations/backfill", headers=admin_headers)
+    assert response.json()["refreshed"] == 0
+
+    response = client.get("/clients/recommendations", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    listing = response.json()
+    assert listing["total"] == 2
+    assert [row["client_id"] for row in listing["recommendations"]] == [1, 2]
+    assert all(len(row["interventions"]) == 3 for row in listing["recommendations"])
+
+
+def test_backfill_follows_the_scoring_model(client, admin_headers, monkeypatch):
+    """Test that stored recommendations go stale when the model file changes"""
+    client.post("/clients/recommendations/backfill", headers=admin_headers)
+    registry = get_registry()
+    original_model = registry.get_current_model_name()
+    try:
+        response = client.post("/models/switch/LinearRegression", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        response = client.post(
+            "/clients/recommendations/backfill", headers=admin_headers
+        )
+        assert response.json()["refreshed"] == 0
+    finally:
+        registry.set_current_model(original_model)
+
+    loaded = logic.get_model()
+    replaced = logic.LoadedModel(loaded.estimator, loaded.forest_kernel, "replaced")
+    monkeypatch.setattr(logic, "_loaded_model", replaced)
+    response = client.post("/clients/recommendations/backfill", headers=admin_headers)
+    assert response.json() == {"refreshed": 2, "model_version": "replaced"}
+
+
+def test_client_update_refreshes_its_recommendation(client, admin_headers, test_db):
+    """Test that updating a client rescored only that client"""
+    client.post("/clients/recommendations/backfill", headers=admin_headers)
+    other = test_db.get(ClientRecommendation, 2).updated_at
+
+    response = client.put("/clients/1", json={"age": 58}, headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get("/clients/1/recommendation", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    stored = response.json()
+    stored_client = test_db.get(Client, 1)
+    expected = logic.score_batch(
+        [[float(getattr(stored_client, column)) for column in FEATURE_COLUMNS]]
+    )[0]
+    assert stored["baseline"] == expected["baseline"]
+    assert [score for score, _ in stored["interventions"]] == [
+        score for score, _ in expected["interventions"]
+    ]
+    test_db.expire_all()
+    assert test_db.get(ClientRecommendation, 2).updated_at == other
+
+    client.delete("/clients/1", headers=admin_headers)
+    response = client.get("/clients/1/recommendation", headers=admin_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_failed_refresh_keeps_the_update(client, admin_headers, test_db, monkeypatch):
+    """Test that a scoring failure drops the stale recommendation, not the update"""
+    client.post("/clients/recommendations/backfill", headers=admin_headers)
+
+    def fail(*args):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr("app.clients.service.recommendations.score_batch", fail)
+    response = client.put("/clients/1", json={"age": 58}, headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["age"] == 58
+    test_db.expire_all()
+    assert test_db.get(ClientRecommendation, 1) is None
+    assert test_db.get(ClientRecommendation, 2) is not None